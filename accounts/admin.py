@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import (
     User, CandidateProfile, CompanyProfile, ProblemReport, SiteSettings, 
-    SiteMetrics, CanonicalSkill, SkillCorrectionLog, AuditLog, Notification
+    SiteMetrics, CanonicalSkill, City, SkillCorrectionLog, AuditLog, Notification,
+    OutboxEmail,
 )
 
 
@@ -95,6 +96,13 @@ class CanonicalSkillAdmin(admin.ModelAdmin):
     list_editable = ('is_active',)
 
 
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'state', 'latitude', 'longitude')
+    list_filter = ('state',)
+    search_fields = ('name', 'key')
+
+
 @admin.register(SkillCorrectionLog)
 class SkillCorrectionLogAdmin(admin.ModelAdmin):
     list_display = ('original_term', 'corrected_term', 'similarity_score', 'was_auto_corrected', 'needs_review', 'created_at')
@@ -123,3 +131,11 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ('notification_type', 'is_read', 'created_at')
     search_fields = ('user__username', 'title', 'message')
     list_editable = ('is_read',)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('last_error',)
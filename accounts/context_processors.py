@@ -1,22 +1,17 @@
 """Context processors para dados globais de templates (notificações e mensagens)."""
+from django.utils.functional import SimpleLazyObject
 
 
 def notifications(request):
     if not request.user.is_authenticated:
         return {}
 
-    from accounts.models import Notification
-    from messaging.models import Message
-
-    user_notifications = Notification.objects.filter(user=request.user)
-
-    unread_messages_count = Message.objects.filter(
-        conversation__participants=request.user,
-        is_read=False
-    ).exclude(sender=request.user).count()
+    from accounts.unread import recent_notifications
 
+    # Contadores desnormalizados no proprio User (ver accounts/unread.py): sem consultas
+    user = request.user
     return {
-        'unread_notifications_count': user_notifications.filter(is_read=False).count(),
-        'recent_notifications': user_notifications[:8],
-        'unread_messages_count': unread_messages_count,
+        'unread_notifications_count': user.unread_notifications_count,
+        'recent_notifications': SimpleLazyObject(lambda: recent_notifications(user)),
+        'unread_messages_count': user.unread_messages_count,
     }
@@ -0,0 +1,70 @@
+import re
+
+from accounts.skill_normalizer import remove_accents
+
+STATE_NAMES = {
+    'acre': 'AC', 'alagoas': 'AL', 'amapa': 'AP', 'amazonas': 'AM', 'bahia': 'BA', 'ceara': 'CE',
+    'distrito federal': 'DF', 'espirito santo': 'ES', 'goias': 'GO', 'maranhao': 'MA',
+    'mato grosso': 'MT', 'mato grosso do sul': 'MS', 'minas gerais': 'MG', 'para': 'PA',
+    'paraiba': 'PB', 'parana': 'PR', 'pernambuco': 'PE', 'piaui': 'PI', 'rio de janeiro': 'RJ',
+    'rio grande do norte': 'RN', 'rio grande do sul': 'RS', 'rondonia': 'RO', 'roraima': 'RR',
+    'santa catarina': 'SC', 'sao paulo': 'SP', 'sergipe': 'SE', 'tocantins': 'TO',
+}
+STATE_CODES = set(STATE_NAMES.values())
+
+
+def normalize_place(text):
+    """Nome de lugar sem acentos, minusculo e com espacos simples."""
+    text = remove_accents(text or '').lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def normalize_state(text):
+    """Sigla da UF a partir da sigla ou do nome do estado, ou '' se nao reconhecida."""
+    normalized = normalize_place(text)
+    if normalized.upper() in STATE_CODES:
+        return normalized.upper()
+    return STATE_NAMES.get(normalized, '')
+
+
+def parse_location(location):
+    """Separa um local livre ("Cidade, UF", "Cidade - UF", "Cidade/UF") em (cidade, UF)."""
+    match = re.match(r'^(.*?)\s*(?:,|\s-\s|/)\s*([^,/]+?)\s*$', location or '')
+    if match:
+        state = normalize_state(match.group(2))
+        if state:
+            return match.group(1).strip(), state
+    return (location or '').split(',')[0].strip(), ''
+
+
+def resolve_city_id(city, state='', create=False):
+    """
+    ID da cidade canonica para (cidade, UF).
+
+    Sem UF, so resolve se o nome for unico na tabela. Cidades desconhecidas
+    ficam sem cidade canonica (comparadas pelo texto); com create=True e UF
+    valida sao criadas sem coordenadas. Os saves de perfil e vaga nao criam
+    cidades: cada City nova muda a versao da tabela de distancias e obriga
+    todos os processos a recalcula-la; a tabela vem do seed_cities e do admin.
+    """
+    from accounts.models import City
+
+    key = normalize_place(city)
+    if not key:
+        return None
+    state = normalize_state(state)
+
+    if not state:
+        ids = list(City.objects.filter(key=key).values_list('id', flat=True)[:2])
+        return ids[0] if len(ids) == 1 else None
+
+    city_id = City.objects.filter(key=key, state=state).values_list('id', flat=True).first()
+    if city_id is None and create:
+        city_id = City.objects.get_or_create(key=key, state=state, defaults={'name': city.strip()})[0].id
+    return city_id
+
+
+def resolve_location_id(location, create=False):
+    city, state = parse_location(location)
+    return resolve_city_id(city, state, create=create)
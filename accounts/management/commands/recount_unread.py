@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from accounts.unread import recount_unread
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the unread notification and message counters of every user.'
+
+    def handle(self, *args, **options):
+        updated = recount_unread()
+        self.stdout.write(self.style.SUCCESS(f'Recounted unread counters for {updated} users.'))
@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand
+from accounts.models import CandidateProfile, City
+from accounts.location_normalizer import normalize_place
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Capitais e principais polos de vagas, com coordenadas (latitude, longitude)
+CITIES = [
+    {'name': 'Sao Paulo', 'state': 'SP', 'latitude': -23.5505, 'longitude': -46.6333},
+    {'name': 'Campinas', 'state': 'SP', 'latitude': -22.9099, 'longitude': -47.0626},
+    {'name': 'Santos', 'state': 'SP', 'latitude': -23.9608, 'longitude': -46.3336},
+    {'name': 'Sao Jose dos Campos', 'state': 'SP', 'latitude': -23.1791, 'longitude': -45.8872},
+    {'name': 'Ribeirao Preto', 'state': 'SP', 'latitude': -21.1775, 'longitude': -47.8103},
+    {'name': 'Sorocaba', 'state': 'SP', 'latitude': -23.5015, 'longitude': -47.4526},
+    {'name': 'Guarulhos', 'state': 'SP', 'latitude': -23.4538, 'longitude': -46.5333},
+    {'name': 'Osasco', 'state': 'SP', 'latitude': -23.5329, 'longitude': -46.7917},
+    {'name': 'Barueri', 'state': 'SP', 'latitude': -23.5057, 'longitude': -46.8790},
+    {'name': 'Santo Andre', 'state': 'SP', 'latitude': -23.6639, 'longitude': -46.5383},
+    {'name': 'Sao Bernardo do Campo', 'state': 'SP', 'latitude': -23.6914, 'longitude': -46.5646},
+    {'name': 'Jundiai', 'state': 'SP', 'latitude': -23.1857, 'longitude': -46.8978},
+    {'name': 'Sao Carlos', 'state': 'SP', 'latitude': -22.0175, 'longitude': -47.8910},
+    {'name': 'Rio de Janeiro', 'state': 'RJ', 'latitude': -22.9068, 'longitude': -43.1729},
+    {'name': 'Niteroi', 'state': 'RJ', 'latitude': -22.8832, 'longitude': -43.1034},
+    {'name': 'Petropolis', 'state': 'RJ', 'latitude': -22.5112, 'longitude': -43.1779},
+    {'name': 'Belo Horizonte', 'state': 'MG', 'latitude': -19.9167, 'longitude': -43.9345},
+    {'name': 'Contagem', 'state': 'MG', 'latitude': -19.9321, 'longitude': -44.0539},
+    {'name': 'Uberlandia', 'state': 'MG', 'latitude': -18.9186, 'longitude': -48.2772},
+    {'name': 'Juiz de Fora', 'state': 'MG', 'latitude': -21.7642, 'longitude': -43.3496},
+    {'name': 'Vitoria', 'state': 'ES', 'latitude': -20.3155, 'longitude': -40.3128},
+    {'name': 'Vila Velha', 'state': 'ES', 'latitude': -20.3297, 'longitude': -40.2925},
+    {'name': 'Curitiba', 'state': 'PR', 'latitude': -25.4284, 'longitude': -49.2733},
+    {'name': 'Londrina', 'state': 'PR', 'latitude': -23.3045, 'longitude': -51.1696},
+    {'name': 'Maringa', 'state': 'PR', 'latitude': -23.4205, 'longitude': -51.9333},
+    {'name': 'Florianopolis', 'state': 'SC', 'latitude': -27.5954, 'longitude': -48.5480},
+    {'name': 'Joinville', 'state': 'SC', 'latitude': -26.3045, 'longitude': -48.8487},
+    {'name': 'Blumenau', 'state': 'SC', 'latitude': -26.9194, 'longitude': -49.0661},
+    {'name': 'Porto Alegre', 'state': 'RS', 'latitude': -30.0346, 'longitude': -51.2177},
+    {'name': 'Caxias do Sul', 'state': 'RS', 'latitude': -29.1678, 'longitude': -51.1794},
+    {'name': 'Brasilia', 'state': 'DF', 'latitude': -15.7939, 'longitude': -47.8828},
+    {'name': 'Goiania', 'state': 'GO', 'latitude': -16.6869, 'longitude': -49.2648},
+    {'name': 'Campo Grande', 'state': 'MS', 'latitude': -20.4697, 'longitude': -54.6201},
+    {'name': 'Cuiaba', 'state': 'MT', 'latitude': -15.6014, 'longitude': -56.0979},
+    {'name': 'Salvador', 'state': 'BA', 'latitude': -12.9777, 'longitude': -38.5016},
+    {'name': 'Feira de Santana', 'state': 'BA', 'latitude': -12.2664, 'longitude': -38.9663},
+    {'name': 'Recife', 'state': 'PE', 'latitude': -8.0476, 'longitude': -34.8770},
+    {'name': 'Jaboatao dos Guararapes', 'state': 'PE', 'latitude': -8.1130, 'longitude': -35.0150},
+    {'name': 'Fortaleza', 'state': 'CE', 'latitude': -3.7319, 'longitude': -38.5267},
+    {'name': 'Natal', 'state': 'RN', 'latitude': -5.7945, 'longitude': -35.2110},
+    {'name': 'Joao Pessoa', 'state': 'PB', 'latitude': -7.1195, 'longitude': -34.8450},
+    {'name': 'Campina Grande', 'state': 'PB', 'latitude': -7.2307, 'longitude': -35.8817},
+    {'name': 'Maceio', 'state': 'AL', 'latitude': -9.6658, 'longitude': -35.7353},
+    {'name': 'Aracaju', 'state': 'SE', 'latitude': -10.9472, 'longitude': -37.0731},
+    {'name': 'Teresina', 'state': 'PI', 'latitude': -5.0920, 'longitude': -42.8038},
+    {'name': 'Sao Luis', 'state': 'MA', 'latitude': -2.5307, 'longitude': -44.3068},
+    {'name': 'Belem', 'state': 'PA', 'latitude': -1.4558, 'longitude': -48.4902},
+    {'name': 'Manaus', 'state': 'AM', 'latitude': -3.1190, 'longitude': -60.0217},
+    {'name': 'Macapa', 'state': 'AP', 'latitude': 0.0349, 'longitude': -51.0694},
+    {'name': 'Boa Vista', 'state': 'RR', 'latitude': 2.8235, 'longitude': -60.6758},
+    {'name': 'Porto Velho', 'state': 'RO', 'latitude': -8.7612, 'longitude': -63.9004},
+    {'name': 'Rio Branco', 'state': 'AC', 'latitude': -9.9747, 'longitude': -67.8243},
+    {'name': 'Palmas', 'state': 'TO', 'latitude': -10.2491, 'longitude': -48.3243},
+]
+
+
+class Command(BaseCommand):
+    help = 'Seeds the canonical cities table with coordinates used by location matching'
+
+    def handle(self, *args, **options):
+        created_count = 0
+        updated_count = 0
+        existing = {(city.key, city.state): city for city in City.objects.all()}
+
+        # Cada gravacao de City muda a versao da tabela de distancias (ver
+        # match.signals); linhas iguais ao seed nao sao regravadas a cada deploy
+        for city_data in CITIES:
+            city = existing.get((normalize_place(city_data['name']), city_data['state']))
+            if city is None:
+                City.objects.create(**city_data)
+                created_count += 1
+            elif any(getattr(city, field) != city_data[field] for field in ('name', 'latitude', 'longitude')):
+                for field in ('name', 'latitude', 'longitude'):
+                    setattr(city, field, city_data[field])
+                city.save()
+                updated_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Cities seeded: {created_count} created, {updated_count} updated'
+            )
+        )
+        logger.info(f'Canonical cities seeded: {created_count} created, {updated_count} updated')
+
+        resolved = self.resolve_pending()
+        if resolved:
+            self.stdout.write(self.style.SUCCESS(f'Canonical city resolved for {resolved} profiles/jobs'))
+
+    def resolve_pending(self):
+        """
+        Resolve a cidade canonica de perfis e vagas que ainda nao tem uma (ex.:
+        gravados antes do seed). Os saves nao criam cidades, entao no primeiro
+        deploy as migracoes nao tem contra o que resolver.
+        """
+        from jobs.models import Job
+        from accounts.location_normalizer import resolve_location_id
+
+        resolved = 0
+        profiles = CandidateProfile.objects.filter(canonical_city__isnull=True).exclude(city='', location='')
+        for profile in profiles.iterator():
+            if profile.resolve_canonical_city():
+                profile.save(update_fields=['city', 'state', 'location'])
+                resolved += 1
+        for job in Job.objects.filter(canonical_city__isnull=True).exclude(location='').iterator():
+            if resolve_location_id(job.location):
+                job.save(update_fields=['location'])
+                resolved += 1
+        return resolved
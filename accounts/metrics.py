@@ -0,0 +1,101 @@
+"""
+Buffer em memoria dos contadores de SiteMetrics.
+
+Cada processo acumula os incrementos (por dia e campo) e os grava de uma vez
+com UPDATE ... SET campo = campo + delta, a cada METRICS_FLUSH_EVERY eventos ou
+METRICS_FLUSH_INTERVAL segundos. Assim uma visualizacao de pagina nao custa
+consultas e workers concorrentes nao perdem incrementos uns dos outros. Com
+METRICS_FLUSH_TIMER, um timer grava o buffer METRICS_FLUSH_INTERVAL segundos
+apos o primeiro incremento pendente, mesmo sem novos eventos (worker ocioso).
+O que estiver no buffer e gravado tambem quando o processo termina.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._events = 0
+        self._flushed_at = time.monotonic()
+        self._known_dates = set()
+        self._database = None
+        self._timer = None
+
+    def add(self, field_name, amount=1):
+        flush_every = getattr(settings, 'METRICS_FLUSH_EVERY', 100)
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+        with self._lock:
+            self._database = connection.settings_dict['NAME']
+            self._pending[(timezone.now().date(), field_name)] += amount
+            self._events += 1
+            due = self._events >= flush_every or time.monotonic() - self._flushed_at >= interval
+            if not due and self._timer is None and getattr(settings, 'METRICS_FLUSH_TIMER', False):
+                self._timer = threading.Timer(interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # Conexao propria desta thread
+            connection.close()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def _take(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._events = 0
+            self._flushed_at = time.monotonic()
+        return pending
+
+    def flush(self):
+        """Grava os deltas acumulados: um UPDATE com F() por dia."""
+        from .models import SiteMetrics
+
+        pending = self._take()
+        if self._database != connection.settings_dict['NAME']:
+            # Contagens de outro banco (ex.: o de testes, ja destruido na saida)
+            return 0
+        by_date = {}
+        for (date, field_name), amount in pending.items():
+            if amount:
+                by_date.setdefault(date, {})[field_name] = amount
+
+        for date, deltas in by_date.items():
+            try:
+                if date not in self._known_dates:
+                    SiteMetrics.objects.get_or_create(date=date)
+                    self._known_dates.add(date)
+                SiteMetrics.objects.filter(date=date).update(
+                    **{field_name: F(field_name) + amount for field_name, amount in deltas.items()}
+                )
+            except Exception:
+                logger.exception('Could not flush site metrics for %s; keeping them buffered.', date)
+                with self._lock:
+                    for field_name, amount in deltas.items():
+                        self._pending[(date, field_name)] += amount
+        return sum(pending.values())
+
+
+buffer = MetricsBuffer()
+atexit.register(buffer.flush)
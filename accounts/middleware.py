@@ -45,7 +45,7 @@ class MaintenanceModeMiddleware:
         
         if not is_exempt:
             try:
-                settings = SiteSettings.get_settings()
+                settings = SiteSettings.get_cached()
                 
                 if settings.maintenance_mode:
                     is_admin = request.user.is_authenticated and request.user.is_admin_user()
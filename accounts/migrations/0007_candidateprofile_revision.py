@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_backfill_email_verified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidateprofile',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Incrementado a cada alteracao do perfil'),
+        ),
+    ]
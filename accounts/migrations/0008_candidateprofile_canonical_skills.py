@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+def backfill_candidate_skills(apps, schema_editor):
+    CanonicalSkill = apps.get_model('accounts', 'CanonicalSkill')
+    CandidateProfile = apps.get_model('accounts', 'CandidateProfile')
+
+    skill_ids = dict(CanonicalSkill.objects.values_list('name', 'id'))
+    for obj in CandidateProfile.objects.exclude(skills=''):
+        names = list(dict.fromkeys(s.strip().lower()[:100] for s in obj.skills.split(',') if s.strip()))
+        for name in names:
+            if name not in skill_ids:
+                skill_ids[name] = CanonicalSkill.objects.create(name=name, is_active=False).id
+        obj.canonical_skills.set([skill_ids[name] for name in names])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_candidateprofile_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidateprofile',
+            name='canonical_skills',
+            field=models.ManyToManyField(blank=True, editable=False, help_text='Habilidades estruturadas, sincronizadas a partir do campo skills', related_name='candidate_profiles', to='accounts.canonicalskill'),
+        ),
+        migrations.RunPython(backfill_candidate_skills, migrations.RunPython.noop),
+    ]
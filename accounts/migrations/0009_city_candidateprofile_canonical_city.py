@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:51
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia congelada de accounts.location_normalizer: a migracao nao deve mudar se o modulo mudar
+STATE_NAMES = {
+    'acre': 'AC', 'alagoas': 'AL', 'amapa': 'AP', 'amazonas': 'AM', 'bahia': 'BA', 'ceara': 'CE',
+    'distrito federal': 'DF', 'espirito santo': 'ES', 'goias': 'GO', 'maranhao': 'MA',
+    'mato grosso': 'MT', 'mato grosso do sul': 'MS', 'minas gerais': 'MG', 'para': 'PA',
+    'paraiba': 'PB', 'parana': 'PR', 'pernambuco': 'PE', 'piaui': 'PI', 'rio de janeiro': 'RJ',
+    'rio grande do norte': 'RN', 'rio grande do sul': 'RS', 'rondonia': 'RO', 'roraima': 'RR',
+    'santa catarina': 'SC', 'sao paulo': 'SP', 'sergipe': 'SE', 'tocantins': 'TO',
+}
+
+
+def normalize_place(text):
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text or '') if not unicodedata.combining(c))
+    text = re.sub(r'[^\w\s]', ' ', text.lower())
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def normalize_state(text):
+    normalized = normalize_place(text)
+    if normalized.upper() in STATE_NAMES.values():
+        return normalized.upper()
+    return STATE_NAMES.get(normalized, '')
+
+
+def parse_location(location):
+    match = re.match(r'^(.*?)\s*(?:,|\s-\s|/)\s*([^,/]+?)\s*$', location or '')
+    if match:
+        state = normalize_state(match.group(2))
+        if state:
+            return match.group(1).strip(), state
+    return (location or '').split(',')[0].strip(), ''
+
+
+def resolve_city_id(City, city, state):
+    """Como accounts.location_normalizer.resolve_city_id, sem criar cidades."""
+    key = normalize_place(city)
+    if not key:
+        return None
+    state = normalize_state(state)
+    if not state:
+        ids = list(City.objects.filter(key=key).values_list('id', flat=True)[:2])
+        return ids[0] if len(ids) == 1 else None
+    return City.objects.filter(key=key, state=state).values_list('id', flat=True).first()
+
+
+def backfill_candidate_cities(apps, schema_editor):
+    # So resolve contra cidades ja cadastradas; o seed_cities resolve o restante
+    City = apps.get_model('accounts', 'City')
+    CandidateProfile = apps.get_model('accounts', 'CandidateProfile')
+    if not City.objects.exists():
+        return
+
+    for obj in CandidateProfile.objects.exclude(city='', location=''):
+        city, state = (obj.city, obj.state) if obj.city else parse_location(obj.location)
+        obj.canonical_city_id = resolve_city_id(City, city, state)
+        if obj.canonical_city_id:
+            obj.save(update_fields=['canonical_city'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_candidateprofile_canonical_skills'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Nome de exibicao da cidade', max_length=100)),
+                ('key', models.CharField(editable=False, help_text='Nome normalizado (sem acentos, minusculo)', max_length=100)),
+                ('state', models.CharField(choices=[('AC', 'Acre'), ('AL', 'Alagoas'), ('AP', 'Amapa'), ('AM', 'Amazonas'), ('BA', 'Bahia'), ('CE', 'Ceara'), ('DF', 'Distrito Federal'), ('ES', 'Espirito Santo'), ('GO', 'Goias'), ('MA', 'Maranhao'), ('MT', 'Mato Grosso'), ('MS', 'Mato Grosso do Sul'), ('MG', 'Minas Gerais'), ('PA', 'Para'), ('PB', 'Paraiba'), ('PR', 'Parana'), ('PE', 'Pernambuco'), ('PI', 'Piaui'), ('RJ', 'Rio de Janeiro'), ('RN', 'Rio Grande do Norte'), ('RS', 'Rio Grande do Sul'), ('RO', 'Rondonia'), ('RR', 'Roraima'), ('SC', 'Santa Catarina'), ('SP', 'Sao Paulo'), ('SE', 'Sergipe'), ('TO', 'Tocantins')], max_length=2)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Cidade',
+                'verbose_name_plural': 'Cidades',
+                'ordering': ['state', 'name'],
+                'unique_together': {('key', 'state')},
+            },
+        ),
+        migrations.AddField(
+            model_name='candidateprofile',
+            name='canonical_city',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Cidade canonica, resolvida a partir de cidade/estado ou do local', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='candidate_profiles', to='accounts.city'),
+        ),
+        migrations.RunPython(backfill_candidate_cities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counters(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Notification = apps.get_model('accounts', 'Notification')
+    Message = apps.get_model('messaging', 'Message')
+
+    unread_notifications = (
+        Notification.objects.filter(user=OuterRef('pk'), is_read=False)
+        .order_by().values('user').annotate(total=Count('pk')).values('total')
+    )
+    unread_messages = (
+        Message.objects.filter(conversation__participants=OuterRef('pk'), is_read=False)
+        .exclude(sender=OuterRef('pk'))
+        .order_by().values('conversation__participants').annotate(total=Count('pk')).values('total')
+    )
+    User.objects.update(
+        unread_notifications_count=Coalesce(Subquery(unread_notifications), 0),
+        unread_messages_count=Coalesce(Subquery(unread_messages), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_city_candidateprofile_canonical_city'),
+        ('messaging', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notifications_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='unread_messages_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='unread_notifications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
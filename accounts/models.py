@@ -1,5 +1,8 @@
+import time
+
+from django.conf import settings as django_settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 
@@ -16,6 +19,22 @@ class User(AbstractUser):
     phone = models.CharField(max_length=20, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Contadores desnormalizados da navbar, mantidos por accounts/unread.py
+    unread_notifications_count = models.PositiveIntegerField(default=0, editable=False)
+    unread_messages_count = models.PositiveIntegerField(default=0, editable=False)
+    notifications_version = models.PositiveIntegerField(default=0, editable=False)
+
+    UNREAD_FIELDS = ('unread_notifications_count', 'unread_messages_count', 'notifications_version')
+
+    def save(self, *args, **kwargs):
+        # Os contadores so mudam com UPDATE atomico; um save() com a instancia
+        # carregada no inicio da requisicao nao pode sobrescreve-los
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.UNREAD_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     def is_candidate(self):
         return self.user_type == 'candidate'
@@ -55,10 +74,56 @@ class CandidateProfile(models.Model):
     age = models.PositiveIntegerField(blank=True, null=True, verbose_name='Idade')
     interest_area = models.CharField(max_length=200, blank=True, verbose_name='Area de Interesse')
     available = models.BooleanField(default=True)
+    revision = models.PositiveIntegerField(default=0, editable=False, help_text='Incrementado a cada alteracao do perfil')
+    canonical_skills = models.ManyToManyField(
+        'CanonicalSkill',
+        blank=True,
+        related_name='candidate_profiles',
+        editable=False,
+        help_text='Habilidades estruturadas, sincronizadas a partir do campo skills'
+    )
+    canonical_city = models.ForeignKey(
+        'City',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='candidate_profiles',
+        editable=False,
+        help_text='Cidade canonica, resolvida a partir de cidade/estado ou do local'
+    )
     
     def __str__(self):
         return f"Perfil de {self.user.get_full_name() or self.user.username}"
     
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        # Incremento no banco: saves concorrentes de instancias antigas nao repetem a revisao
+        self.revision = 1 if adding else models.F('revision') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'city', 'state', 'location'} & set(update_fields):
+            self.canonical_city_id = self.resolve_canonical_city()
+            if update_fields is not None:
+                update_fields = {*update_fields, 'canonical_city'}
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'revision'}
+        # Como em Job.save: o recalculo de match so enxerga o perfil com as habilidades sincronizadas
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding:
+                self.refresh_from_db(fields=['revision'])
+            if update_fields is None or 'skills' in update_fields:
+                self.sync_canonical_skills()
+    
+    def resolve_canonical_city(self):
+        from accounts.location_normalizer import resolve_city_id, resolve_location_id
+        if self.city:
+            return resolve_city_id(self.city, self.state)
+        return resolve_location_id(self.location)
+    
+    def sync_canonical_skills(self):
+        from accounts.skill_normalizer import resolve_skill_ids
+        self.canonical_skills.set(resolve_skill_ids(self.get_skills_list()))
+    
     def get_skills_list(self):
         if self.skills:
             return [s.strip().lower() for s in self.skills.split(',') if s.strip()]
@@ -186,11 +251,43 @@ class SiteSettings(models.Model):
     def __str__(self):
         return 'Configuracoes do Site'
     
+    # Copia em memoria por processo, usada a cada requisicao (ver get_cached)
+    _cached = None
+    _cached_at = 0.0
+
     @classmethod
     def get_settings(cls):
         settings, created = cls.objects.get_or_create(pk=1)
         return settings
 
+    @classmethod
+    def get_cached(cls):
+        """
+        Configuracoes lidas no maximo a cada SITE_SETTINGS_CACHE_TTL segundos.
+
+        Salvar invalida a copia do processo atual; os demais workers veem a
+        mudanca quando o TTL expira.
+        """
+        ttl = getattr(django_settings, 'SITE_SETTINGS_CACHE_TTL', 5)
+        now = time.monotonic()
+        if cls._cached is None or now - cls._cached_at >= ttl:
+            cls._cached = cls.get_settings()
+            cls._cached_at = now
+        return cls._cached
+
+    @classmethod
+    def invalidate_cache(cls):
+        cls._cached = None
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        type(self).invalidate_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        type(self).invalidate_cache()
+        return result
+
 
 class SiteMetrics(models.Model):
     date = models.DateField(unique=True, default=timezone.now)
@@ -202,6 +299,11 @@ class SiteMetrics(models.Model):
     new_applications = models.PositiveIntegerField(default=0)
     chat_messages = models.PositiveIntegerField(default=0)
     matches_created = models.PositiveIntegerField(default=0)
+
+    COUNTER_FIELDS = (
+        'page_views', 'unique_visitors', 'new_users', 'new_companies',
+        'new_jobs', 'new_applications', 'chat_messages', 'matches_created',
+    )
     
     class Meta:
         ordering = ['-date']
@@ -219,11 +321,17 @@ class SiteMetrics(models.Model):
     
     @classmethod
     def increment(cls, field_name, amount=1):
-        metrics = cls.get_today()
-        current_value = getattr(metrics, field_name, 0)
-        setattr(metrics, field_name, current_value + amount)
-        metrics.save()
-        return metrics
+        """Soma ao contador de hoje via buffer do processo (ver accounts/metrics.py)."""
+        from .metrics import buffer
+        if field_name not in cls.COUNTER_FIELDS:
+            raise ValueError(f'Unknown site metric: {field_name}')
+        buffer.add(field_name, amount)
+
+    @classmethod
+    def flush(cls):
+        """Grava imediatamente os incrementos ainda no buffer deste processo."""
+        from .metrics import buffer
+        return buffer.flush()
 
 
 class CanonicalSkill(models.Model):
@@ -247,6 +355,28 @@ class CanonicalSkill(models.Model):
         return []
 
 
+class City(models.Model):
+    name = models.CharField(max_length=100, help_text='Nome de exibicao da cidade')
+    key = models.CharField(max_length=100, editable=False, help_text='Nome normalizado (sem acentos, minusculo)')
+    state = models.CharField(max_length=2, choices=CandidateProfile.BRAZILIAN_STATES)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['state', 'name']
+        unique_together = ['key', 'state']
+        verbose_name = 'Cidade'
+        verbose_name_plural = 'Cidades'
+    
+    def __str__(self):
+        return f"{self.name}, {self.state}"
+    
+    def save(self, *args, **kwargs):
+        from accounts.location_normalizer import normalize_place
+        self.key = normalize_place(self.name)
+        super().save(*args, **kwargs)
+
+
 class SkillCorrectionLog(models.Model):
     original_term = models.CharField(max_length=100)
     corrected_term = models.CharField(max_length=100, blank=True)
@@ -335,6 +465,16 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.title} - {self.user.username}"
     
+    @classmethod
+    def mark_all_read(cls, user):
+        """Marca todas como lidas; os contadores seguem pelo numero de linhas alteradas."""
+        from .unread import adjust_unread
+
+        updated = cls.objects.filter(user=user, is_read=False).update(is_read=True)
+        if updated:
+            adjust_unread(user, notifications=-updated, bump=True)
+        return updated
+
     @classmethod
     def notify_user(cls, user, notification_type, title, message, link=''):
         notification = cls.objects.create(
@@ -344,23 +484,54 @@ class Notification(models.Model):
             message=message,
             link=link
         )
-        # Email transacional junto com a notificação in-app (best-effort)
+        # Email transacional gravado na outbox e enviado em lote pelo worker
         if user.email:
-            try:
-                from django.core.mail import send_mail
-                from django.conf import settings
-                send_mail(
-                    subject=f'TalentMatch - {title}',
-                    message=f'{message}\n\nAcesse a plataforma para mais detalhes.',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=True,
-                )
-            except Exception:
-                pass
+            OutboxEmail.queue(
+                user.email,
+                f'TalentMatch - {title}',
+                f'{message}\n\nAcesse a plataforma para mais detalhes.',
+                user=user,
+            )
         return notification
 
 
+class OutboxEmail(models.Model):
+    """Email transacional aguardando envio em lote (ver accounts/outbox.py)."""
+    STATUS_CHOICES = (
+        ('pending', 'Pendente'),
+        ('sending', 'Enviando'),
+        ('sent', 'Enviado'),
+        ('failed', 'Falhou'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbox_emails')
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    batch_id = models.CharField(max_length=32, blank=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+        verbose_name = 'Email na Fila'
+        verbose_name_plural = 'Emails na Fila'
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.get_status_display()})"
+
+    @classmethod
+    def queue(cls, to_email, subject, body, user=None):
+        from .outbox import queue_email
+        return queue_email(to_email, subject, body, user=user)
+
+
 class EmailVerificationCode(models.Model):
     """Código OTP enviado por email para confirmar a posse do endereço."""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='verification_codes')
@@ -0,0 +1,147 @@
+"""
+Outbox de emails transacionais.
+
+A requisicao so grava o email em OutboxEmail e agenda a tarefa deliver_outbox
+(com dedup_key e atraso de EMAIL_OUTBOX_DELAY segundos); o que chegar nessa
+janela entra no mesmo envio. O worker entao:
+
+- assume um lote de emails pendentes com um UPDATE condicional;
+- junta os emails do mesmo destinatario em um unico resumo;
+- envia tudo por uma unica conexao SMTP, aberta uma vez por lote;
+- devolve as falhas para a fila com espera exponencial, ate
+  EMAIL_OUTBOX_MAX_ATTEMPTS tentativas.
+
+Sem worker para executar a fila (nenhum run_worker vivo nem worker embutido
+neste processo, ex.: um comando de gerenciamento), queue_email envia o lote ao
+fim da transacao, como antes da outbox.
+"""
+import logging
+import math
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+
+from taskqueue.embedded import worker_available
+from taskqueue.queue import retry_delay
+
+logger = logging.getLogger(__name__)
+
+DELIVER_DEDUP_KEY = 'accounts:deliver-outbox'
+
+
+def _schedule(delay=None):
+    from .tasks import deliver_outbox
+
+    delay = getattr(settings, 'EMAIL_OUTBOX_DELAY', 30) if delay is None else delay
+    deliver_outbox.enqueue(dedup_key=DELIVER_DEDUP_KEY, delay=max(math.ceil(delay), 0))
+
+
+def queue_email(to_email, subject, body, user=None):
+    """Grava o email na outbox e garante um envio agendado."""
+    from .models import OutboxEmail
+
+    email = OutboxEmail.objects.create(user=user, to_email=to_email, subject=subject, body=body)
+    _schedule()
+    if not worker_available():
+        transaction.on_commit(deliver_outbox)
+    return email
+
+
+def _ready(now):
+    stale = now - timedelta(seconds=getattr(settings, 'TASKS_VISIBILITY_TIMEOUT', 300))
+    return Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_at__lt=stale)
+
+
+def claim_batch(limit):
+    """Assume ate `limit` emails prontos; outro worker nao pega os mesmos."""
+    from .models import OutboxEmail
+
+    now = timezone.now()
+    batch_id = uuid.uuid4().hex
+    ids = list(OutboxEmail.objects.filter(_ready(now)).order_by('created_at').values_list('pk', flat=True)[:limit])
+    OutboxEmail.objects.filter(_ready(now), pk__in=ids).update(
+        status='sending', batch_id=batch_id, claimed_at=now, attempts=F('attempts') + 1,
+    )
+    return list(OutboxEmail.objects.filter(batch_id=batch_id, status='sending').order_by('created_at'))
+
+
+def compose(emails):
+    """Um EmailMessage por destinatario; varios emails viram um resumo."""
+    groups = {}
+    for email in emails:
+        groups.setdefault(email.to_email.lower(), []).append(email)
+
+    messages = []
+    for group in groups.values():
+        if len(group) == 1:
+            subject, body = group[0].subject, group[0].body
+        else:
+            subject = f'TalentMatch - {len(group)} novas notificacoes'
+            body = '\n\n---\n\n'.join(f'{email.subject}\n\n{email.body}' for email in group)
+        message = EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [group[0].to_email])
+        messages.append((message, group))
+    return messages
+
+
+def _failed(group, error):
+    from .models import OutboxEmail
+
+    now = timezone.now()
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    for email in group:
+        if email.attempts >= max_attempts:
+            changes = {'status': 'failed'}
+        else:
+            changes = {'status': 'pending', 'next_attempt_at': now + timedelta(seconds=retry_delay(email.attempts))}
+        OutboxEmail.objects.filter(pk=email.pk, batch_id=email.batch_id).update(last_error=error, **changes)
+
+
+def deliver_outbox(batch_size=None):
+    """Envia um lote da outbox por uma conexao SMTP. Retorna quantos emails foram enviados."""
+    from .models import OutboxEmail
+
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+    emails = claim_batch(batch_size)
+    sent = 0
+    if emails:
+        messages = compose(emails)
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            logger.warning(f'Could not connect to the mail server: {exc}')
+            for _, group in messages:
+                _failed(group, repr(exc))
+            messages = []
+
+        try:
+            for message, group in messages:
+                try:
+                    connection.send_messages([message])
+                except Exception as exc:
+                    logger.warning(f'Could not send email to {message.to[0]}: {exc}')
+                    _failed(group, repr(exc))
+                    continue
+                OutboxEmail.objects.filter(pk__in=[email.pk for email in group]).update(
+                    status='sent', sent_at=timezone.now(), last_error='',
+                )
+                sent += len(group)
+        finally:
+            connection.close()
+
+    # Lote cheio: continua logo; senao agenda a proxima repeticao pendente
+    if len(emails) >= batch_size:
+        _schedule(delay=0)
+    else:
+        next_attempt = OutboxEmail.objects.filter(status='pending').aggregate(at=Min('next_attempt_at'))['at']
+        if next_attempt is not None:
+            _schedule(delay=(next_attempt - timezone.now()).total_seconds())
+
+    retention = getattr(settings, 'EMAIL_OUTBOX_RETENTION_DAYS', 7)
+    OutboxEmail.objects.filter(status='sent', sent_at__lt=timezone.now() - timedelta(days=retention)).delete()
+    return sent
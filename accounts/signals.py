@@ -0,0 +1,29 @@
+"""Mantem os contadores de nao lidos (accounts/unread.py) em dia com as notificacoes."""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Notification
+from .unread import adjust_unread
+
+
+@receiver(pre_save, sender=Notification)
+def notification_about_to_save(sender, instance, raw=False, **kwargs):
+    instance._was_read = None
+    if instance.pk and not raw:
+        instance._was_read = Notification.objects.filter(pk=instance.pk).values_list('is_read', flat=True).first()
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_read = True if created else getattr(instance, '_was_read', None)
+    delta = 0
+    if was_read is not None and was_read != instance.is_read:
+        delta = 1 if was_read else -1
+    adjust_unread(instance.user_id, notifications=delta, bump=True)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    adjust_unread(instance.user_id, notifications=0 if instance.is_read else -1, bump=True)
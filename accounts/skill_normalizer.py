@@ -110,6 +110,30 @@ def normalize_skills_string(skills_string: str, user=None) -> str:
     return ', '.join(unique_skills)
 
 
+def resolve_skill_ids(skill_names: List[str]) -> List[int]:
+    """
+    IDs de CanonicalSkill para os nomes informados (ja em minusculas).
+
+    Termos ainda nao catalogados sao criados inativos: ficam disponiveis para
+    as relacoes estruturadas sem entrar na correcao automatica de habilidades.
+    """
+    from accounts.models import CanonicalSkill
+
+    names = list(dict.fromkeys(name[:100] for name in skill_names if name))
+    if not names:
+        return []
+
+    ids = dict(CanonicalSkill.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        CanonicalSkill.objects.bulk_create(
+            [CanonicalSkill(name=name, is_active=False) for name in missing],
+            ignore_conflicts=True,
+        )
+        ids.update(CanonicalSkill.objects.filter(name__in=missing).values_list('name', 'id'))
+    return [ids[name] for name in names if name in ids]
+
+
 def get_correction_stats() -> dict:
     from accounts.models import SkillCorrectionLog
     from django.db.models import Count, Avg
@@ -0,0 +1,9 @@
+from taskqueue.registry import task
+
+
+@task()
+def deliver_outbox():
+    """Envia um lote de emails da outbox (ver accounts/outbox.py)."""
+    from .outbox import deliver_outbox as deliver
+
+    deliver()
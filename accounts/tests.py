@@ -1,3 +1,222 @@
-from django.test import TestCase
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from messaging.models import Conversation, Message
+from taskqueue.queue import beat
+
+from .metrics import buffer
+from .models import Notification, OutboxEmail, SiteMetrics, User
+from .outbox import deliver_outbox
+from .unread import recent_notifications
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, METRICS_FLUSH_EVERY=1000, METRICS_FLUSH_INTERVAL=3600)
+class SiteMetricsBufferTests(TestCase):
+    def setUp(self):
+        buffer._take()
+        buffer._known_dates.clear()
+
+    def today(self):
+        return SiteMetrics.objects.get(date=timezone.now().date())
+
+    def test_increments_are_buffered_until_flush(self):
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(5):
+                SiteMetrics.increment('page_views')
+            SiteMetrics.increment('matches_created', 3)
+        self.assertEqual(len(queries), 0)
+        self.assertFalse(SiteMetrics.objects.exists())
+
+        SiteMetrics.flush()
+        metrics = self.today()
+        self.assertEqual((metrics.page_views, metrics.matches_created), (5, 3))
+
+        # Os deltas seguintes somam no banco, sem sobrescrever o valor gravado
+        SiteMetrics.objects.filter(pk=metrics.pk).update(page_views=100)
+        SiteMetrics.increment('page_views', 2)
+        with CaptureQueriesContext(connection) as queries:
+            SiteMetrics.flush()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self.today().page_views, 102)
+
+    @override_settings(METRICS_FLUSH_EVERY=3)
+    def test_flushes_every_n_events(self):
+        SiteMetrics.increment('chat_messages')
+        SiteMetrics.increment('chat_messages')
+        self.assertFalse(SiteMetrics.objects.exists())
+        SiteMetrics.increment('chat_messages')
+        self.assertEqual(self.today().chat_messages, 3)
+        self.assertEqual(buffer.pending(), {})
+
+    @override_settings(METRICS_FLUSH_TIMER=True, METRICS_FLUSH_INTERVAL=0.2)
+    def test_timer_flushes_an_idle_buffer(self):
+        flushed = threading.Event()
+        with mock.patch.object(buffer, 'flush', side_effect=lambda: flushed.set()):
+            SiteMetrics.increment('page_views')
+            SiteMetrics.increment('page_views')
+            self.assertFalse(flushed.is_set())
+            self.assertTrue(flushed.wait(5))
+        self.assertIsNone(buffer._timer)
+
+    def test_unknown_counter_is_rejected(self):
+        with self.assertRaises(ValueError):
+            SiteMetrics.increment('visitas')
+
+    @modify_settings(MIDDLEWARE={'append': 'accounts.middleware.MetricsMiddleware'})
+    def test_middleware_counts_page_views(self):
+        self.client.get('/health/')
+        self.client.get('/health/')
+        SiteMetrics.flush()
+        self.assertEqual(self.today().page_views, 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='x')
+        self.bob = User.objects.create_user(username='bob', password='x')
+
+    def counters(self, user):
+        user.refresh_from_db()
+        return user.unread_notifications_count, user.unread_messages_count
+
+    def test_notification_counter_follows_create_read_and_delete(self):
+        first = Notification.notify_user(self.alice, 'system', 'Um', 'm')
+        Notification.notify_user(self.alice, 'system', 'Dois', 'm')
+        Notification.notify_user(self.alice, 'system', 'Tres', 'm')
+        self.assertEqual(self.counters(self.alice), (3, 0))
+
+        first.is_read = True
+        first.save(update_fields=['is_read'])
+        self.assertEqual(self.counters(self.alice), (2, 0))
+        first.delete()
+        self.assertEqual(self.counters(self.alice), (2, 0))
+
+        self.assertEqual(Notification.mark_all_read(self.alice), 2)
+        self.assertEqual(self.counters(self.alice), (0, 0))
+
+    def test_message_counter_counts_only_recipients(self):
+        conversation = Conversation.objects.create()
+        conversation.participants.add(self.alice, self.bob)
+        Message.objects.create(conversation=conversation, sender=self.alice, text='oi')
+        Message.objects.create(conversation=conversation, sender=self.alice, text='tudo bem?')
+        self.assertEqual(self.counters(self.alice), (0, 0))
+        self.assertEqual(self.counters(self.bob), (0, 2))
+
+        self.assertEqual(conversation.mark_read(self.bob), 2)
+        self.assertEqual(self.bob.unread_messages_count, 0)
+
+        Message.objects.create(conversation=conversation, sender=self.bob, text='sim')
+        conversation.delete()
+        self.assertEqual(self.counters(self.alice), (0, 0))
+
+    def test_profile_save_does_not_overwrite_counters(self):
+        stale = User.objects.get(pk=self.alice.pk)
+        Notification.notify_user(self.alice, 'system', 'Um', 'm')
+        stale.first_name = 'Alice'
+        stale.save()
+        self.assertEqual(self.counters(self.alice), (1, 0))
+
+    def test_navbar_reads_counters_without_queries(self):
+        Notification.notify_user(self.alice, 'system', 'Ola', 'm')
+        self.client.force_login(self.alice)
+        self.client.get('/')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/')
+        self.assertEqual(response.context['unread_notifications_count'], 1)
+        self.assertFalse(any('accounts_notification' in q['sql'] for q in queries.captured_queries))
+        self.assertFalse(any('messaging_message' in q['sql'] for q in queries.captured_queries))
+
+    def test_recent_notifications_cache_follows_version(self):
+        Notification.notify_user(self.alice, 'system', 'Um', 'm')
+        self.alice.refresh_from_db()
+        self.assertEqual([n.title for n in recent_notifications(self.alice)], ['Um'])
+
+        Notification.notify_user(self.alice, 'system', 'Dois', 'm')
+        self.alice.refresh_from_db()
+        self.assertEqual([n.title for n in recent_notifications(self.alice)], ['Dois', 'Um'])
+
+    def test_recount_repairs_drift(self):
+        Notification.notify_user(self.alice, 'system', 'Um', 'm')
+        User.objects.update(unread_notifications_count=7, unread_messages_count=3)
+        call_command('recount_unread', stdout=StringIO())
+        self.assertEqual(self.counters(self.alice), (1, 0))
+        self.assertEqual(self.counters(self.bob), (0, 0))
+
+
+class CountingBackend(EmailBackend):
+    """locmem que conta conexoes abertas e recusa destinatarios @falha."""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if any(address.endswith('@falha.com') for message in messages for address in message.to):
+            raise ConnectionError('recipient refused')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='accounts.tests.CountingBackend', TASKS_RETRY_BACKOFF=60)
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+        self.ana = User.objects.create_user(username='ana', email='ana@example.com', password='x')
+        self.rui = User.objects.create_user(username='rui', email='rui@example.com', password='x')
+
+    def test_notifications_are_queued_not_sent(self):
+        beat('worker:1')
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.notify_user(self.ana, 'system', 'Ola', 'Mensagem')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.get().status, 'pending')
+
+    def test_sent_on_commit_without_a_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.notify_user(self.ana, 'system', 'Ola', 'Mensagem')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+
+    def test_batch_uses_one_connection_and_coalesces_per_user(self):
+        for title in ('Um', 'Dois', 'Tres'):
+            Notification.notify_user(self.ana, 'system', title, 'm')
+        Notification.notify_user(self.rui, 'system', 'Ola', 'm')
+
+        self.assertEqual(deliver_outbox(), 4)
+        self.assertEqual(CountingBackend.opened, 1)
+        subjects = sorted(message.subject for message in mail.outbox)
+        self.assertEqual(subjects, ['TalentMatch - 3 novas notificacoes', 'TalentMatch - Ola'])
+        digest = next(message for message in mail.outbox if message.to == ['ana@example.com'])
+        self.assertIn('TalentMatch - Tres', digest.body)
+        self.assertEqual(set(OutboxEmail.objects.values_list('status', flat=True)), {'sent'})
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_delivery_is_retried_then_marked_failed(self):
+        broken = User.objects.create_user(username='bad', email='bad@falha.com', password='x')
+        Notification.notify_user(broken, 'system', 'Ola', 'm')
+        Notification.notify_user(self.ana, 'system', 'Ola', 'm')
+
+        self.assertEqual(deliver_outbox(), 1)
+        failed = OutboxEmail.objects.get(to_email='bad@falha.com')
+        self.assertEqual((failed.status, failed.attempts), ('pending', 1))
+        self.assertIn('recipient refused', failed.last_error)
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+        self.assertEqual(deliver_outbox(), 0)
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        deliver_outbox()
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), ('failed', 2))
@@ -0,0 +1,73 @@
+"""
+Contadores de nao lidos da navbar, desnormalizados no User.
+
+unread_notifications_count e unread_messages_count sao ajustados com UPDATE
+atomico (F() + delta) quando uma notificacao ou mensagem e criada, lida ou
+apagada (ver accounts/signals.py e messaging/signals.py), entao o context
+processor le os valores direto de request.user, sem consultas.
+notifications_version muda a cada alteracao nas notificacoes do usuario e
+compoe a chave do cache das notificacoes recentes do dropdown.
+"""
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+RECENT_NOTIFICATIONS = 8
+RECENT_CACHE_TIMEOUT = 600
+
+
+def adjust_unread(users, notifications=0, messages=0, bump=False):
+    """Soma os deltas aos contadores de `users` (User, id ou queryset de User)."""
+    from .models import User
+
+    if not isinstance(users, QuerySet):
+        users = User.objects.filter(pk=getattr(users, 'pk', users))
+
+    changes = {}
+    if notifications:
+        changes['unread_notifications_count'] = Greatest(F('unread_notifications_count') + notifications, Value(0))
+    if messages:
+        changes['unread_messages_count'] = Greatest(F('unread_messages_count') + messages, Value(0))
+    if bump:
+        changes['notifications_version'] = F('notifications_version') + 1
+    if changes:
+        users.update(**changes)
+
+
+def recent_notifications(user):
+    """Ultimas notificacoes do usuario, em cache enquanto notifications_version nao mudar."""
+    key = f'accounts:recent-notifications:{user.pk}:{user.notifications_version}'
+    recent = cache.get(key)
+    if recent is None:
+        recent = list(user.notifications.all()[:RECENT_NOTIFICATIONS])
+        cache.set(key, recent, RECENT_CACHE_TIMEOUT)
+    return recent
+
+
+def recount_unread(users=None):
+    """Recalcula os contadores a partir das tabelas (reparo); retorna quantos usuarios foram gravados."""
+    from messaging.models import Message
+
+    from .models import Notification, User
+
+    users = User.objects.all() if users is None else users
+    unread_messages = (
+        Message.objects.filter(conversation__participants=OuterRef('pk'), is_read=False)
+        .exclude(sender=OuterRef('pk'))
+        .order_by()
+        .values('conversation__participants')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    unread_notifications = (
+        Notification.objects.filter(user=OuterRef('pk'), is_read=False)
+        .order_by()
+        .values('user')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return users.update(
+        unread_notifications_count=Coalesce(Subquery(unread_notifications), 0),
+        unread_messages_count=Coalesce(Subquery(unread_messages), 0),
+        notifications_version=F('notifications_version') + 1,
+    )
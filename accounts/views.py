@@ -307,7 +307,7 @@ def notifications_list(request):
     from .models import Notification
 
     if request.method == 'POST' and request.POST.get('action') == 'mark_all_read':
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        Notification.mark_all_read(request.user)
         messages.success(request, 'Todas as notificações foram marcadas como lidas.')
         return redirect('accounts:notifications')
 
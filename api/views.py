@@ -8,9 +8,9 @@ from accounts.models import User
 from jobs.models import Job, Application
 from courses.models import Course, UserCourse
 from match.models import MatchResult
-from match.utils import calculate_match_score, get_recommended_jobs_for_candidate
+from match.utils import get_cached_match_score, get_recommended_jobs_for_candidate
 from chatbot.models import ChatSession, ChatMessage
-from chatbot.ai_engine import get_ai_response
+from chatbot.tasks import answer_chat_message
 
 from .serializers import (
     UserSerializer, JobSerializer, ApplicationSerializer,
@@ -90,7 +90,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         job = serializer.validated_data['job']
-        score = calculate_match_score(self.request.user, job)
+        score = get_cached_match_score(self.request.user, job)
         serializer.save(candidate=self.request.user, match_score=score)
     
     def update(self, request, *args, **kwargs):
@@ -166,6 +166,12 @@ class ChatViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def send_message(self, request, pk=None):
+        """
+        Grava a mensagem e enfileira a resposta (chatbot.tasks.answer_chat_message):
+        o DRF nao tem views assincronas, e esperar o LLM aqui prenderia o thread
+        que atende as views sincronas sob ASGI. A resposta aparece nas mensagens
+        da sessao (GET /api/chat/<id>/).
+        """
         session = self.get_object()
         message = request.data.get('message', '')
         
@@ -173,13 +179,12 @@ class ChatViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Message is required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        ChatMessage.objects.create(session=session, role='user', content=message)
+        user_message = ChatMessage.objects.create(session=session, role='user', content=message)
         
-        ai_response = get_ai_response(request.user, message, session)
-        
-        ChatMessage.objects.create(session=session, role='assistant', content=ai_response)
+        answer_chat_message.enqueue(session.pk, user_message.pk)
         
         return Response({
-            'response': ai_response,
+            'message_id': user_message.pk,
+            'pending': True,
             'success': True
-        })
+        }, status=status.HTTP_202_ACCEPTED)
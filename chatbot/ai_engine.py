@@ -1,63 +1,28 @@
-import os
 import re
 import logging
+from asgiref.sync import sync_to_async
 from courses.models import Course
+from courses.utils import get_courses_for_skill_gaps
 from jobs.models import Job
 from match.utils import get_skill_gaps, get_recommended_jobs_for_candidate
+from .context import get_user_context
+from .providers import get_provider
 
 logger = logging.getLogger(__name__)
 
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
-    logger.warning("Biblioteca Groq nao disponivel. Usando sistema de regras local.")
-
-
-def get_groq_client():
-    """Retorna cliente Groq se a API key estiver configurada."""
-    api_key = os.environ.get('GROQ_API_KEY')
-    if not api_key:
-        logger.debug("GROQ_API_KEY nao configurada")
-        return None
-    if not GROQ_AVAILABLE:
-        logger.warning("Biblioteca Groq nao instalada")
-        return None
-    try:
-        client = Groq(api_key=api_key)
-        return client
-    except Exception as e:
-        logger.error(f"Erro ao criar cliente Groq: {e}")
-        return None
-
-
-def get_ai_response(user, message, session):
-    """
-    Gera resposta usando Groq AI quando disponivel,
-    caso contrario usa o sistema de regras local.
-    """
-    groq_client = get_groq_client()
-    
-    if groq_client:
-        response = get_groq_response(groq_client, user, message, session)
-        if response:
-            return response
-    
-    logger.info(f"Usando sistema de regras local para usuario {user.username}")
-    return get_local_response(user, message)
 
+def build_chat_messages(user, message, session):
+    """Mensagens (system + historico + pergunta) enviadas ao provedor de LLM."""
+    from .models import ChatMemory
 
-def get_groq_response(client, user, message, session):
-    """Gera resposta usando a API Groq."""
-    try:
-        context = build_user_context(user)
-        memory = get_memory_context(user)
+    chat_memory = ChatMemory.objects.filter(user=user).first()
+    context = get_user_context(user, chat_memory)
+    memory = get_memory_context(user, chat_memory)
 
-        history = session.messages.order_by('-created_at')[:20]
-        messages = []
+    history = session.messages.order_by('-created_at')[:20]
+    messages = []
 
-        system_prompt = f"""Voce e o assistente virtual do TalentMatch, uma plataforma de empregos com IA.
+    system_prompt = f"""Voce e o assistente virtual do TalentMatch, uma plataforma de empregos com IA.
 Seu objetivo e ajudar usuarios a encontrar vagas, melhorar seus curriculos e desenvolver suas carreiras.
 
 Contexto do usuario:
@@ -72,57 +37,132 @@ Diretrizes:
 - Para analise de curriculo, use as informacoes do perfil do usuario
 - Use a memoria de conversas anteriores para dar continuidade natural (nao repita apresentacoes se ja conversaram antes)"""
 
-        messages.append({"role": "system", "content": system_prompt})
-        
-        for msg in reversed(list(history)):
-            messages.append({
-                "role": msg.role,
-                "content": msg.content
-            })
-        
-        messages.append({"role": "user", "content": message})
-        
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=1024,
-        )
-        
+    messages.append({"role": "system", "content": system_prompt})
+    
+    for msg in reversed(list(history)):
+        messages.append({
+            "role": msg.role,
+            "content": msg.content
+        })
+    
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
+def get_ai_response(user, message, session):
+    """
+    Gera resposta usando o provedor de LLM configurado quando disponivel,
+    caso contrario usa o sistema de regras local.
+    """
+    provider = get_provider()
+    
+    if provider:
         try:
-            from accounts.models import SiteMetrics
-            SiteMetrics.increment('chat_messages')
-        except Exception:
-            pass
-        
-        logger.info(f"Resposta Groq gerada com sucesso para usuario {user.username}")
-        return completion.choices[0].message.content
-        
-    except Exception as e:
-        error_message = str(e).lower()
-        
-        if 'invalid_api_key' in error_message or 'authentication' in error_message:
-            logger.error(f"Chave API Groq invalida: {e}")
-            return "Desculpe, estou com problemas de configuracao. Por favor, tente novamente mais tarde ou entre em contato com o suporte."
-        
-        elif 'rate_limit' in error_message or 'too many requests' in error_message:
-            logger.warning(f"Limite de requisicoes Groq atingido: {e}")
-            return "Estou recebendo muitas mensagens no momento. Por favor, aguarde alguns segundos e tente novamente."
-        
-        elif 'connection' in error_message or 'network' in error_message or 'timeout' in error_message:
-            logger.error(f"Erro de conexao com Groq: {e}")
-            return get_local_response(user, message)
-        
-        else:
-            logger.error(f"Erro inesperado na API Groq: {e}", exc_info=True)
-            return get_local_response(user, message)
+            response = provider.complete(build_chat_messages(user, message, session))
+        except Exception as e:
+            return handle_provider_error(e, user, message)
+        if response:
+            _record_chat_message(user, provider)
+            return response
+    
+    logger.info(f"Usando sistema de regras local para usuario {user.username}")
+    return get_local_response(user, message)
+
+
+async def aget_ai_response(user, message, session):
+    """
+    Versao assincrona de get_ai_response: as consultas rodam em thread e a
+    chamada ao LLM e aguardada sem bloquear o worker.
+    """
+    provider = get_provider()
+
+    if provider:
+        try:
+            messages = await sync_to_async(build_chat_messages)(user, message, session)
+            response = await provider.acomplete(messages)
+        except Exception as e:
+            return await sync_to_async(handle_provider_error)(e, user, message)
+        if response:
+            await sync_to_async(_record_chat_message)(user, provider)
+            return response
 
+    logger.info(f"Usando sistema de regras local para usuario {user.username}")
+    return await sync_to_async(get_local_response)(user, message)
+
+
+async def astream_ai_response(user, message, session):
+    """
+    Versao em streaming de aget_ai_response: gera os trechos da resposta a
+    medida que o provedor os envia. A resposta local (sem provedor ou apos
+    uma falha antes do primeiro trecho) tambem e enviada em trechos.
+    """
+    provider = get_provider()
+
+    if provider:
+        sent = False
+        try:
+            messages = await sync_to_async(build_chat_messages)(user, message, session)
+            async for chunk in provider.astream(messages):
+                sent = True
+                yield chunk
+        except Exception as e:
+            if sent:
+                logger.error(f"Streaming do provedor de LLM interrompido: {e}")
+                return
+            for chunk in split_chunks(await sync_to_async(handle_provider_error)(e, user, message)):
+                yield chunk
+            return
+        if sent:
+            await sync_to_async(_record_chat_message)(user, provider)
+            return
+
+    logger.info(f"Usando sistema de regras local para usuario {user.username}")
+    for chunk in split_chunks(await sync_to_async(get_local_response)(user, message)):
+        yield chunk
 
-def get_memory_context(user):
+
+def split_chunks(text):
+    """Quebra uma resposta pronta em linhas, para ser enviada como stream."""
+    return text.splitlines(keepends=True) or [text]
+
+
+def _record_chat_message(user, provider):
+    try:
+        from accounts.models import SiteMetrics
+        SiteMetrics.increment('chat_messages')
+    except Exception:
+        pass
+    
+    logger.info(f"Resposta {provider.name} gerada com sucesso para usuario {user.username}")
+
+
+def handle_provider_error(e, user, message):
+    """Mensagem amigavel (ou resposta local) para falhas do provedor de LLM."""
+    error_message = str(e).lower()
+    
+    if 'invalid_api_key' in error_message or 'authentication' in error_message:
+        logger.error(f"Chave API do provedor de LLM invalida: {e}")
+        return "Desculpe, estou com problemas de configuracao. Por favor, tente novamente mais tarde ou entre em contato com o suporte."
+    
+    elif 'rate_limit' in error_message or 'too many requests' in error_message:
+        logger.warning(f"Limite de requisicoes do provedor de LLM atingido: {e}")
+        return "Estou recebendo muitas mensagens no momento. Por favor, aguarde alguns segundos e tente novamente."
+    
+    elif 'connection' in error_message or 'network' in error_message or 'timeout' in error_message:
+        logger.error(f"Erro de conexao com o provedor de LLM: {e}")
+        return get_local_response(user, message)
+    
+    else:
+        logger.error(f"Erro inesperado no provedor de LLM: {e}", exc_info=True)
+        return get_local_response(user, message)
+
+
+def get_memory_context(user, memory=None):
     """Retorna o bloco de memória persistente para o system prompt."""
     from .models import ChatMemory
 
-    memory = ChatMemory.objects.filter(user=user).first()
+    if memory is None:
+        memory = ChatMemory.objects.filter(user=user).first()
     if not memory or not (memory.content or memory.recent_topics):
         return ""
 
@@ -138,8 +178,8 @@ def update_chat_memory(user, session):
     """
     Atualiza a memória persistente do usuário.
 
-    - Sempre mantém os tópicos recentes (funciona mesmo sem Groq).
-    - A cada 4 mensagens do usuário, usa o Groq (quando disponível) para
+    - Sempre mantém os tópicos recentes (funciona mesmo sem LLM).
+    - A cada 4 mensagens do usuário, usa o provedor de LLM (quando disponível) para
       extrair/atualizar fatos duráveis sobre o usuário.
     """
     from .models import ChatMemory, ChatMessage
@@ -155,9 +195,9 @@ def update_chat_memory(user, session):
     memory.recent_topics = ' | '.join(topics)
 
     user_message_count = session.messages.filter(role='user').count()
-    client = get_groq_client()
+    provider = get_provider()
 
-    if client and user_message_count > 0 and user_message_count % 4 == 0:
+    if provider and user_message_count > 0 and user_message_count % 4 == 0:
         try:
             recent = list(session.messages.order_by('-created_at')[:8])
             transcript = "\n".join(
@@ -174,24 +214,23 @@ Trecho recente da conversa:
 
 Atualize a memoria: liste em ate 10 bullets curtos apenas fatos duraveis e uteis sobre o usuario (objetivos de carreira, preferencias de vaga/salario/localizacao, habilidades que quer desenvolver, situacao atual, restricoes). Mantenha fatos antigos que continuam validos, remova os obsoletos. Responda SOMENTE com os bullets, sem introducao."""
 
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": extraction_prompt}],
+            extracted = provider.complete(
+                [{"role": "user", "content": extraction_prompt}],
                 temperature=0.2,
                 max_tokens=400,
-            )
-            extracted = completion.choices[0].message.content.strip()
+            ).strip()
             if extracted:
                 memory.content = extracted[:4000]
             logger.info(f"Memoria do chat atualizada para {user.username}")
         except Exception as e:
-            logger.warning(f"Falha ao extrair memoria via Groq para {user.username}: {e}")
+            logger.warning(f"Falha ao extrair memoria via {provider.name} para {user.username}: {e}")
 
-    memory.save()
+    # So os campos da memoria: o contexto em cache e mantido por chatbot/context.py
+    memory.save(update_fields=['content', 'recent_topics', 'updated_at'])
 
 
 def build_user_context(user):
-    """Constroi contexto do usuario para a IA."""
+    """Constroi contexto do usuario para a IA (em cache via chatbot/context.py)."""
     context_parts = []
     
     context_parts.append(f"Nome: {user.get_full_name() or user.username}")
@@ -212,7 +251,8 @@ def build_user_context(user):
         if skill_gaps:
             context_parts.append(f"Habilidades em demanda que faltam: {', '.join(skill_gaps)}")
         
-        recommendations = get_recommended_jobs_for_candidate(user, limit=3)
+        # So resultados ja gravados pelo worker de match; nunca pontua vagas aqui
+        recommendations = get_recommended_jobs_for_candidate(user, limit=3, compute_missing=False)
         if recommendations:
             jobs_text = []
             for rec in recommendations:
@@ -233,7 +273,7 @@ def build_user_context(user):
 
 
 def get_local_response(user, message):
-    """Sistema de regras local quando Groq nao esta disponivel."""
+    """Sistema de regras local quando nenhum provedor de LLM esta disponivel."""
     message_lower = message.lower()
     
     if any(word in message_lower for word in ['curriculo', 'cv', 'resume', 'perfil']):
@@ -395,25 +435,13 @@ def recommend_courses(user, message):
             response += f"- **{course.title}** - {course.get_level_display()} ({course.duration_hours}h)\n"
         return response
     
-    skill_gaps = get_skill_gaps(user)
-    recommended = []
-    
-    for course in Course.objects.filter(is_active=True):
-        course_skills = course.get_skills_list()
-        matching = [s for s in skill_gaps if s in course_skills]
-        if matching:
-            recommended.append({
-                'course': course,
-                'skills': matching
-            })
-    
-    recommended.sort(key=lambda x: len(x['skills']), reverse=True)
+    recommended = get_courses_for_skill_gaps(get_skill_gaps(user))
     
     if recommended:
         response = "**Cursos recomendados para voce:**\n\n"
         for item in recommended[:5]:
             course = item['course']
-            skills = ', '.join(item['skills'][:3])
+            skills = ', '.join(item['matching_skills'][:3])
             response += f"- **{course.title}**\n"
             response += f"  Nivel: {course.get_level_display()} | {course.duration_hours}h\n"
             response += f"  Desenvolve: {skills}\n\n"
@@ -0,0 +1,83 @@
+"""
+Contexto do usuario no system prompt do chatbot, em cache por usuario.
+
+build_user_context consulta perfil, lacunas de habilidades e vagas
+recomendadas; em vez de refazer isso a cada mensagem, o bloco fica gravado na
+ChatMemory do usuario (linha que o chat ja le a cada mensagem). Ele e refeito
+quando:
+
+- o perfil, a empresa ou uma candidatura do usuario muda (context_stale,
+  marcado pelos signals em chatbot/signals.py);
+- as vagas mudam (versao do espaco de habilidades, a mesma usada pelo match);
+- passa de CHATBOT_CONTEXT_TTL segundos.
+
+Um contexto montado enquanto a linha do candidato ainda espera o worker de
+match ja nasce marcado como desatualizado.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+_jobs_version = None
+_checked_at = 0.0
+
+
+def jobs_version():
+    """Versao das vagas ativas, consultada no maximo a cada MATCH_INDEX_VERSION_TTL segundos."""
+    global _jobs_version, _checked_at
+    from match.models import MatchIndexVersion
+    from match.skill_space import SKILL_SPACE_INDEX
+
+    ttl = getattr(settings, 'MATCH_INDEX_VERSION_TTL', 5)
+    now = time.monotonic()
+    if _jobs_version is None or now - _checked_at >= ttl:
+        _jobs_version = MatchIndexVersion.current(SKILL_SPACE_INDEX)
+        _checked_at = now
+    return _jobs_version
+
+
+def is_fresh(memory, version):
+    if memory is None or memory.context_stale or memory.context_built_at is None:
+        return False
+    ttl = getattr(settings, 'CHATBOT_CONTEXT_TTL', 600)
+    return (
+        memory.context_jobs_version == version
+        and memory.context_built_at > timezone.now() - timedelta(seconds=ttl)
+    )
+
+
+def get_user_context(user, memory=None):
+    """Bloco de contexto do usuario; `memory` evita reler a ChatMemory ja carregada."""
+    from match.models import DirtyMatch
+
+    from .ai_engine import build_user_context
+    from .models import ChatMemory
+
+    if memory is None:
+        memory = ChatMemory.objects.filter(user=user).first()
+    version = jobs_version()
+    if is_fresh(memory, version):
+        return memory.context
+
+    context = build_user_context(user)
+    fields = {
+        'context': context,
+        'context_jobs_version': version,
+        'context_built_at': timezone.now(),
+        'context_stale': DirtyMatch.objects.filter(kind='candidate', object_id=user.pk).exists(),
+    }
+    if memory is None:
+        memory = ChatMemory.objects.create(user=user, **fields)
+    else:
+        ChatMemory.objects.filter(pk=memory.pk).update(**fields)
+        for name, value in fields.items():
+            setattr(memory, name, value)
+    return context
+
+
+def mark_context_stale(user_id):
+    from .models import ChatMemory
+
+    ChatMemory.objects.filter(user_id=user_id, context_stale=False).update(context_stale=True)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_chatmemory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmemory',
+            name='context',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='chatmemory',
+            name='context_built_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatmemory',
+            name='context_jobs_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='chatmemory',
+            name='context_stale',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+    ]
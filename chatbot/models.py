@@ -21,6 +21,11 @@ class ChatMemory(models.Model):
     content = models.TextField(blank=True, default='', help_text='Fatos duráveis sobre o usuário extraídos das conversas')
     recent_topics = models.TextField(blank=True, default='', help_text='Tópicos das conversas mais recentes')
     updated_at = models.DateTimeField(auto_now=True)
+    # Bloco de contexto do system prompt em cache (ver chatbot/context.py)
+    context = models.TextField(blank=True, default='', editable=False)
+    context_jobs_version = models.PositiveIntegerField(default=0, editable=False)
+    context_built_at = models.DateTimeField(null=True, blank=True, editable=False)
+    context_stale = models.BooleanField(default=True, editable=False)
 
     class Meta:
         verbose_name = 'Memória do Chat'
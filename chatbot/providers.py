@@ -0,0 +1,164 @@
+"""
+Provedores de LLM do chatbot.
+
+settings.CHATBOT_PROVIDER escolhe o provedor: 'groq' (padrao, exige
+GROQ_API_KEY), 'fake' (resposta fixa apos CHATBOT_FAKE_LATENCY segundos, para
+testes e desenvolvimento offline), 'local' (so o sistema de regras) ou o
+caminho pontuado de uma classe propria. Todo provedor expoe complete() para o
+caminho sincrono, acomplete() para a view assincrona, que aguarda o LLM sem
+prender um worker, e astream() para repassar a resposta ao navegador em
+trechos (SSE) conforme o LLM os gera.
+"""
+import asyncio
+import logging
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = {
+    'groq': 'chatbot.providers.GroqProvider',
+    'fake': 'chatbot.providers.FakeProvider',
+    'local': None,
+}
+
+
+class ChatProvider:
+    """Interface comum: recebe mensagens no formato da API de chat e retorna o texto."""
+    name = 'base'
+
+    @classmethod
+    def from_settings(cls):
+        """Instancia configurada, ou None se o provedor nao puder ser usado."""
+        return cls()
+
+    def complete(self, messages, temperature=0.7, max_tokens=1024):
+        raise NotImplementedError
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=1024):
+        return await sync_to_async(self.complete, thread_sensitive=False)(messages, temperature, max_tokens)
+
+    async def astream(self, messages, temperature=0.7, max_tokens=1024):
+        """Trechos da resposta a medida que chegam; sem streaming nativo, a resposta inteira de uma vez."""
+        yield await self.acomplete(messages, temperature, max_tokens)
+
+
+class GroqProvider(ChatProvider):
+    name = 'groq'
+    model = 'llama-3.3-70b-versatile'
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self._client = None
+        self._async_clients = {}
+
+    @classmethod
+    def from_settings(cls):
+        api_key = os.environ.get('GROQ_API_KEY')
+        if not api_key:
+            logger.debug("GROQ_API_KEY nao configurada")
+            return None
+        try:
+            import groq  # noqa: F401
+        except ImportError:
+            logger.warning("Biblioteca Groq nao instalada")
+            return None
+        return cls(api_key)
+
+    def complete(self, messages, temperature=0.7, max_tokens=1024):
+        from groq import Groq
+
+        if self._client is None:
+            self._client = Groq(api_key=self.api_key)
+        completion = self._client.chat.completions.create(
+            model=self.model, messages=messages, temperature=temperature, max_tokens=max_tokens,
+        )
+        return completion.choices[0].message.content
+
+    def _async_client(self):
+        from groq import AsyncGroq
+
+        # O pool HTTP do cliente assincrono pertence ao event loop que o criou
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            self._async_clients = {loop: AsyncGroq(api_key=self.api_key)}
+            client = self._async_clients[loop]
+        return client
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=1024):
+        completion = await self._async_client().chat.completions.create(
+            model=self.model, messages=messages, temperature=temperature, max_tokens=max_tokens,
+        )
+        return completion.choices[0].message.content
+
+    async def astream(self, messages, temperature=0.7, max_tokens=1024):
+        stream = await self._async_client().chat.completions.create(
+            model=self.model, messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class FakeProvider(ChatProvider):
+    """Provedor offline: ecoa a ultima mensagem apos uma latencia configuravel."""
+    name = 'fake'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    @classmethod
+    def from_settings(cls):
+        return cls(latency=getattr(settings, 'CHATBOT_FAKE_LATENCY', 0.0))
+
+    def reply(self, messages):
+        last = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), '')
+        return f'[fake] Resposta para: {last[:200]}'
+
+    def complete(self, messages, temperature=0.7, max_tokens=1024):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.reply(messages)
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=1024):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.reply(messages)
+
+    async def astream(self, messages, temperature=0.7, max_tokens=1024):
+        # A latencia total e dividida entre as palavras, como um LLM gerando tokens
+        words = self.reply(messages).split(' ')
+        for index, word in enumerate(words):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(words))
+            yield word if index == 0 else f' {word}'
+
+
+_provider = None
+_provider_key = None
+
+
+def get_provider():
+    """Provedor configurado (reaproveitado entre requisicoes), ou None para usar so as regras locais."""
+    global _provider, _provider_key
+
+    key = (getattr(settings, 'CHATBOT_PROVIDER', 'groq'), bool(os.environ.get('GROQ_API_KEY')))
+    if key != _provider_key:
+        path = PROVIDERS.get(key[0], key[0])
+        _provider = import_string(path).from_settings() if path else None
+        _provider_key = key
+    return _provider
+
+
+@receiver(setting_changed)
+def _reset_provider(setting, **kwargs):
+    global _provider_key
+    if setting.startswith('CHATBOT_'):
+        _provider_key = None
@@ -0,0 +1,22 @@
+"""Marca o contexto em cache do chatbot como desatualizado quando os dados do usuario mudam."""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import CandidateProfile, CompanyProfile
+from jobs.models import Application
+
+from .context import mark_context_stale
+
+
+@receiver(post_save, sender=CandidateProfile)
+@receiver(post_save, sender=CompanyProfile)
+def profile_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_context_stale(instance.user_id)
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def application_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_context_stale(instance.candidate_id)
@@ -0,0 +1,27 @@
+from taskqueue.registry import task
+
+
+@task()
+def refresh_chat_memory(user_id, session_id):
+    """Atualiza a memoria persistente do usuario apos uma mensagem."""
+    from .ai_engine import update_chat_memory
+    from .models import ChatSession
+
+    session = ChatSession.objects.select_related('user').filter(pk=session_id, user_id=user_id).first()
+    if session:
+        update_chat_memory(session.user, session)
+
+
+@task()
+def answer_chat_message(session_id, message_id):
+    """Gera e grava a resposta do assistente para uma mensagem enviada pela API."""
+    from .ai_engine import get_ai_response
+    from .models import ChatMessage
+
+    message = ChatMessage.objects.select_related('session__user').filter(
+        pk=message_id, session_id=session_id, role='user'
+    ).first()
+    if message:
+        session = message.session
+        ai_response = get_ai_response(session.user, message.content, session)
+        ChatMessage.objects.create(session=session, role='assistant', content=ai_response)
@@ -1,3 +1,243 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Application
+from match.models import DirtyMatch
+from match.tests import MatchFixturesMixin
+from match.utils import process_dirty_matches
+from taskqueue.queue import run_pending
+
+from .ai_engine import aget_ai_response, astream_ai_response, build_chat_messages, get_ai_response
+from .context import get_user_context
+from .models import ChatMemory, ChatMessage, ChatSession
+from .providers import FakeProvider, get_provider
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CHATBOT_PROVIDER='fake', CHATBOT_FAKE_LATENCY=0.2)
+class AsyncChatTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='chat', password='x')
+
+    def test_fake_provider_is_selected_from_settings(self):
+        provider = get_provider()
+        self.assertIsInstance(provider, FakeProvider)
+        self.assertEqual(provider.latency, 0.2)
+        with override_settings(CHATBOT_PROVIDER='local'):
+            self.assertIsNone(get_provider())
+
+    async def test_concurrent_calls_overlap_instead_of_queueing(self):
+        provider = get_provider()
+        messages = [{'role': 'user', 'content': 'oi'}]
+        started = time.monotonic()
+        replies = await asyncio.gather(*(provider.acomplete(messages) for _ in range(5)))
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual(replies, ['[fake] Resposta para: oi'] * 5)
+
+    async def test_async_view_awaits_provider_and_saves_messages(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('chatbot:send'), json.dumps({'message': 'quero uma vaga'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['response'], '[fake] Resposta para: quero uma vaga')
+
+        session = await ChatSession.objects.aget(user=self.user, is_active=True)
+        roles = [role async for role in session.messages.values_list('role', flat=True)]
+        self.assertEqual(roles, ['user', 'assistant'])
+
+    async def test_bad_json_is_rejected_and_errors_are_logged(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(reverse('chatbot:send'), '{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        with mock.patch('chatbot.views.aget_ai_response', side_effect=RuntimeError('boom')), \
+                self.assertLogs('chatbot.views', 'ERROR') as logs:
+            response = await self.async_client.post(
+                reverse('chatbot:send'), json.dumps({'message': 'oi'}), content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('boom', logs.output[0])
+
+    def test_sync_and_async_paths_share_the_provider(self):
+        session = ChatSession.objects.create(user=self.user)
+        ChatMessage.objects.create(session=session, role='user', content='ola')
+        self.assertEqual(get_ai_response(self.user, 'ola', session), '[fake] Resposta para: ola')
+        self.assertEqual(
+            async_to_sync(aget_ai_response)(self.user, 'ola', session), '[fake] Resposta para: ola',
+        )
+
+    @override_settings(CHATBOT_PROVIDER='local')
+    def test_local_rules_without_provider(self):
+        session = ChatSession.objects.create(user=self.user)
+        self.assertIn('Ola, chat', get_ai_response(self.user, 'oi', session))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CHATBOT_PROVIDER='fake', CHATBOT_FAKE_LATENCY=0.5)
+class StreamingChatTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='stream', password='x')
+
+    async def read_events(self, response):
+        body = ''
+        async for part in response.streaming_content:
+            body += part.decode() if isinstance(part, bytes) else part
+        events = []
+        for raw in body.strip().split('\n\n'):
+            lines = dict(line.split(': ', 1) for line in raw.splitlines())
+            events.append((lines.get('event', 'message'), json.loads(lines['data'])))
+        return events
+
+    async def test_first_chunk_arrives_before_the_full_answer(self):
+        session = await ChatSession.objects.acreate(user=self.user)
+        started = time.monotonic()
+        chunks = []
+        first_at = None
+        async for chunk in astream_ai_response(self.user, 'quero uma vaga remota', session):
+            first_at = first_at or time.monotonic() - started
+            chunks.append(chunk)
+        total = time.monotonic() - started
+
+        self.assertGreater(len(chunks), 1)
+        self.assertLess(first_at, total / 2)
+        self.assertEqual(''.join(chunks), '[fake] Resposta para: quero uma vaga remota')
+
+    async def test_stream_endpoint_sends_deltas_and_persists_message(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('chatbot:stream'), json.dumps({'message': 'oi'}), content_type='application/json',
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = await self.read_events(response)
+
+        deltas = ''.join(data['delta'] for event, data in events if event == 'message')
+        self.assertEqual(deltas, '[fake] Resposta para: oi')
+        self.assertEqual(events[-1], ('done', {'response': deltas}))
+
+        session = await ChatSession.objects.aget(user=self.user, is_active=True)
+        saved = [(m.role, m.content) async for m in session.messages.all()]
+        self.assertEqual(saved, [('user', 'oi'), ('assistant', deltas)])
+
+    @override_settings(CHATBOT_PROVIDER='local')
+    async def test_local_fallback_is_streamed_by_line(self):
+        session = await ChatSession.objects.acreate(user=self.user)
+        chunks = [chunk async for chunk in astream_ai_response(self.user, 'oi', session)]
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(chunks[0].startswith('Ola, stream'))
+
+    async def test_empty_message_is_rejected(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('chatbot:stream'), json.dumps({'message': ' '}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_start_errors_are_logged(self):
+        await self.async_client.aforce_login(self.user)
+        with mock.patch('chatbot.views.ChatMessage.objects.acreate', side_effect=RuntimeError('boom')), \
+                self.assertLogs('chatbot.views', 'ERROR') as logs:
+            response = await self.async_client.post(
+                reverse('chatbot:stream'), json.dumps({'message': 'oi'}), content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('boom', logs.output[0])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CHATBOT_PROVIDER='fake', CHATBOT_FAKE_LATENCY=0)
+class ApiChatTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='api', password='x')
+        self.client.force_login(self.user)
+        self.session = ChatSession.objects.create(user=self.user)
+
+    def test_send_message_queues_the_answer(self):
+        url = reverse('api:chatsession-send-message', args=[self.session.pk])
+        with mock.patch('chatbot.ai_engine.get_provider') as get_provider:
+            response = self.client.post(url, {'message': 'oi'}, content_type='application/json')
+            self.assertEqual(response.status_code, 202)
+            get_provider.assert_not_called()
+            self.assertEqual(list(self.session.messages.values_list('role', flat=True)), ['user'])
+
+        run_pending('w')
+        self.assertEqual(list(self.session.messages.values_list('role', flat=True)), ['user', 'assistant'])
+
+        detail = self.client.get(reverse('api:chatsession-detail', args=[self.session.pk])).json()
+        self.assertEqual([m['role'] for m in detail['messages']], ['user', 'assistant'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CHATBOT_PROVIDER='fake', MATCH_INDEX_VERSION_TTL=0)
+class UserContextCacheTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        self.company = self.create_company()
+        self.job = self.create_job(self.company, title='Dev Django')
+        self.candidate = self.create_candidate()
+        process_dirty_matches()
+
+    def context(self):
+        return get_user_context(User.objects.select_related('candidate_profile').get(pk=self.candidate.pk))
+
+    def test_cached_context_skips_scoring_and_demand_queries(self):
+        self.assertIn('Dev Django', self.context())
+        session = ChatSession.objects.create(user=self.candidate)
+
+        with CaptureQueriesContext(connection) as queries:
+            messages = build_chat_messages(self.candidate, 'oi', session)
+        self.assertIn('Dev Django', messages[0]['content'])
+        tables = ' '.join(q['sql'] for q in queries.captured_queries)
+        self.assertNotIn('match_matchresult', tables)
+        self.assertNotIn('match_skilldemand', tables)
+        self.assertNotIn('jobs_job', tables)
+
+    def test_chat_never_scores_jobs_inline(self):
+        other = self.create_candidate(username='novo', skills='python')
+        context = get_user_context(other)
+        self.assertNotIn('Vagas recomendadas', context)
+        self.assertTrue(ChatMemory.objects.get(user=other).context_stale)
+
+    def test_profile_and_application_changes_rebuild(self):
+        self.context()
+        profile = self.candidate.candidate_profile
+        profile.experience_years = 7
+        profile.save()
+        self.assertTrue(ChatMemory.objects.get(user=self.candidate).context_stale)
+        process_dirty_matches()
+        self.assertIn('Experiencia: 7 anos', self.context())
+
+        Application.objects.create(job=self.job, candidate=self.candidate)
+        self.assertTrue(ChatMemory.objects.get(user=self.candidate).context_stale)
+
+    def test_job_changes_rebuild(self):
+        self.context()
+        self.create_job(self.company, title='Dev Python Senior')
+        process_dirty_matches()
+        self.assertIn('Dev Python Senior', self.context())
+
+    @override_settings(CHATBOT_CONTEXT_TTL=60)
+    def test_expired_context_is_rebuilt(self):
+        self.context()
+        ChatMemory.objects.update(context='antigo')
+        self.assertEqual(self.context(), 'antigo')
+
+        ChatMemory.objects.update(context_built_at=timezone.now() - timedelta(seconds=120))
+        self.assertNotEqual(self.context(), 'antigo')
+
+    def test_pending_match_refresh_keeps_context_stale(self):
+        DirtyMatch.mark('candidate', self.candidate.pk)
+        self.context()
+        self.assertTrue(ChatMemory.objects.get(user=self.candidate).context_stale)
+        process_dirty_matches()
+        self.context()
+        self.assertFalse(ChatMemory.objects.get(user=self.candidate).context_stale)
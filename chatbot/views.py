@@ -1,10 +1,15 @@
 import json
+import logging
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 from .models import ChatSession, ChatMessage
-from .ai_engine import get_ai_response, update_chat_memory
+from .ai_engine import aget_ai_response, astream_ai_response
+from .tasks import refresh_chat_memory
+
+logger = logging.getLogger(__name__)
 
 
 def _get_sessions_sidebar(user):
@@ -40,52 +45,111 @@ def chat_page(request):
     })
 
 
-@login_required
-@require_POST
-def send_message(request):
-    """Endpoint para enviar mensagem com suporte a CSRF."""
+async def _start_exchange(request):
+    """Valida o corpo e grava a mensagem do usuario; retorna (user, session, message) ou uma resposta de erro."""
     try:
         data = json.loads(request.body)
-        user_message = data.get('message', '').strip()
-        
-        if not user_message:
-            return JsonResponse({'error': 'Mensagem vazia'}, status=400)
-        
-        session, created = ChatSession.objects.get_or_create(
-            user=request.user,
-            is_active=True
-        )
-        
-        ChatMessage.objects.create(
-            session=session,
-            role='user',
-            content=user_message
-        )
-        
-        ai_response = get_ai_response(request.user, user_message, session)
-        
-        ChatMessage.objects.create(
-            session=session,
-            role='assistant',
-            content=ai_response
-        )
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Dados invalidos'}, status=400)
 
-        session.save()
+    user_message = str(data.get('message', '')).strip()
+    if not user_message:
+        return JsonResponse({'error': 'Mensagem vazia'}, status=400)
 
-        try:
-            update_chat_memory(request.user, session)
-        except Exception:
-            pass
+    user = await request.auser()
+    session, created = await ChatSession.objects.aget_or_create(
+        user=user,
+        is_active=True
+    )
+    
+    await ChatMessage.objects.acreate(
+        session=session,
+        role='user',
+        content=user_message
+    )
+    return user, session, user_message
+
+
+async def _finish_exchange(user, session, ai_response):
+    await ChatMessage.objects.acreate(
+        session=session,
+        role='assistant',
+        content=ai_response
+    )
+
+    await session.asave()
+
+    await sync_to_async(refresh_chat_memory.enqueue)(user.pk, session.pk)
+
+
+@login_required
+@require_POST
+async def send_message(request):
+    """
+    Endpoint para enviar mensagem com suporte a CSRF.
+
+    View assincrona: sob ASGI, a espera pelo LLM nao prende um worker.
+    """
+    try:
+        started = await _start_exchange(request)
+        if isinstance(started, JsonResponse):
+            return started
+        user, session, user_message = started
+        
+        ai_response = await aget_ai_response(user, user_message, session)
+        await _finish_exchange(user, session, ai_response)
         
         return JsonResponse({
             'response': ai_response,
             'success': True
         })
     
-    except json.JSONDecodeError:
-        return JsonResponse({'error': 'Dados invalidos'}, status=400)
-    except Exception as e:
+    except Exception:
+        logger.exception("Erro ao responder mensagem do chat")
+        return JsonResponse({'error': 'Erro interno. Tente novamente.'}, status=500)
+
+
+def _sse(data, event=None):
+    prefix = f'event: {event}\n' if event else ''
+    return f'{prefix}data: {json.dumps(data)}\n\n'
+
+
+@login_required
+@require_POST
+async def stream_message(request):
+    """
+    Mesma troca de send_message, mas a resposta e repassada como server-sent
+    events: um evento por trecho ({"delta": ...}) e um evento "done" com o
+    texto completo, gravado como ChatMessage ao fim do stream.
+    """
+    try:
+        started = await _start_exchange(request)
+    except Exception:
+        logger.exception("Erro ao iniciar o streaming do chat")
         return JsonResponse({'error': 'Erro interno. Tente novamente.'}, status=500)
+    if isinstance(started, JsonResponse):
+        return started
+    user, session, user_message = started
+
+    async def events():
+        parts = []
+        try:
+            async for chunk in astream_ai_response(user, user_message, session):
+                parts.append(chunk)
+                yield _sse({'delta': chunk})
+        except Exception:
+            logger.exception(f"Erro no streaming do chat para usuario {user.username}")
+            yield _sse({'error': 'Erro interno. Tente novamente.'}, event='error')
+        finally:
+            # Grava o que foi gerado mesmo se o navegador fechar a conexao no meio
+            if parts:
+                await _finish_exchange(user, session, ''.join(parts))
+        yield _sse({'response': ''.join(parts)}, event='done')
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @login_required
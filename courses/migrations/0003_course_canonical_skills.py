@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+def backfill_course_skills(apps, schema_editor):
+    CanonicalSkill = apps.get_model('accounts', 'CanonicalSkill')
+    Course = apps.get_model('courses', 'Course')
+
+    skill_ids = dict(CanonicalSkill.objects.values_list('name', 'id'))
+    for obj in Course.objects.exclude(skills_taught=''):
+        names = list(dict.fromkeys(s.strip().lower()[:100] for s in obj.skills_taught.split(',') if s.strip()))
+        for name in names:
+            if name not in skill_ids:
+                skill_ids[name] = CanonicalSkill.objects.create(name=name, is_active=False).id
+        obj.canonical_skills.set([skill_ids[name] for name in names])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_candidateprofile_canonical_skills'),
+        ('courses', '0002_lesson'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='canonical_skills',
+            field=models.ManyToManyField(blank=True, editable=False, help_text='Habilidades estruturadas, sincronizadas a partir de skills_taught', related_name='courses', to='accounts.canonicalskill'),
+        ),
+        migrations.RunPython(backfill_course_skills, migrations.RunPython.noop),
+    ]
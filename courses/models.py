@@ -33,6 +33,13 @@ class Course(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    canonical_skills = models.ManyToManyField(
+        'accounts.CanonicalSkill',
+        blank=True,
+        related_name='courses',
+        editable=False,
+        help_text='Habilidades estruturadas, sincronizadas a partir de skills_taught'
+    )
     
     class Meta:
         ordering = ['-created_at']
@@ -40,6 +47,16 @@ class Course(models.Model):
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'skills_taught' in update_fields:
+            self.sync_canonical_skills()
+    
+    def sync_canonical_skills(self):
+        from accounts.skill_normalizer import resolve_skill_ids
+        self.canonical_skills.set(resolve_skill_ids(self.get_skills_list()))
+    
     def get_skills_list(self):
         if self.skills_taught:
             return [s.strip().lower() for s in self.skills_taught.split(',') if s.strip()]
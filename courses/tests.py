@@ -1,3 +1,32 @@
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Course
+from .utils import get_courses_for_skill_gaps
+
+
+class CourseSkillGapTests(TestCase):
+    def create_course(self, title, skills_taught, **fields):
+        return Course.objects.create(
+            title=title, description='Curso', duration_hours=10,
+            skills_taught=skills_taught, **fields
+        )
+
+    def test_courses_ranked_by_covered_gaps(self):
+        sql = self.create_course('SQL', 'sql, modelagem de dados')
+        full = self.create_course('Dados', 'Python, SQL, Pandas')
+        self.create_course('Excel', 'excel')
+        self.create_course('Inativo', 'python, sql', is_active=False)
+
+        recommendations = get_courses_for_skill_gaps(['python', 'sql'])
+
+        self.assertEqual([r['course'] for r in recommendations], [full, sql])
+        self.assertEqual(recommendations[0]['matching_skills'], ['python', 'sql'])
+        self.assertEqual(recommendations[1]['score'], 1)
+
+    def test_skill_changes_resync_relation(self):
+        course = self.create_course('Web', 'django')
+        course.skills_taught = 'flask'
+        course.save(update_fields=['skills_taught'])
+
+        self.assertEqual(get_courses_for_skill_gaps(['django']), [])
+        self.assertEqual(len(get_courses_for_skill_gaps(['flask'])), 1)
@@ -0,0 +1,33 @@
+from .models import Course
+
+
+def get_courses_for_skill_gaps(skill_gaps):
+    """
+    Cursos ativos que ensinam alguma das habilidades em falta, ordenados pela
+    quantidade de lacunas cobertas.
+
+    Usa a relacao Course.canonical_skills: uma unica consulta pelos pares
+    (curso, habilidade) em vez de percorrer o texto de todos os cursos.
+    """
+    if not skill_gaps:
+        return []
+
+    CourseSkill = Course.canonical_skills.through
+    rank = {skill: position for position, skill in enumerate(skill_gaps)}
+    matching = {}
+    for course_id, skill in CourseSkill.objects.filter(
+        canonicalskill__name__in=skill_gaps, course__is_active=True
+    ).values_list('course_id', 'canonicalskill__name'):
+        matching.setdefault(course_id, []).append(skill)
+
+    courses = Course.objects.in_bulk(matching.keys())
+    recommendations = [
+        {
+            'course': courses[course_id],
+            'matching_skills': sorted(skills, key=rank.get),
+            'score': len(skills),
+        }
+        for course_id, skills in matching.items()
+    ]
+    recommendations.sort(key=lambda item: (-item['score'], -item['course'].created_at.timestamp()))
+    return recommendations
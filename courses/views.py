@@ -5,6 +5,7 @@ from django.utils import timezone
 from django.core.paginator import Paginator
 from .models import Course, Lesson, UserCourse
 from match.utils import get_skill_gaps
+from .utils import get_courses_for_skill_gaps
 
 
 def course_list(request):
@@ -179,22 +180,7 @@ def recommended_courses(request):
         return redirect('courses:list')
     
     skill_gaps = get_skill_gaps(request.user)
-    
-    recommended = []
-    all_courses = Course.objects.filter(is_active=True)
-    
-    for course in all_courses:
-        course_skills = course.get_skills_list()
-        matching_gaps = [gap for gap in skill_gaps if gap in course_skills]
-        
-        if matching_gaps:
-            recommended.append({
-                'course': course,
-                'matching_skills': matching_gaps,
-                'score': len(matching_gaps)
-            })
-    
-    recommended.sort(key=lambda x: x['score'], reverse=True)
+    recommended = get_courses_for_skill_gaps(skill_gaps)
     
     return render(request, 'courses/recommended_courses.html', {
         'recommendations': recommended[:20],
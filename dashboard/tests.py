@@ -1,3 +1,43 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import SiteSettings
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, SITE_SETTINGS_CACHE_TTL=3600)
+class MaintenanceModeCacheTests(TestCase):
+    def setUp(self):
+        SiteSettings.invalidate_cache()
+        self.addCleanup(SiteSettings.invalidate_cache)
+
+    def test_settings_are_read_once_per_ttl(self):
+        self.client.get('/')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/')
+        self.assertFalse(any('accounts_sitesettings' in q['sql'] for q in queries.captured_queries))
+
+    def test_toggle_maintenance_invalidates_cache(self):
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+        admin = User.objects.create_user(username='admin', password='x', user_type='admin')
+        self.client.force_login(admin)
+        self.client.post(reverse('dashboard:toggle_maintenance'), {'message': 'Volto logo'})
+        self.client.logout()
+
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 503)
+        self.assertContains(response, 'Volto logo', status_code=503)
+
+    def test_other_workers_see_changes_after_ttl(self):
+        self.client.get('/')
+        # Gravacao feita por outro processo: nao passa pelo save() deste
+        SiteSettings.objects.filter(pk=1).update(maintenance_mode=True)
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+        with override_settings(SITE_SETTINGS_CACHE_TTL=0):
+            self.assertEqual(self.client.get('/').status_code, 503)
@@ -8,6 +8,7 @@ from django.utils import timezone
 from datetime import timedelta
 from jobs.models import Job, Application
 from courses.models import Course, UserCourse
+from courses.utils import get_courses_for_skill_gaps
 from accounts.models import (
     User, CandidateProfile, CompanyProfile, 
     ProblemReport, SiteSettings, SiteMetrics,
@@ -50,16 +51,7 @@ def candidate_dashboard(request):
     recommended_jobs = get_recommended_jobs_for_candidate(user, limit=5)
     skill_gaps = get_skill_gaps(user)
     
-    recommended_courses = []
-    for course in Course.objects.filter(is_active=True)[:10]:
-        course_skills = course.get_skills_list()
-        matching = [s for s in skill_gaps if s in course_skills]
-        if matching:
-            recommended_courses.append({
-                'course': course,
-                'matching_skills': matching
-            })
-    recommended_courses = sorted(recommended_courses, key=lambda x: len(x['matching_skills']), reverse=True)[:5]
+    recommended_courses = get_courses_for_skill_gaps(skill_gaps)[:5]
     
     profile_complete = 0
     if hasattr(user, 'candidate_profile'):
@@ -193,6 +185,7 @@ def admin_dashboard(request):
     
     site_settings = SiteSettings.get_settings()
     
+    SiteMetrics.flush()
     metrics_7_days = SiteMetrics.objects.filter(date__gte=week_ago).order_by('date')
     
     return render(request, 'dashboard/admin.html', {
@@ -4,10 +4,26 @@ from .models import Job
 
 class JobFilter(django_filters.FilterSet):
     title = django_filters.CharFilter(lookup_expr='icontains', label='Título')
-    location = django_filters.CharFilter(lookup_expr='icontains', label='Localização')
+    location = django_filters.CharFilter(method='filter_location', label='Localização')
+    radius_km = django_filters.NumberFilter(method='filter_radius', label='Raio (km)')
     requirements = django_filters.CharFilter(lookup_expr='icontains', label='Habilidades')
     salary_min = django_filters.NumberFilter(field_name='salary_min', lookup_expr='gte', label='Salário mínimo')
     
     class Meta:
         model = Job
         fields = ['job_type', 'work_mode', 'title', 'location', 'requirements']
+    
+    def filter_location(self, queryset, name, value):
+        # Com raio, vale qualquer vaga em cidade canonica proxima da informada
+        radius = self.form.cleaned_data.get('radius_km')
+        if radius is not None:
+            from accounts.location_normalizer import resolve_location_id
+            from match.locations import get_city_table
+            city_id = resolve_location_id(value)
+            if city_id:
+                return queryset.filter(canonical_city__in=get_city_table().within(city_id, radius))
+        return queryset.filter(location__icontains=value)
+    
+    def filter_radius(self, queryset, name, value):
+        # Aplicado em filter_location
+        return queryset
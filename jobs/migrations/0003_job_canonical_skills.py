@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+def backfill_job_skills(apps, schema_editor):
+    CanonicalSkill = apps.get_model('accounts', 'CanonicalSkill')
+    Job = apps.get_model('jobs', 'Job')
+
+    skill_ids = dict(CanonicalSkill.objects.values_list('name', 'id'))
+    for obj in Job.objects.exclude(requirements=''):
+        names = list(dict.fromkeys(s.strip().lower()[:100] for s in obj.requirements.split(',') if s.strip()))
+        for name in names:
+            if name not in skill_ids:
+                skill_ids[name] = CanonicalSkill.objects.create(name=name, is_active=False).id
+        obj.canonical_skills.set([skill_ids[name] for name in names])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_candidateprofile_canonical_skills'),
+        ('jobs', '0002_alter_application_status_applicationstatushistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='canonical_skills',
+            field=models.ManyToManyField(blank=True, editable=False, help_text='Requisitos estruturados, sincronizados a partir do campo requirements', related_name='jobs', to='accounts.canonicalskill'),
+        ),
+        migrations.RunPython(backfill_job_skills, migrations.RunPython.noop),
+    ]
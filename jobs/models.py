@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
 
@@ -33,6 +33,22 @@ class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deadline = models.DateField(blank=True, null=True)
+    canonical_skills = models.ManyToManyField(
+        'accounts.CanonicalSkill',
+        blank=True,
+        related_name='jobs',
+        editable=False,
+        help_text='Requisitos estruturados, sincronizados a partir do campo requirements'
+    )
+    canonical_city = models.ForeignKey(
+        'accounts.City',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        editable=False,
+        help_text='Cidade canonica, resolvida a partir do campo location'
+    )
     
     class Meta:
         ordering = ['-created_at']
@@ -40,6 +56,24 @@ class Job(models.Model):
     def __str__(self):
         return f"{self.title} - {self.company.company_profile.company_name}"
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'location' in update_fields:
+            from accounts.location_normalizer import resolve_location_id
+            self.canonical_city_id = resolve_location_id(self.location)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'canonical_city'}
+        # Os receivers de match (marcacao, versao, recalculo em on_commit) so ficam
+        # visiveis no commit, depois que canonical_skills ja foi sincronizado
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or 'requirements' in update_fields:
+                self.sync_canonical_skills()
+    
+    def sync_canonical_skills(self):
+        from accounts.skill_normalizer import resolve_skill_ids
+        self.canonical_skills.set(resolve_skill_ids(self.get_requirements_list()))
+    
     def get_requirements_list(self):
         if self.requirements:
             return [r.strip().lower() for r in self.requirements.split(',') if r.strip()]
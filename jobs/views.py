@@ -6,7 +6,7 @@ from django.urls import reverse
 from .models import Job, Application
 from .forms import JobForm, ApplicationForm, ApplicationStatusForm
 from .filters import JobFilter
-from match.utils import calculate_match_score
+from match.utils import get_cached_match_score
 
 
 def job_list(request):
@@ -37,7 +37,7 @@ def job_detail(request, pk):
     if request.user.is_authenticated and request.user.is_candidate():
         has_applied = Application.objects.filter(job=job, candidate=request.user).exists()
         if hasattr(request.user, 'candidate_profile'):
-            match_score = calculate_match_score(request.user, job)
+            match_score = get_cached_match_score(request.user, job)
     
     return render(request, 'jobs/job_detail.html', {
         'job': job,
@@ -116,7 +116,7 @@ def job_apply(request, pk):
             application = form.save(commit=False)
             application.job = job
             application.candidate = request.user
-            application.match_score = calculate_match_score(request.user, job)
+            application.match_score = get_cached_match_score(request.user, job)
             application.save()
 
             from accounts.models import Notification
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import MatchResult
+from .models import MatchResult, DirtyMatch
 
 
 @admin.register(MatchResult)
@@ -8,3 +8,9 @@ class MatchResultAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('candidate__username', 'job__title')
     ordering = ('-score',)
+
+
+@admin.register(DirtyMatch)
+class DirtyMatchAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'object_id', 'marked_at')
+    list_filter = ('kind',)
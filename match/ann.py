@@ -0,0 +1,126 @@
+"""
+Recuperacao aproximada (ANN) de candidatos por similaridade de habilidades.
+
+Habilidades populares ("python", "sql") fazem o indice invertido devolver
+quase todos os candidatos. Aqui cada vetor TF-IDF de candidato vira uma
+assinatura binaria por projecao aleatoria (LSH de hiperplanos): o cosseno
+entre dois vetores e aproximado pela distancia de Hamming entre as
+assinaturas, calculada com XOR + popcount sobre toda a base de uma vez.
+
+A recuperacao devolve os MATCH_ANN_SHORTLIST candidatos mais proximos da
+vaga, que depois recebem o score exato (score_jobs_against_candidates). Quanto
+maior o shortlist (e MATCH_ANN_BITS), maior o recall e maior a latencia; use
+`benchmark_match --ann-shortlists` para medir o recall contra o calculo
+exaustivo.
+
+O indice e reconstruido quando muda a versao do espaco de habilidades ou a
+de CANDIDATE_VECTORS_INDEX (incrementada a cada gravacao de perfil), no
+maximo uma vez a cada MATCH_ANN_REBUILD_INTERVAL segundos. Um indice antigo
+continua coerente (guarda o proprio espaco), e o candidato alterado tem sua
+linha da matriz recalculada pelo worker (refresh_candidate_matches), que nao
+depende do ANN.
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .skill_space import get_skill_space
+
+CANDIDATE_VECTORS_INDEX = 'candidate_vectors'
+
+_index = None
+_checked_at = 0.0
+_built_at = 0.0
+
+
+class CandidateANNIndex:
+    """Assinaturas LSH (bits empacotados) dos vetores de habilidades dos candidatos."""
+
+    def __init__(self, version, space, candidate_ids, signatures, planes):
+        self.version = version
+        self.space = space
+        self.candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        self.signatures = signatures
+        self.planes = planes
+
+    def __len__(self):
+        return len(self.candidate_ids)
+
+    @classmethod
+    def build(cls, version, space=None, n_bits=None, seed=0, chunk_size=10000):
+        from accounts.models import CandidateProfile
+
+        space = space or get_skill_space()
+        n_bits = n_bits or getattr(settings, 'MATCH_ANN_BITS', 128)
+        n_terms = len(space.vocabulary)
+        planes = np.random.default_rng(seed).standard_normal((n_terms, n_bits)).astype(np.float32)
+
+        rows = list(
+            CandidateProfile.objects.exclude(skills='').order_by('user_id')
+            .values_list('user_id', 'skills')
+        )
+        if not rows or space.vectorizer is None:
+            return cls(version, space, [], np.zeros((0, (n_bits + 7) // 8), dtype=np.uint8), planes)
+
+        signatures = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = [skills for _, skills in rows[start:start + chunk_size]]
+            signatures.append(cls._signatures(space.vectorizer.transform(chunk), planes))
+        return cls(version, space, [user_id for user_id, _ in rows], np.vstack(signatures), planes)
+
+    @staticmethod
+    def _signatures(matrix, planes):
+        return np.packbits(np.asarray(matrix @ planes) > 0, axis=1)
+
+    def query(self, text, shortlist=None):
+        """IDs dos candidatos mais proximos do texto, do mais ao menos similar."""
+        shortlist = shortlist or getattr(settings, 'MATCH_ANN_SHORTLIST', 300)
+        if not len(self) or not text:
+            return []
+
+        vector = self.space.transform(text)
+        if not vector.nnz:
+            return []
+        signature = self._signatures(vector, self.planes)
+        distances = np.bitwise_count(self.signatures ^ signature).sum(axis=1)
+
+        if shortlist < len(distances):
+            nearest = np.argpartition(distances, shortlist)[:shortlist]
+        else:
+            nearest = np.arange(len(distances))
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return self.candidate_ids[nearest].tolist()
+
+
+def get_candidate_index(force_check=False):
+    """Indice ANN atual, reconstruido quando o espaco ou os candidatos mudam."""
+    global _index, _checked_at, _built_at
+    from .models import MatchIndexVersion
+
+    ttl = getattr(settings, 'MATCH_INDEX_VERSION_TTL', 5)
+    interval = getattr(settings, 'MATCH_ANN_REBUILD_INTERVAL', 300)
+    now = time.monotonic()
+    if _index is not None and not force_check and now - _checked_at < ttl:
+        return _index
+
+    space = get_skill_space(force_check=force_check)
+    version = (space.version, MatchIndexVersion.current(CANDIDATE_VECTORS_INDEX))
+    stale = _index is not None and _index.version != version
+    if _index is None or (stale and (force_check or now - _built_at >= interval)):
+        _index = CandidateANNIndex.build(version, space)
+        _built_at = now
+    _checked_at = now
+    return _index
+
+
+def invalidate_candidate_index():
+    global _index
+    _index = None
+
+
+def bump_candidate_vectors_version():
+    """Marca o indice como desatualizado; a reconstrucao respeita o intervalo minimo."""
+    from .models import MatchIndexVersion
+
+    MatchIndexVersion.bump(CANDIDATE_VECTORS_INDEX)
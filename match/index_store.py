@@ -0,0 +1,234 @@
+"""
+Indice de match em disco, compartilhado entre os workers do gunicorn.
+
+O espaco de habilidades (vocabulario, IDF e matriz TF-IDF das vagas) e o
+JobSnapshot das vagas ativas sao gravados como arquivos .npy em um diretorio
+por versao dentro de settings.MATCH_INDEX_DIR. A versao publicada e indicada
+pelo arquivo CURRENT, trocado atomicamente com os.replace; um leitor ve a
+versao anterior inteira ou a nova inteira, nunca uma gravacao pela metade.
+
+Os processos abrem os arrays com numpy.load(mmap_mode='r'): as paginas ficam
+no cache do sistema operacional e sao compartilhadas por todos os workers, em
+vez de cada um montar a propria copia a partir do banco. Isso vale para os
+arrays grandes (IDF, matriz TF-IDF, colunas do snapshot). Dois dicionarios
+ainda sao montados por processo ao carregar o indice: o vocabulario do
+TfidfVectorizer (termo -> coluna, exigido pelo scikit-learn) e
+SkillVectorSpace.job_rows (vaga -> linha). Eles crescem com o numero de
+termos distintos e de vagas ativas, nao com o de candidatos. Um indice so e usado
+quando a sua versao coincide com a do espaco de habilidades no banco; o
+primeiro processo que nota a versao nova o reconstroi e publica (sob um lock
+de arquivo) e os demais apenas mapeiam o resultado. O comando
+build_match_index publica o indice explicitamente (ex.: antes de subir o
+gunicorn).
+
+O lock de publicacao usa fcntl, que so existe em sistemas POSIX; sem ele (ex.:
+Windows) a publicacao continua atomica, mas dois workers podem reconstruir a
+mesma versao ao mesmo tempo.
+"""
+import json
+import logging
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .job_snapshot import JobSnapshot
+from .skill_space import SkillVectorSpace
+
+logger = logging.getLogger(__name__)
+
+POINTER = 'CURRENT'
+FORMAT_VERSION = 2
+
+SNAPSHOT_COLUMNS = (
+    'ids', 'experience', 'salary_min', 'salary_max', 'work_modes', 'location_codes',
+    'locations', 'requirements', 'texts', 'skill_rows', 'skill_ids', 'city_ids',
+)
+
+
+def index_dir():
+    directory = getattr(settings, 'MATCH_INDEX_DIR', None)
+    return Path(directory) if directory else None
+
+
+def _save_csr(arrays, prefix, matrix):
+    arrays[f'{prefix}_data'] = matrix.data
+    arrays[f'{prefix}_indices'] = matrix.indices
+    arrays[f'{prefix}_indptr'] = matrix.indptr
+    return list(matrix.shape)
+
+
+def _load_csr(load, prefix, shape):
+    # csr_matrix reaproveita os arrays mapeados (dtypes preservados), sem copia
+    return sparse.csr_matrix(
+        (load(f'{prefix}_data'), load(f'{prefix}_indices'), load(f'{prefix}_indptr')),
+        shape=tuple(shape),
+    )
+
+
+def write_match_index(space, snapshot, directory=None, keep=2):
+    """
+    Grava o espaco e o snapshot em um diretorio novo e o publica como CURRENT.
+
+    Mantem as `keep` versoes mais recentes; processos que ainda mapeiam uma
+    versao removida continuam lendo as paginas ja abertas.
+    """
+    directory = Path(directory) if directory else index_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f'v{space.version}-{uuid.uuid4().hex[:12]}'
+
+    arrays = {
+        'terms': np.array(sorted(space.vocabulary, key=space.vocabulary.get), dtype=str),
+        'idf': np.asarray(space.idf, dtype=np.float64),
+        'job_ids': space.job_ids,
+    }
+    meta = {
+        'format': FORMAT_VERSION,
+        'version': space.version,
+        'n_documents': space.n_documents,
+        'job_matrix_shape': (
+            _save_csr(arrays, 'job_matrix', space.job_matrix) if space.job_matrix is not None else None
+        ),
+        'job_skills_shape': _save_csr(arrays, 'job_skills', snapshot.job_skills.tocsr()),
+    }
+    for column in SNAPSHOT_COLUMNS:
+        arrays[f'snapshot_{column}'] = np.asarray(getattr(snapshot, column))
+
+    staging = directory / f'.{name}.tmp'
+    staging.mkdir()
+    for key, array in arrays.items():
+        np.save(staging / f'{key}.npy', array, allow_pickle=False)
+    (staging / 'meta.json').write_text(json.dumps(meta))
+    os.rename(staging, directory / name)
+
+    pointer = directory / f'.{POINTER}.{name}'
+    pointer.write_text(name)
+    os.replace(pointer, directory / POINTER)
+
+    _prune(directory, keep)
+    return directory / name
+
+
+def _prune(directory, keep):
+    current = published_path(directory)
+    versions = sorted(
+        (path for path in directory.iterdir() if path.is_dir() and path.name.startswith('v')),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in versions[keep:]:
+        if path != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def published_path(directory=None):
+    """Diretorio da versao publicada, ou None se nada foi publicado."""
+    directory = Path(directory) if directory else index_dir()
+    try:
+        name = (directory / POINTER).read_text().strip()
+    except (FileNotFoundError, TypeError):
+        return None
+    return directory / name if name else None
+
+
+def load_match_index(path):
+    """SkillVectorSpace (com o JobSnapshot em `space.snapshot`) mapeado do disco."""
+    path = Path(path)
+    meta = json.loads((path / 'meta.json').read_text())
+    if meta.get('format') != FORMAT_VERSION:
+        raise ValueError(f'Unsupported match index format in {path}')
+
+    def load(key):
+        return np.load(path / f'{key}.npy', mmap_mode='r', allow_pickle=False)
+
+    terms = load('terms')
+    vectorizer = None
+    if len(terms):
+        vectorizer = TfidfVectorizer(lowercase=True)
+        vectorizer.vocabulary_ = {term: index for index, term in enumerate(terms.tolist())}
+        vectorizer.idf_ = np.asarray(load('idf'))
+
+    job_matrix = None
+    if meta['job_matrix_shape'] is not None:
+        job_matrix = _load_csr(load, 'job_matrix', meta['job_matrix_shape'])
+    space = SkillVectorSpace(
+        meta['version'],
+        vectorizer=vectorizer,
+        job_ids=load('job_ids'),
+        job_matrix=job_matrix,
+        n_documents=meta['n_documents'],
+    )
+    space.path = path
+    space.snapshot = JobSnapshot(
+        version=meta['version'],
+        job_skills=_load_csr(load, 'job_skills', meta['job_skills_shape']),
+        space=space,
+        **{column: load(f'snapshot_{column}') for column in SNAPSHOT_COLUMNS},
+    )
+    return space
+
+
+def load_published(version, directory=None):
+    """Indice publicado se estiver na versao pedida, senao None."""
+    path = published_path(directory)
+    if path is None:
+        return None
+    try:
+        meta = json.loads((path / 'meta.json').read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta.get('format') != FORMAT_VERSION or meta.get('version') != version:
+        return None
+    return load_match_index(path)
+
+
+@contextmanager
+def _publish_lock(directory):
+    directory.mkdir(parents=True, exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(directory / '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def publish_match_index(version, directory=None, keep=2):
+    """Constroi o indice da versao a partir do banco e o publica."""
+    space = SkillVectorSpace.build(version)
+    snapshot = JobSnapshot.build(version, space)
+    return write_match_index(space, snapshot, directory, keep)
+
+
+def load_or_publish(version, directory=None):
+    """
+    Espaco da versao pedida mapeado do disco, publicando-o se preciso.
+
+    O lock garante que so um worker reconstroi a versao; os outros esperam e
+    mapeiam o que ele publicou. Se o diretorio nao puder ser gravado, o espaco
+    e montado apenas em memoria.
+    """
+    directory = Path(directory) if directory else index_dir()
+    space = load_published(version, directory)
+    if space is not None:
+        return space
+    try:
+        with _publish_lock(directory):
+            space = load_published(version, directory)
+            if space is None:
+                space = load_match_index(publish_match_index(version, directory))
+    except OSError:
+        logger.exception('Could not publish the match index to %s; building it in memory.', directory)
+        space = SkillVectorSpace.build(version)
+    return space
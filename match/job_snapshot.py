@@ -0,0 +1,180 @@
+"""
+Snapshot colunar das vagas ativas usado pela pontuacao em lote.
+
+Guarda, em arrays NumPy alinhados, apenas o que o match le de cada vaga:
+id, experiencia exigida, faixa salarial, codigos de modo de trabalho e de
+local, a cidade canonica, a linha da vaga na matriz TF-IDF e a matriz esparsa vaga x habilidade
+canonica. Assim a pontuacao nao instancia objetos Job nem carrega textos
+longos como description/benefits.
+
+O snapshot acompanha a versao do espaco de habilidades, que e incrementada
+a cada gravacao ou exclusao de vaga (ver signals), entao um unico contador
+invalida os dois.
+"""
+import numpy as np
+from scipy import sparse
+
+from .skill_space import get_skill_space
+
+WORK_MODES = ('onsite', 'remote', 'hybrid')
+
+_snapshot = None
+
+
+class JobSnapshot:
+    """Colunas de pontuacao de um conjunto de vagas."""
+
+    def __init__(self, version, ids, experience, salary_min, salary_max, work_modes,
+                 location_codes, locations, requirements, texts, skill_rows, skill_ids, job_skills,
+                 city_ids, space=None):
+        self.version = version
+        self.space = space
+        self.ids = ids
+        self.experience = experience
+        self.salary_min = salary_min
+        self.salary_max = salary_max
+        self.work_modes = work_modes
+        self.location_codes = location_codes
+        self.locations = locations
+        self.requirements = requirements
+        self.texts = texts
+        self.skill_rows = skill_rows
+        self.skill_ids = skill_ids
+        self.job_skills = job_skills
+        self.city_ids = city_ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def requirements_of(self, row):
+        """Requisitos normalizados da vaga na linha `row`, na ordem do anuncio."""
+        requirements = str(self.requirements[row])
+        return requirements.split(',') if requirements else []
+
+    @classmethod
+    def from_rows(cls, version, rows, skill_pairs, space=None):
+        """
+        Monta o snapshot a partir de tuplas (id, experience_years, salary_min,
+        salary_max, work_mode, location, requirements, canonical_city_id) e
+        pares (job_id, skill_id).
+        """
+        space = space or get_skill_space()
+        rows = list(rows)
+        # Vagas ainda nao salvas ficam com id -1 (sem linha TF-IDF nem habilidades)
+        ids = np.array([-1 if row[0] is None else row[0] for row in rows], dtype=np.int64)
+
+        location_index = {}
+        location_codes = np.array(
+            [location_index.setdefault(row[5] or '', len(location_index)) for row in rows],
+            dtype=np.int64,
+        )
+        # Requisitos normalizados e sem repeticao, unidos por virgula: arrays de
+        # texto de largura fixa podem ser gravados e mapeados do disco (index_store)
+        requirements = np.array([
+            ','.join(dict.fromkeys(r.strip().lower() for r in (row[6] or '').split(',') if r.strip()))
+            for row in rows
+        ], dtype=str)
+
+        row_of = {job_id: i for i, job_id in enumerate(ids.tolist())}
+        skill_pairs = [(row_of[job_id], skill_id) for job_id, skill_id in skill_pairs if job_id in row_of]
+        skill_ids = np.unique(np.array([skill_id for _, skill_id in skill_pairs], dtype=np.int64))
+        job_skills = sparse.csr_matrix(
+            (np.ones(len(skill_pairs)),
+             ([row for row, _ in skill_pairs],
+              np.searchsorted(skill_ids, [skill_id for _, skill_id in skill_pairs]))),
+            shape=(len(rows), len(skill_ids)),
+        )
+
+        return cls(
+            version=version,
+            ids=ids,
+            experience=np.array([row[1] or 0 for row in rows], dtype=float),
+            salary_min=np.array([float(row[2] or 0) for row in rows]),
+            salary_max=np.array([float(row[3] or 0) for row in rows]),
+            work_modes=np.array(
+                [WORK_MODES.index(row[4]) if row[4] in WORK_MODES else -1 for row in rows],
+                dtype=np.int64,
+            ),
+            location_codes=location_codes,
+            locations=np.array(list(location_index), dtype=str),
+            requirements=requirements,
+            texts=np.array([row[6] or '' for row in rows], dtype=str),
+            skill_rows=np.array([space.job_rows.get(job_id, -1) for job_id in ids.tolist()], dtype=np.int64),
+            skill_ids=skill_ids,
+            job_skills=job_skills,
+            city_ids=np.array([-1 if row[7] is None else row[7] for row in rows], dtype=np.int64),
+            space=space,
+        )
+
+    @classmethod
+    def build(cls, version=None, space=None):
+        """Snapshot de todas as vagas ativas, sem instanciar objetos Job."""
+        from jobs.models import Job
+
+        space = space or get_skill_space()
+        active = Job.objects.filter(is_active=True)
+        rows = active.order_by('pk').values_list(
+            'id', 'experience_years', 'salary_min', 'salary_max', 'work_mode', 'location', 'requirements',
+            'canonical_city_id',
+        )
+        skill_pairs = Job.canonical_skills.through.objects.filter(
+            job__is_active=True
+        ).values_list('job_id', 'canonicalskill_id')
+        return cls.from_rows(space.version if version is None else version, rows, skill_pairs, space)
+
+    @classmethod
+    def from_jobs(cls, jobs, space=None):
+        """Snapshot de uma lista de vagas ja carregadas (ex.: a coluna de uma vaga)."""
+        from jobs.models import Job
+
+        space = space or get_skill_space()
+        rows = [
+            (job.pk, job.experience_years, job.salary_min, job.salary_max,
+             job.work_mode, job.location, job.requirements, job.canonical_city_id)
+            for job in jobs
+        ]
+        skill_pairs = Job.canonical_skills.through.objects.filter(
+            job_id__in=[job.pk for job in jobs if job.pk]
+        ).values_list('job_id', 'canonicalskill_id')
+        return cls.from_rows(space.version, rows, skill_pairs, space)
+
+    def take(self, rows):
+        """Sub-snapshot com as linhas indicadas (indices ou mascara booleana)."""
+        rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=np.int64)
+        return JobSnapshot(
+            version=self.version,
+            ids=self.ids[rows],
+            experience=self.experience[rows],
+            salary_min=self.salary_min[rows],
+            salary_max=self.salary_max[rows],
+            work_modes=self.work_modes[rows],
+            location_codes=self.location_codes[rows],
+            locations=self.locations,
+            requirements=self.requirements[rows],
+            texts=self.texts[rows],
+            skill_rows=self.skill_rows[rows],
+            skill_ids=self.skill_ids,
+            job_skills=self.job_skills[rows],
+            city_ids=self.city_ids[rows],
+            space=self.space,
+        )
+
+    def only(self, job_ids):
+        """Sub-snapshot restrito aos IDs informados."""
+        return self.take(np.isin(self.ids, np.fromiter(job_ids, dtype=np.int64)))
+
+
+def get_job_snapshot(force_check=False):
+    """Snapshot das vagas ativas, reconstruido junto com o espaco de habilidades."""
+    global _snapshot
+
+    space = get_skill_space(force_check=force_check)
+    if _snapshot is None or _snapshot.space is not space:
+        # Espacos carregados do indice em disco ja trazem o snapshot mapeado
+        _snapshot = space.snapshot or JobSnapshot.build(space.version, space)
+    return _snapshot
+
+
+def invalidate_job_snapshot():
+    global _snapshot
+    _snapshot = None
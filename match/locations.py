@@ -0,0 +1,106 @@
+"""
+Tabela de distancias entre as cidades canonicas (accounts.City).
+
+Perfis e vagas guardam o ID da cidade resolvido ao salvar (canonical_city),
+entao o score de localizacao vira uma consulta inteira: mesma cidade, ou
+distancia ate MATCH_LOCATION_RADIUS_KM. As distancias entre todas as cidades
+com coordenadas sao pre-calculadas (haversine) em uma matriz uint16 de km,
+indexada pela posicao de cada cidade; pares sem coordenadas ficam com
+UNKNOWN_KM. Como no espaco de habilidades, a tabela e reconstruida quando a
+versao CITIES_INDEX muda (a cada gravacao de cidade, ver signals).
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+
+CITIES_INDEX = 'cities'
+UNKNOWN_KM = np.iinfo(np.uint16).max
+EARTH_RADIUS_KM = 6371.0
+
+_table = None
+_checked_at = 0.0
+
+
+class CityDistanceTable:
+    """Distancias (km) entre todas as cidades canonicas."""
+
+    def __init__(self, version, city_ids, distances):
+        self.version = version
+        self.city_ids = np.asarray(city_ids, dtype=np.int64)
+        self.distances = distances
+
+    def __len__(self):
+        return len(self.city_ids)
+
+    @classmethod
+    def build(cls, version):
+        from accounts.models import City
+
+        rows = list(City.objects.order_by('pk').values_list('id', 'latitude', 'longitude'))
+        coords = np.array([(lat, lon) if lat is not None and lon is not None else (np.nan, np.nan)
+                           for _, lat, lon in rows], dtype=float).reshape(-1, 2)
+
+        lat, lon = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+        a = (np.sin((lat[:, None] - lat[None, :]) / 2) ** 2
+             + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin((lon[:, None] - lon[None, :]) / 2) ** 2)
+        km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+        distances = np.full(km.shape, UNKNOWN_KM, dtype=np.uint16)
+        known = ~np.isnan(km)
+        distances[known] = np.minimum(np.rint(km[known]), UNKNOWN_KM - 1)
+        np.fill_diagonal(distances, 0)
+        return cls(version, [city_id for city_id, _, _ in rows], distances)
+
+    def _positions(self, city_ids):
+        """Posicao de cada ID na tabela (-1 para IDs ausentes, inclusive -1)."""
+        city_ids = np.asarray(city_ids, dtype=np.int64)
+        if not len(self.city_ids):
+            return np.full(len(city_ids), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.city_ids, city_ids), len(self.city_ids) - 1)
+        return np.where(self.city_ids[positions] == city_ids, positions, -1)
+
+    def distance_matrix(self, a_ids, b_ids):
+        """Matriz (len(a) x len(b)) de distancias em km; UNKNOWN_KM quando nao ha coordenadas."""
+        a, b = self._positions(a_ids), self._positions(b_ids)
+        result = np.full((len(a), len(b)), UNKNOWN_KM, dtype=np.uint16)
+        rows, columns = np.flatnonzero(a >= 0), np.flatnonzero(b >= 0)
+        if len(rows) and len(columns):
+            result[np.ix_(rows, columns)] = self.distances[np.ix_(a[rows], b[columns])]
+        return result
+
+    def within(self, city_id, radius_km):
+        """IDs das cidades a ate radius_km da cidade (inclusive ela mesma)."""
+        position = self._positions([city_id])[0]
+        if position < 0:
+            return [city_id]
+        return self.city_ids[self.distances[position] <= radius_km].tolist()
+
+
+def get_city_table(force_check=False):
+    """Tabela atual, reconstruida quando a versao das cidades muda."""
+    global _table, _checked_at
+    from .models import MatchIndexVersion
+
+    ttl = getattr(settings, 'MATCH_INDEX_VERSION_TTL', 5)
+    now = time.monotonic()
+    if _table is not None and not force_check and now - _checked_at < ttl:
+        return _table
+
+    version = MatchIndexVersion.current(CITIES_INDEX)
+    if _table is None or _table.version != version:
+        _table = CityDistanceTable.build(version)
+    _checked_at = now
+    return _table
+
+
+def invalidate_city_table():
+    global _table
+    _table = None
+
+
+def bump_cities_version():
+    from .models import MatchIndexVersion
+
+    MatchIndexVersion.bump(CITIES_INDEX)
+    invalidate_city_table()
@@ -0,0 +1,302 @@
+import json
+import time
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+CITIES = [
+    ('Sao Paulo', 'SP'), ('Campinas', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'),
+    ('Curitiba', 'PR'), ('Porto Alegre', 'RS'), ('Florianopolis', 'SC'), ('Recife', 'PE'),
+    ('Salvador', 'BA'), ('Brasilia', 'DF'), ('Fortaleza', 'CE'), ('Goiania', 'GO'),
+]
+WORK_MODES = ['onsite', 'remote', 'hybrid']
+
+
+def parse_scale(value):
+    try:
+        candidates, jobs = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise CommandError(f'Invalid scale "{value}", expected CANDIDATESxJOBS (e.g. 1000x100).')
+    return candidates, jobs
+
+
+def skill_taxonomy(size):
+    """Habilidades do seed_skills completadas com termos sinteticos ate `size`."""
+    from accounts.management.commands.seed_skills import CANONICAL_SKILLS
+
+    names = [skill['name'] for skill in CANONICAL_SKILLS][:size]
+    names += [f'skill-{i:04d}' for i in range(len(names), size)]
+    return names
+
+
+def generate_dataset(rng, n_candidates, n_jobs, skills):
+    """
+    Popula o banco com dados sinteticos. A popularidade das habilidades segue
+    uma lei de potencia (poucas muito comuns, cauda longa de raras), como nos
+    perfis e vagas reais.
+    """
+    from accounts.models import CandidateProfile, CanonicalSkill, City, CompanyProfile, User
+    from jobs.models import Job
+    from match.skill_demand import rebuild_skill_demand
+    from match.skill_space import bump_skill_space_version, invalidate_skill_space
+
+    CanonicalSkill.objects.bulk_create(
+        [CanonicalSkill(name=name) for name in skills], ignore_conflicts=True
+    )
+    skill_ids = dict(CanonicalSkill.objects.filter(name__in=skills).values_list('name', 'id'))
+    call_command('seed_cities', stdout=StringIO())
+    city_ids = {(name, state): pk for name, state, pk in City.objects.values_list('name', 'state', 'id')}
+    popularity = 1.0 / np.arange(1, len(skills) + 1) ** 1.1
+    popularity /= popularity.sum()
+
+    def pick_skills(low, high):
+        size = min(int(rng.integers(low, high + 1)), len(skills))
+        return [skills[i] for i in rng.choice(len(skills), size=size, replace=False, p=popularity)]
+
+    n_companies = max(1, n_jobs // 10)
+    companies = User.objects.bulk_create([
+        User(username=f'bench-company-{i}', user_type='company') for i in range(n_companies)
+    ])
+    CompanyProfile.objects.bulk_create([
+        CompanyProfile(user=company, company_name=f'Empresa {i}') for i, company in enumerate(companies)
+    ])
+
+    candidates = User.objects.bulk_create([
+        User(username=f'bench-candidate-{i}', user_type='candidate') for i in range(n_candidates)
+    ])
+    profiles = []
+    for user in candidates:
+        city, state = CITIES[int(rng.integers(len(CITIES)))]
+        profiles.append(CandidateProfile(
+            user=user,
+            skills=', '.join(pick_skills(3, 12)),
+            experience_years=int(rng.integers(0, 15)),
+            desired_salary=int(rng.integers(20, 200)) * 100 if rng.random() < 0.8 else None,
+            city=city,
+            state=state,
+            canonical_city_id=city_ids.get((city, state)),
+        ))
+    profiles = CandidateProfile.objects.bulk_create(profiles)
+
+    jobs = []
+    for i in range(n_jobs):
+        city, state = CITIES[int(rng.integers(len(CITIES)))]
+        salary_min = int(rng.integers(20, 150)) * 100 if rng.random() < 0.7 else None
+        jobs.append(Job(
+            company=companies[i % n_companies],
+            title=f'Vaga {i}',
+            description='Vaga gerada para benchmark',
+            requirements=', '.join(pick_skills(3, 8)),
+            work_mode=WORK_MODES[int(rng.integers(len(WORK_MODES)))],
+            location=f'{city}, {state}',
+            canonical_city_id=city_ids.get((city, state)),
+            experience_years=int(rng.integers(0, 10)),
+            salary_min=salary_min,
+            salary_max=salary_min * 1.4 if salary_min and rng.random() < 0.8 else None,
+        ))
+    jobs = Job.objects.bulk_create(jobs)
+
+    # bulk_create nao dispara save(): as relacoes e indices derivados sao montados aqui
+    ProfileSkill = CandidateProfile.canonical_skills.through
+    ProfileSkill.objects.bulk_create([
+        ProfileSkill(candidateprofile_id=profile.pk, canonicalskill_id=skill_ids[skill])
+        for profile in profiles for skill in profile.get_skills_list()
+    ], batch_size=1000)
+    JobSkill = Job.canonical_skills.through
+    JobSkill.objects.bulk_create([
+        JobSkill(job_id=job.pk, canonicalskill_id=skill_ids[skill])
+        for job in jobs for skill in job.get_requirements_list()
+    ], batch_size=1000)
+    rebuild_skill_demand()
+    bump_skill_space_version()
+    invalidate_skill_space()
+
+
+def measure(function, calls):
+    """Executa cada chamada e devolve p50/p95 (ms) e consultas SQL por chamada."""
+    timings, queries = [], []
+    for args in calls:
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            function(*args)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+    return {
+        'calls': len(timings),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'mean_ms': round(float(np.mean(timings)), 3),
+        'queries_per_call': round(float(np.mean(queries)), 2),
+    }
+
+
+def measure_ann_recall(candidates, jobs, shortlists, k=10):
+    """
+    Recall@k do shortlist ANN + rescoring exato contra o calculo exaustivo.
+
+    Um candidato do top-k aproximado conta como acerto se o seu score alcanca
+    o k-esimo melhor score exaustivo (empates nao penalizam o recall).
+    """
+    from match.ann import CandidateANNIndex
+    from match.skill_space import get_skill_space
+    from match.utils import calculate_match_score
+
+    by_id = {candidate.pk: candidate for candidate in candidates}
+    started = time.perf_counter()
+    index = CandidateANNIndex.build(None, get_skill_space(force_check=True))
+    report = {'k': k, 'index_build_ms': round((time.perf_counter() - started) * 1000, 3),
+              'exhaustive': None, 'shortlists': {}}
+
+    exact, timings = [], []
+    for job in jobs:
+        start = time.perf_counter()
+        scores = sorted((calculate_match_score(c, job) for c in candidates), reverse=True)
+        timings.append((time.perf_counter() - start) * 1000)
+        exact.append(scores[min(k, len(scores)) - 1])
+    report['exhaustive'] = {'p50_ms': round(float(np.percentile(timings, 50)), 3),
+                            'p95_ms': round(float(np.percentile(timings, 95)), 3)}
+
+    for shortlist in shortlists:
+        hits, timings = [], []
+        for job, kth_score in zip(jobs, exact):
+            start = time.perf_counter()
+            scores = sorted(
+                (calculate_match_score(by_id[pk], job)
+                 for pk in index.query(job.requirements, shortlist) if pk in by_id),
+                reverse=True,
+            )[:k]
+            timings.append((time.perf_counter() - start) * 1000)
+            hits.append(sum(score >= kth_score for score in scores) / min(k, len(candidates)))
+        report['shortlists'][str(shortlist)] = {
+            'recall': round(float(np.mean(hits)), 4),
+            'p50_ms': round(float(np.percentile(timings, 50)), 3),
+            'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        }
+    return report
+
+
+def invalidate_match_caches():
+    """
+    Descarta os caches de processo do match. O rollback de cada escala volta as
+    versoes (MatchIndexVersion) para os mesmos numeros, entao um cache da escala
+    anterior pareceria atual para a seguinte.
+    """
+    from match.ann import invalidate_candidate_index
+    from match.job_snapshot import invalidate_job_snapshot
+    from match.locations import invalidate_city_table
+    from match.score_cache import score_cache
+    from match.skill_space import invalidate_skill_space
+
+    invalidate_skill_space()
+    invalidate_job_snapshot()
+    invalidate_candidate_index()
+    invalidate_city_table()
+    score_cache.clear()
+
+
+def run_scale(rng, n_candidates, n_jobs, skills, samples, ann_shortlists=()):
+    from accounts.models import User
+    from jobs.models import Job
+    from match.skill_space import get_skill_space
+    from match.utils import (
+        calculate_match_score, get_recommended_candidates_for_job,
+        get_recommended_jobs_for_candidate, get_skill_gaps,
+        refresh_candidate_matches, refresh_job_matches,
+    )
+
+    started = time.perf_counter()
+    generate_dataset(rng, n_candidates, n_jobs, skills)
+    setup_seconds = time.perf_counter() - started
+
+    candidates = list(
+        User.objects.filter(user_type='candidate').select_related('candidate_profile').order_by('pk')
+    )
+    jobs = list(Job.objects.filter(is_active=True).order_by('pk'))
+    sample_candidates = [candidates[i] for i in rng.choice(len(candidates), size=samples)]
+    sample_jobs = [jobs[i] for i in rng.choice(len(jobs), size=samples)]
+
+    # Mede o estado estavel: espaco de skills ajustado e matriz ja persistida
+    get_skill_space(force_check=True)
+    for candidate in {c.pk: c for c in sample_candidates}.values():
+        refresh_candidate_matches(candidate)
+    for job in {j.pk: j for j in sample_jobs}.values():
+        refresh_job_matches(job)
+
+    result = {
+        'candidates': n_candidates,
+        'jobs': n_jobs,
+        'skills': len(skills),
+        'setup_seconds': round(setup_seconds, 3),
+        'functions': {
+            'calculate_match_score': measure(
+                calculate_match_score, list(zip(sample_candidates, sample_jobs))
+            ),
+            'get_recommended_jobs_for_candidate': measure(
+                get_recommended_jobs_for_candidate, [(c,) for c in sample_candidates]
+            ),
+            'get_recommended_candidates_for_job': measure(
+                get_recommended_candidates_for_job, [(j,) for j in sample_jobs]
+            ),
+            'get_skill_gaps': measure(get_skill_gaps, [(c,) for c in sample_candidates]),
+        },
+    }
+    if ann_shortlists:
+        result['ann'] = measure_ann_recall(candidates, sample_jobs, ann_shortlists)
+    return result
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the match engine on synthetic data in a throwaway test database '
+            'and reports p50/p95 latency and queries per call as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', nargs='+', default=['100x20', '1000x100', '5000x500'],
+                            help='CANDIDATESxJOBS pairs to benchmark.')
+        parser.add_argument('--skills', type=int, default=200,
+                            help='Size of the skill taxonomy.')
+        parser.add_argument('--samples', type=int, default=50,
+                            help='Calls timed per function and scale.')
+        parser.add_argument('--ann-shortlists', nargs='*', type=int, default=[],
+                            help='Also measure ANN recall@10 against exhaustive scoring '
+                                 'for these shortlist sizes.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        scales = [parse_scale(value) for value in options['scales']]
+        if options['skills'] < 1 or options['samples'] < 1:
+            raise CommandError('--skills and --samples must be positive.')
+        if any(candidates < 1 or jobs < 1 for candidates, jobs in scales):
+            raise CommandError('Every scale needs at least one candidate and one job.')
+
+        rng = np.random.default_rng(options['seed'])
+        skills = skill_taxonomy(options['skills'])
+        report = {'seed': options['seed'], 'samples': options['samples'], 'scales': []}
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            for n_candidates, n_jobs in scales:
+                if options['verbosity'] > 1:
+                    self.stderr.write(f'Benchmarking {n_candidates} candidates x {n_jobs} jobs...')
+                # Cada escala parte do banco vazio: os dados sao descartados no rollback
+                with transaction.atomic():
+                    report['scales'].append(
+                        run_scale(rng, n_candidates, n_jobs, skills, options['samples'],
+                                  options['ann_shortlists'])
+                    )
+                    transaction.set_rollback(True)
+                invalidate_match_caches()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
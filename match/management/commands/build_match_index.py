@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from match.index_store import index_dir, load_published, publish_match_index
+from match.models import MatchIndexVersion
+from match.skill_space import SKILL_SPACE_INDEX
+
+
+class Command(BaseCommand):
+    help = ('Builds the memory-mapped match index (skill space and active job columns) '
+            'and publishes it atomically under MATCH_INDEX_DIR.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='Index directory (defaults to MATCH_INDEX_DIR).')
+        parser.add_argument('--keep', type=int, default=2,
+                            help='Number of index versions kept on disk.')
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild even if the published index is up to date.')
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or index_dir()
+        if not directory:
+            raise CommandError('Set MATCH_INDEX_DIR or pass --dir.')
+        if options['keep'] < 1:
+            raise CommandError('--keep must be at least 1.')
+
+        version = MatchIndexVersion.current(SKILL_SPACE_INDEX)
+        if not options['force'] and load_published(version, directory) is not None:
+            self.stdout.write(f'Match index already at version {version}.')
+            return
+
+        path = publish_match_index(version, directory, keep=options['keep'])
+        self.stdout.write(self.style.SUCCESS(f'Match index version {version} published at {path}.'))
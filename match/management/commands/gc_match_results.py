@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from match.retention import collect_match_garbage, retention_top_k
+
+
+class Command(BaseCommand):
+    help = ('Deletes MatchResult rows of inactive jobs and pairs outside the top-K '
+            'retention (MATCH_RETENTION_TOP_K). Meant to run periodically.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int,
+                            help='Override MATCH_RETENTION_TOP_K (0 only removes inactive jobs).')
+
+    def handle(self, *args, **options):
+        top_k = retention_top_k() if options['top_k'] is None else options['top_k']
+        if top_k < 0:
+            raise CommandError('--top-k must not be negative.')
+
+        removed = collect_match_garbage(top_k=top_k)
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed["inactive_jobs"]} rows of inactive jobs and '
+            f'{removed["outside_top_k"]} rows outside the top {top_k}.'
+        ))
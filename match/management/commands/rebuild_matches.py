@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker():
+    import django
+    django.setup()
+    # Conexoes herdadas do processo pai (fork) nao podem ser compartilhadas
+    connections.close_all()
+
+
+def score_chunk(candidate_ids):
+    """
+    Pontua um bloco de candidatos contra todas as vagas ativas (roda no worker).
+    Retorna (scored_at, rows): marcacoes dos candidatos do bloco anteriores a
+    scored_at ja estao refletidas nas linhas.
+    """
+    from accounts.models import User
+    from jobs.models import Job
+    from match.job_snapshot import get_job_snapshot
+    from match.prefilter import prefilter_jobs
+    from match.utils import build_candidate_results
+
+    scored_at = timezone.now()
+    snapshot = get_job_snapshot()
+    rows = []
+    candidates = User.objects.filter(
+        pk__in=candidate_ids, candidate_profile__isnull=False
+    ).select_related('candidate_profile')
+    for candidate in candidates:
+        allowed, _ = prefilter_jobs(candidate.candidate_profile, Job.objects.filter(is_active=True),
+                                    with_counts=False)
+        jobs = snapshot.only(allowed.values_list('pk', flat=True))
+        for result in build_candidate_results(candidate, jobs):
+            rows.append((result.job_id, candidate.pk, result.score,
+                         result.matched_skills, result.missing_skills))
+    return scored_at, rows
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the full candidate x active job match matrix using a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of worker processes (1 runs inline).')
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Candidates per chunk.')
+        parser.add_argument('--checkpoint', default=str(settings.BASE_DIR / '.rebuild_matches.json'),
+                            help='Checkpoint file used to resume an interrupted rebuild.')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore an existing checkpoint and start over.')
+
+    def handle(self, *args, **options):
+        from accounts.models import User
+        from jobs.models import Job
+        from match.models import DirtyMatch, MatchResult
+        from match.retention import (
+            delete_match_results, prune_match_results, retain_top_k, without_applications,
+        )
+        from match.utils import save_match_results
+
+        chunk_size = options['chunk_size']
+        checkpoint_path = options['checkpoint']
+
+        job_ids = list(Job.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True))
+        candidate_ids = list(
+            User.objects.filter(user_type='candidate', candidate_profile__isnull=False)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        chunks = [candidate_ids[i:i + chunk_size] for i in range(0, len(candidate_ids), chunk_size)]
+
+        # Um checkpoint so vale para o mesmo conjunto de vagas, candidatos e blocos
+        signature = hashlib.sha256(
+            json.dumps([job_ids, candidate_ids, chunk_size]).encode()
+        ).hexdigest()
+        done, started_at = set(), None
+        if not options['restart']:
+            done, started_at = self._load_checkpoint(checkpoint_path, signature)
+        # Ao retomar vale o inicio da execucao interrompida: todos os blocos, inclusive
+        # os que ela concluiu, viram as vagas marcadas antes dele
+        started_at = started_at or timezone.now()
+        pending = [(index, chunk) for index, chunk in enumerate(chunks) if index not in done]
+
+        self.stdout.write(
+            f'{len(candidate_ids)} candidates x {len(job_ids)} jobs in {len(chunks)} chunks '
+            f'({len(chunks) - len(pending)} already done).'
+        )
+
+        pairs = 0
+        written = 0
+        clock = time.monotonic()
+
+        def record(index, result):
+            nonlocal pairs, written
+            scored_at, rows = result
+            # Pares de vagas ativas que o pre-filtro descartou perdem o resultado antigo,
+            # exceto os com candidatura
+            scored = {(job_id, candidate_id) for job_id, candidate_id, *_ in rows}
+            existing = without_applications(MatchResult.objects.filter(
+                candidate_id__in=chunks[index], job__is_active=True
+            ))
+            delete_match_results(
+                pk for pk, job_id, candidate_id in existing.values_list('pk', 'job_id', 'candidate_id')
+                if (job_id, candidate_id) not in scored
+            )
+
+            written += save_match_results(retain_top_k([
+                MatchResult(job_id=job_id, candidate_id=candidate_id, score=score,
+                            matched_skills=matched, missing_skills=missing)
+                for job_id, candidate_id, score, matched, missing in rows
+            ], 'candidate'))
+            pairs += len(rows)
+            # Marcacoes feitas depois do inicio do bloco continuam pendentes
+            DirtyMatch.objects.filter(
+                kind='candidate', object_id__in=chunks[index], marked_at__lte=scored_at
+            ).delete()
+            done.add(index)
+            self._save_checkpoint(checkpoint_path, signature, done, started_at)
+
+            elapsed = max(time.monotonic() - clock, 1e-9)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'chunk {index + 1}/{len(chunks)}: {pairs / elapsed:.0f} pairs/s')
+
+        if options['workers'] <= 1:
+            for index, chunk in pending:
+                record(index, score_chunk(chunk))
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                futures = {pool.submit(score_chunk, chunk): index for index, chunk in pending}
+                for future in as_completed(futures):
+                    record(futures[future], future.result())
+
+        # Candidatos de blocos posteriores podem ter empurrado pares para fora do top-K das vagas
+        pruned = prune_match_results()
+
+        # Vagas marcadas antes do inicio estao refletidas em todos os blocos; as
+        # marcadas depois podem ter sido vistas so por parte deles
+        DirtyMatch.objects.filter(kind='job', marked_at__lte=started_at).delete()
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        elapsed = max(time.monotonic() - clock, 1e-9)
+        message = (
+            f'Rebuilt {pairs} pairs ({written} written, {pruned} pruned) in {elapsed:.1f}s: '
+            f'{pairs / elapsed:.0f} pairs/s, {sum(len(c) for _, c in pending) / elapsed:.1f} candidates/s.'
+        )
+        logger.info(message)
+        self.stdout.write(self.style.SUCCESS(message))
+
+    @staticmethod
+    def _load_checkpoint(path, signature):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return set(), None
+        if data.get('signature') != signature:
+            return set(), None
+        return set(data.get('done', [])), parse_datetime(data.get('started_at') or '')
+
+    @staticmethod
+    def _save_checkpoint(path, signature, done, started_at):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'signature': signature, 'started_at': started_at.isoformat(), 'done': sorted(done)}, f)
+        os.replace(tmp_path, path)
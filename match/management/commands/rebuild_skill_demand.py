@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from match.skill_demand import rebuild_skill_demand
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the SkillDemand table from all active jobs.'
+
+    def handle(self, *args, **options):
+        total = rebuild_skill_demand()
+        self.stdout.write(self.style.SUCCESS(f'Skill demand rebuilt: {total} skills.'))
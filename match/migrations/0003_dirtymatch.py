@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:09
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0002_matchindexversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('candidate', 'Candidato'), ('job', 'Vaga')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Match Pendente',
+                'verbose_name_plural': 'Matches Pendentes',
+                'ordering': ['marked_at'],
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+    ]
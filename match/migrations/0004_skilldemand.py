@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:12
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def build_skill_demand(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    SkillDemand = apps.get_model('match', 'SkillDemand')
+
+    counts = Counter()
+    for requirements in Job.objects.filter(is_active=True).values_list('requirements', flat=True):
+        counts.update({r.strip().lower()[:100] for r in (requirements or '').split(',') if r.strip()})
+    SkillDemand.objects.bulk_create(
+        [SkillDemand(skill=skill, job_count=count) for skill, count in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_alter_application_status_applicationstatushistory'),
+        ('match', '0003_dirtymatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillDemand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill', models.CharField(max_length=100, unique=True)),
+                ('job_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Demanda de Habilidade',
+                'verbose_name_plural': 'Demanda de Habilidades',
+                'ordering': ['-job_count', 'skill'],
+                'indexes': [models.Index(fields=['-job_count', 'skill'], name='match_skilldemand_rank_idx')],
+            },
+        ),
+        migrations.RunPython(build_skill_demand, migrations.RunPython.noop),
+    ]
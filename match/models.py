@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from jobs.models import Job
 
 
@@ -28,3 +29,74 @@ class MatchResult(models.Model):
         if self.missing_skills:
             return [s.strip() for s in self.missing_skills.split(',') if s.strip()]
         return []
+
+
+class MatchIndexVersion(models.Model):
+    """Contador de versao dos indices de match mantidos em memoria pelos workers."""
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Versao de Indice de Match'
+        verbose_name_plural = 'Versoes de Indices de Match'
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    @classmethod
+    def current(cls, name):
+        return cls.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, name):
+        updated = cls.objects.filter(name=name).update(version=models.F('version') + 1)
+        if not updated:
+            cls.objects.get_or_create(name=name, defaults={'version': 1})
+        return cls.current(name)
+
+
+class DirtyMatch(models.Model):
+    """Linha (candidato) ou coluna (vaga) da matriz de match a ser recalculada."""
+    KIND_CHOICES = (
+        ('candidate', 'Candidato'),
+        ('job', 'Vaga'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['marked_at']
+        unique_together = ['kind', 'object_id']
+        verbose_name = 'Match Pendente'
+        verbose_name_plural = 'Matches Pendentes'
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}"
+
+    @classmethod
+    def mark(cls, kind, object_id):
+        cls.objects.bulk_create(
+            [cls(kind=kind, object_id=object_id, marked_at=timezone.now())],
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['marked_at'],
+        )
+
+
+class SkillDemand(models.Model):
+    """Quantidade de vagas ativas que exigem cada habilidade (mantida incrementalmente)."""
+    skill = models.CharField(max_length=100, unique=True)
+    job_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-job_count', 'skill']
+        indexes = [models.Index(fields=['-job_count', 'skill'], name='match_skilldemand_rank_idx')]
+        verbose_name = 'Demanda de Habilidade'
+        verbose_name_plural = 'Demanda de Habilidades'
+
+    def __str__(self):
+        return f"{self.skill} ({self.job_count})"
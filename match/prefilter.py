@@ -0,0 +1,151 @@
+"""
+Pre-filtro do calculo de match, executado no banco antes da pontuacao.
+
+Pares (candidato, vaga) que restricoes baratas ja tornam praticamente inuteis
+nem chegam ao Python: cada filtro vira uma clausula WHERE sobre as vagas (ao
+recalcular a linha de um candidato) ou uma coluna booleana na consulta do
+pool de candidatos (ao recalcular as colunas de vagas). Os filtros ativos vem
+de settings.MATCH_PREFILTERS (padrao so deadline; os demais sao opcionais
+porque tiram vagas das recomendacoes, nao so encurtam o calculo):
+
+- deadline: vagas com prazo de inscricao vencido;
+- onsite_state: vagas presenciais em outro estado que o do candidato;
+- salary: teto salarial da vaga (salary_max, ou salary_min * 1.5) vezes
+  MATCH_PREFILTER_SALARY_RATIO abaixo da pretensao do candidato.
+
+Cada funcao informa quantas linhas cada filtro removeu, na ordem em que sao
+aplicados (uma linha removida por um filtro nao conta para os seguintes).
+"""
+import re
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db.models import BooleanField, Count, ExpressionWrapper, Q
+from django.utils import timezone
+
+PREFILTERS = ('deadline', 'onsite_state', 'salary')
+DEFAULT_PREFILTERS = ('deadline',)
+
+_STATE_SUFFIX = r',\s*[A-Za-z]{2}\s*$'
+
+
+def enabled_prefilters():
+    return [name for name in getattr(settings, 'MATCH_PREFILTERS', DEFAULT_PREFILTERS) if name in PREFILTERS]
+
+
+def _salary_ratio():
+    return Decimal(str(getattr(settings, 'MATCH_PREFILTER_SALARY_RATIO', 1.5)))
+
+
+def job_state(location):
+    """UF no fim de um local no formato "Cidade, UF", ou '' se nao houver."""
+    match = re.search(r',\s*([A-Za-z]{2})\s*$', location or '')
+    return match.group(1).upper() if match else ''
+
+
+def job_ceiling(job):
+    if job.salary_max:
+        return job.salary_max
+    if job.salary_min:
+        return job.salary_min * Decimal('1.5')
+    return None
+
+
+def _job_exclusions(profile):
+    """Q sobre Job que cada filtro exclui para o candidato."""
+    exclusions = {}
+    for name in enabled_prefilters():
+        if name == 'deadline':
+            exclusions[name] = Q(deadline__lt=timezone.localdate())
+        elif name == 'onsite_state' and profile.state:
+            exclusions[name] = (
+                Q(work_mode='onsite', location__iregex=_STATE_SUFFIX)
+                & ~Q(location__iregex=rf',\s*{re.escape(profile.state)}\s*$')
+            )
+        elif name == 'salary' and profile.desired_salary:
+            limit = profile.desired_salary / _salary_ratio()
+            exclusions[name] = (
+                Q(salary_max__isnull=False, salary_max__lt=limit)
+                | Q(salary_max__isnull=True, salary_min__isnull=False,
+                    salary_min__lt=limit / Decimal('1.5'))
+            )
+    return exclusions
+
+
+def _candidate_exclusions(job):
+    """Q sobre User (candidatos) que cada filtro exclui para a vaga."""
+    exclusions = {}
+    for name in enabled_prefilters():
+        if name == 'deadline':
+            if job.deadline and job.deadline < timezone.localdate():
+                exclusions[name] = Q(pk__isnull=False)
+        elif name == 'onsite_state':
+            state = job_state(job.location)
+            if job.work_mode == 'onsite' and state:
+                exclusions[name] = Q(candidate_profile__state__gt='') & ~Q(candidate_profile__state=state)
+        elif name == 'salary':
+            ceiling = job_ceiling(job)
+            if ceiling is not None:
+                exclusions[name] = Q(candidate_profile__desired_salary__gt=ceiling * _salary_ratio())
+    return exclusions
+
+
+def _sequential(exclusions):
+    """Q de cada filtro restrita ao que os anteriores ainda nao removeram."""
+    previous = Q()
+    for name, q in exclusions.items():
+        yield name, q & ~previous if previous else q
+        previous |= q
+
+
+def prefilter_jobs(profile, jobs, with_counts=True):
+    """
+    Aplica o pre-filtro as vagas de um candidato.
+
+    Retorna (queryset filtrado, {filtro: vagas removidas}); a contagem custa
+    uma consulta de agregacao e pode ser dispensada com with_counts=False.
+    """
+    exclusions = _job_exclusions(profile)
+    if not exclusions:
+        return jobs, {}
+
+    removed = {}
+    if with_counts:
+        # Aliases prefixados: 'deadline' colidiria com o campo de mesmo nome
+        counts = jobs.aggregate(**{
+            f'removed_{name}': Count('pk', filter=q) for name, q in _sequential(exclusions)
+        })
+        removed = {name: counts[f'removed_{name}'] for name in exclusions}
+    combined = Q()
+    for q in exclusions.values():
+        combined |= q
+    return jobs.exclude(combined), removed
+
+
+def annotate_candidate_prefilters(candidates, jobs):
+    """
+    Anota no queryset de candidatos, para cada vaga e filtro, se o par e
+    removido (atributo `prefilter_<vaga>_<filtro>`), sem consultas extras.
+    """
+    annotations = {}
+    for job in jobs:
+        for name, q in _sequential(_candidate_exclusions(job)):
+            annotations[f'prefilter_{job.pk}_{name}'] = ExpressionWrapper(q, output_field=BooleanField())
+    return candidates.annotate(**annotations) if annotations else candidates
+
+
+def candidate_prefilter_mask(candidates, jobs):
+    """
+    Matriz booleana (vagas x candidatos) dos pares mantidos, a partir de um
+    queryset anotado por annotate_candidate_prefilters, e as remocoes por filtro.
+    """
+    keep = np.ones((len(jobs), len(candidates)), dtype=bool)
+    removed = {}
+    for row, job in enumerate(jobs):
+        for name in _candidate_exclusions(job):
+            attribute = f'prefilter_{job.pk}_{name}'
+            hits = np.array([bool(getattr(c, attribute, False)) for c in candidates], dtype=bool)
+            keep[row] &= ~hits
+            removed[name] = removed.get(name, 0) + int(hits.sum())
+    return keep, removed
@@ -0,0 +1,139 @@
+"""
+Retencao top-K da matriz de match.
+
+Com MATCH_RETENTION_TOP_K > 0, so ficam em MatchResult os pares que estao
+entre os K melhores scores do candidato ou entre os K melhores da vaga, alem
+de qualquer par com candidatura (Application). O restante (em geral scores
+abaixo do limiar de exibicao) nao e gravado, e o tamanho da tabela passa a
+crescer com (candidatos + vagas) x K em vez de candidatos x vagas.
+
+Os recalculos de linha e coluna aplicam a retencao ao eixo que recalculam
+(retain_top_k). Entrar no top-K de uma vaga pode empurrar outro candidato
+para fora dele; essas sobras, e as linhas de vagas inativas, sao removidas
+pela coleta periodica: a tarefa match.tasks.collect_match_garbage, agendada
+pelo worker de match e reagendada a cada MATCH_GC_INTERVAL segundos, ou o
+comando gc_match_results.
+"""
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+
+AXES = {'candidate': ('candidate_id', 'job_id'), 'job': ('job_id', 'candidate_id')}
+
+
+def retention_top_k():
+    return getattr(settings, 'MATCH_RETENTION_TOP_K', 0)
+
+
+def _kth_scores(field, ids, top_k):
+    """Score do K-esimo melhor par de cada id; ids com menos de K pares ficam de fora."""
+    from .models import MatchResult
+
+    ranked = MatchResult.objects.filter(**{f'{field}__in': ids}).annotate(rank=Window(
+        RowNumber(), partition_by=[F(field)], order_by=[F('score').desc(), F('pk').desc()],
+    )).filter(rank=top_k)
+    return dict(ranked.values_list(field, 'score'))
+
+
+def _applied_pairs(job_ids, candidate_ids):
+    from jobs.models import Application
+
+    return set(Application.objects.filter(
+        job_id__in=job_ids, candidate_id__in=candidate_ids
+    ).values_list('job_id', 'candidate_id'))
+
+
+def retain_top_k(results, axis, top_k=None):
+    """
+    Filtra MatchResult nao salvos que cobrem linhas ('candidate') ou colunas
+    ('job') inteiras da matriz e apaga do banco os pares descartados.
+
+    Um par e mantido se estiver no top-K do seu eixo (entre os `results`),
+    se alcancar o K-esimo score ja gravado do outro eixo ou se houver
+    candidatura. Retorna a lista mantida.
+    """
+    from .models import MatchResult
+
+    top_k = retention_top_k() if top_k is None else top_k
+    if not top_k or not results:
+        return results
+    field, other = AXES[axis]
+
+    by_key = {}
+    for result in results:
+        by_key.setdefault(getattr(result, field), []).append(result)
+    other_ids = {getattr(result, other) for result in results}
+    other_kth = _kth_scores(other, other_ids, top_k)
+    applied = _applied_pairs({r.job_id for r in results}, {r.candidate_id for r in results})
+
+    kept, dropped = [], Q()
+    for key, group in by_key.items():
+        group.sort(key=lambda r: r.score, reverse=True)
+        discarded = []
+        for rank, result in enumerate(group):
+            threshold = other_kth.get(getattr(result, other))
+            if (rank < top_k or threshold is None or result.score >= threshold
+                    or (result.job_id, result.candidate_id) in applied):
+                kept.append(result)
+            else:
+                discarded.append(getattr(result, other))
+        if discarded:
+            dropped |= Q(**{field: key, f'{other}__in': discarded})
+
+    if dropped:
+        MatchResult.objects.filter(dropped).delete()
+    return kept
+
+
+def without_applications(rows):
+    """Exclui de `rows` os pares com candidatura, que nunca sao apagados."""
+    from jobs.models import Application
+
+    return rows.exclude(Exists(Application.objects.filter(
+        job_id=OuterRef('job_id'), candidate_id=OuterRef('candidate_id')
+    )))
+
+
+def prune_match_results(rows=None, top_k=None, batch_size=1000):
+    """
+    Apaga, entre os `rows` (padrao: a tabela inteira), os pares fora do top-K
+    do candidato e do top-K da vaga e sem candidatura. Retorna quantos apagou.
+    """
+    from .models import MatchResult
+
+    top_k = retention_top_k() if top_k is None else top_k
+    if not top_k:
+        return 0
+    rows = MatchResult.objects.all() if rows is None else rows
+
+    candidate_kth = _kth_scores('candidate_id', rows.values('candidate_id'), top_k)
+    job_kth = _kth_scores('job_id', rows.values('job_id'), top_k)
+    if not candidate_kth or not job_kth:
+        return 0
+
+    candidates = without_applications(rows).values_list('pk', 'candidate_id', 'job_id', 'score')
+    stale = [
+        pk for pk, candidate_id, job_id, score in candidates.iterator(chunk_size=batch_size)
+        if score < candidate_kth.get(candidate_id, -1) and score < job_kth.get(job_id, -1)
+    ]
+
+    return delete_match_results(stale, batch_size)
+
+
+def delete_match_results(pks, batch_size=1000):
+    """Apaga os MatchResult pelos pks em lotes (limite de parametros do SQLite)."""
+    from .models import MatchResult
+
+    pks = list(pks)
+    deleted = 0
+    for start in range(0, len(pks), batch_size):
+        deleted += MatchResult.objects.filter(pk__in=pks[start:start + batch_size]).delete()[0]
+    return deleted
+
+
+def collect_match_garbage(top_k=None):
+    """Remove as linhas de vagas inativas e os pares fora da retencao top-K."""
+    from .models import MatchResult
+
+    inactive, _ = MatchResult.objects.filter(job__is_active=False).delete()
+    return {'inactive_jobs': inactive, 'outside_top_k': prune_match_results(top_k=top_k)}
@@ -0,0 +1,91 @@
+"""
+Cache de scores de match (candidato, vaga).
+
+A chave inclui a revisao do perfil do candidato, o updated_at da vaga e as
+versoes do espaco de habilidades e da tabela de cidades, entao qualquer
+alteracao relevante gera uma chave nova e entradas antigas simplesmente deixam de ser usadas. O nivel
+local e um LRU limitado por processo; opcionalmente um cache compartilhado do
+Django (MATCH_SCORE_CACHE_ALIAS) serve de segundo nivel entre os workers.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class MatchScoreCache:
+    """LRU em memoria com contadores de acerto/erro e segundo nivel opcional."""
+
+    def __init__(self, maxsize=10000, shared_alias=None, shared_timeout=3600):
+        self.maxsize = maxsize
+        self.shared_alias = shared_alias
+        self.shared_timeout = shared_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.shared is not None:
+            value = self.shared.get(self._shared_key(key))
+            if value is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                self._store_local(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self._store_local(key, value)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key), value, self.shared_timeout)
+
+    def _store_local(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _shared_key(key):
+        return 'match_score:' + ':'.join(str(part) for part in key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
+
+
+score_cache = MatchScoreCache(
+    maxsize=getattr(settings, 'MATCH_SCORE_CACHE_SIZE', 10000),
+    shared_alias=getattr(settings, 'MATCH_SCORE_CACHE_ALIAS', None),
+    shared_timeout=getattr(settings, 'MATCH_SCORE_CACHE_TIMEOUT', 3600),
+)
@@ -0,0 +1,73 @@
+"""Mantem os indices de match coerentes com as escritas em vagas e perfis."""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import CandidateProfile, City
+from jobs.models import Job
+
+
+def _mark_dirty(kind, object_id):
+    from .models import DirtyMatch
+    from .tasks import DRAIN_DEDUP_KEY, drain_match_queue
+    from .utils import process_dirty_matches
+
+    DirtyMatch.mark(kind, object_id)
+    if getattr(settings, 'MATCH_REFRESH_INLINE', False):
+        transaction.on_commit(process_dirty_matches)
+    else:
+        # Uma unica tarefa na fila drena todas as marcacoes (ver taskqueue)
+        drain_match_queue.enqueue(dedup_key=DRAIN_DEDUP_KEY)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def job_changed(sender, instance, **kwargs):
+    from .skill_space import bump_skill_space_version
+    bump_skill_space_version()
+
+
+@receiver(pre_save, sender=Job)
+def job_about_to_save(sender, instance, raw=False, **kwargs):
+    from .skill_demand import demand_skills
+
+    previous = None
+    if instance.pk and not raw:
+        previous = Job.objects.filter(pk=instance.pk).values('requirements', 'is_active').first()
+    instance._previous_demand = demand_skills(**previous) if previous else set()
+
+
+@receiver(post_save, sender=Job)
+def job_saved(sender, instance, raw=False, **kwargs):
+    from .skill_demand import apply_demand_change, demand_skills
+
+    if raw:
+        return
+    apply_demand_change(
+        getattr(instance, '_previous_demand', set()),
+        demand_skills(instance.requirements, instance.is_active),
+    )
+    _mark_dirty('job', instance.pk)
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    from .skill_demand import apply_demand_change, demand_skills
+    apply_demand_change(demand_skills(instance.requirements, instance.is_active), set())
+
+
+@receiver(post_save, sender=CandidateProfile)
+def candidate_profile_saved(sender, instance, raw=False, **kwargs):
+    from .ann import bump_candidate_vectors_version
+
+    if not raw:
+        bump_candidate_vectors_version()
+        _mark_dirty('candidate', instance.user_id)
+
+
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def city_changed(sender, instance, **kwargs):
+    from .locations import bump_cities_version
+    bump_cities_version()
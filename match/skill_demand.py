@@ -0,0 +1,54 @@
+"""
+Tabela materializada de demanda de habilidades (SkillDemand).
+
+Cada linha conta quantas vagas ativas exigem a habilidade. Os contadores sao
+ajustados por delta a cada criacao, edicao, desativacao ou exclusao de vaga,
+entao get_skill_gaps vira uma unica consulta indexada.
+"""
+from django.db.models import F
+
+
+def demand_skills(requirements, is_active):
+    """Conjunto de habilidades que uma vaga contribui para a demanda."""
+    if not is_active or not requirements:
+        return set()
+    return {r.strip().lower()[:100] for r in requirements.split(',') if r.strip()}
+
+
+def apply_demand_change(old_skills, new_skills):
+    """Incrementa as habilidades adicionadas e decrementa as removidas."""
+    from .models import SkillDemand
+
+    added = new_skills - old_skills
+    removed = old_skills - new_skills
+
+    if added:
+        SkillDemand.objects.bulk_create(
+            [SkillDemand(skill=skill, job_count=0) for skill in added],
+            ignore_conflicts=True,
+        )
+        SkillDemand.objects.filter(skill__in=added).update(job_count=F('job_count') + 1)
+
+    if removed:
+        SkillDemand.objects.filter(skill__in=removed, job_count__gt=0).update(job_count=F('job_count') - 1)
+        SkillDemand.objects.filter(skill__in=removed, job_count=0).delete()
+
+
+def rebuild_skill_demand():
+    """Recalcula a tabela inteira a partir das vagas ativas."""
+    from collections import Counter
+    from django.db import transaction
+    from jobs.models import Job
+    from .models import SkillDemand
+
+    counts = Counter()
+    for requirements in Job.objects.filter(is_active=True).values_list('requirements', flat=True).iterator():
+        counts.update(demand_skills(requirements, True))
+
+    with transaction.atomic():
+        SkillDemand.objects.all().delete()
+        SkillDemand.objects.bulk_create(
+            [SkillDemand(skill=skill, job_count=count) for skill, count in counts.items()],
+            batch_size=1000,
+        )
+    return len(counts)
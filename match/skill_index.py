@@ -0,0 +1,66 @@
+"""
+Recuperacao de candidatos por habilidade.
+
+Usa a relacao CandidateProfile.canonical_skills como indice invertido
+(habilidade -> candidato): a recuperacao de candidatos para uma vaga pontua
+apenas quem compartilha ao menos uma das habilidades exigidas, em vez de
+varrer todos os candidatos. Em bases grandes (mais de
+MATCH_ANN_MIN_CANDIDATES perfis) o shortlist aproximado de match.ann
+substitui o indice invertido.
+"""
+from django.conf import settings
+
+
+def candidate_ids_for_skills(skill_ids):
+    """Subquery com os IDs dos candidatos que possuem alguma das habilidades."""
+    from accounts.models import CandidateProfile
+
+    return CandidateProfile.canonical_skills.through.objects.filter(
+        canonicalskill_id__in=skill_ids
+    ).values('candidateprofile__user_id').distinct()
+
+
+def get_candidate_pool_for_job(job):
+    """
+    Candidatos que valem ser pontuados para a vaga: os que compartilham ao
+    menos uma habilidade exigida, ou os vizinhos mais proximos no indice ANN
+    quando a base e grande. Vagas sem requisitos consideram todos.
+    """
+    return get_candidate_pool_for_jobs([job])
+
+
+def get_candidate_pool_for_jobs(jobs):
+    """Uniao dos pools de varias vagas, carregada em uma unica consulta."""
+    return resolve_candidate_pool(jobs)[0]
+
+
+def resolve_candidate_pool(jobs):
+    """
+    Como get_candidate_pool_for_jobs, mas retorna (pool, exato): exato e falso
+    quando o pool veio do shortlist ANN, que e aproximado e limitado, e por
+    isso nao serve para decidir quem saiu do pool.
+    """
+    from accounts.models import User
+    from jobs.models import Job
+    from .ann import get_candidate_index
+
+    candidates = User.objects.filter(
+        user_type='candidate',
+        candidate_profile__isnull=False
+    ).select_related('candidate_profile')
+
+    skills_by_job = {job.pk: set() for job in jobs}
+    for job_id, skill_id in Job.canonical_skills.through.objects.filter(
+        job_id__in=skills_by_job
+    ).values_list('job_id', 'canonicalskill_id'):
+        skills_by_job[job_id].add(skill_id)
+    if not all(skills_by_job.values()):
+        return candidates, True
+
+    min_candidates = getattr(settings, 'MATCH_ANN_MIN_CANDIDATES', 5000)
+    if min_candidates is not None:
+        index = get_candidate_index()
+        if len(index) > min_candidates:
+            shortlist = {pk for job in jobs for pk in index.query(job.requirements)}
+            return candidates.filter(pk__in=shortlist), False
+    return candidates.filter(pk__in=candidate_ids_for_skills(set().union(*skills_by_job.values()))), True
@@ -0,0 +1,194 @@
+"""
+Espaco vetorial de habilidades compartilhado pelo calculo de match.
+
+O vocabulario e os pesos IDF sao ajustados uma unica vez sobre os requisitos
+das vagas ativas e as habilidades dos candidatos. O vetor de cada vaga ativa
+fica pre-calculado, de modo que o score TF-IDF vira um produto escalar esparso
+em vez de um TfidfVectorizer novo por par (candidato, vaga).
+"""
+import math
+import time
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+SKILL_SPACE_INDEX = 'skill_space'
+
+_space = None
+_checked_at = 0.0
+
+
+class SkillVectorSpace:
+    """Vocabulario/IDF versionado com a matriz TF-IDF das vagas ativas."""
+
+    def __init__(self, version, vectorizer=None, job_ids=None, job_matrix=None, n_documents=0):
+        self.version = version
+        self.vectorizer = vectorizer
+        self.job_ids = np.asarray(job_ids if job_ids is not None else [], dtype=np.int64)
+        self.job_rows = {int(job_id): row for row, job_id in enumerate(self.job_ids)}
+        self.job_matrix = job_matrix
+        self.n_documents = n_documents
+        # Preenchidos quando o espaco vem do indice em disco (ver index_store)
+        self.path = None
+        self.snapshot = None
+        # Termos fora do vocabulario recebem o IDF de um termo com df=0
+        self.oov_idf = math.log(1 + n_documents) + 1.0
+
+        if vectorizer is not None:
+            self.vocabulary = vectorizer.vocabulary_
+            self.idf = vectorizer.idf_
+            self._analyzer = vectorizer.build_analyzer()
+        else:
+            self.vocabulary = {}
+            self.idf = np.zeros(0)
+            self._analyzer = TfidfVectorizer(lowercase=True).build_analyzer()
+
+    @classmethod
+    def build(cls, version):
+        from accounts.models import CandidateProfile
+        from jobs.models import Job
+
+        jobs = list(
+            Job.objects.filter(is_active=True)
+            .exclude(requirements='')
+            .values_list('id', 'requirements')
+        )
+        candidate_skills = list(
+            CandidateProfile.objects.exclude(skills='').values_list('skills', flat=True)
+        )
+        corpus = [requirements for _, requirements in jobs] + candidate_skills
+
+        vectorizer = TfidfVectorizer(lowercase=True, stop_words=None)
+        try:
+            vectorizer.fit(corpus)
+        except ValueError:
+            # Vocabulario vazio (sem vagas nem habilidades cadastradas)
+            return cls(version, n_documents=len(corpus))
+
+        if jobs:
+            job_matrix = vectorizer.transform([requirements for _, requirements in jobs]).tocsr()
+        else:
+            job_matrix = sparse.csr_matrix((0, len(vectorizer.vocabulary_)))
+        return cls(
+            version,
+            vectorizer=vectorizer,
+            job_ids=[job_id for job_id, _ in jobs],
+            job_matrix=job_matrix,
+            n_documents=len(corpus),
+        )
+
+    def _weights(self, text):
+        """Pesos TF-IDF de um texto: (indices, pesos, termos fora do vocabulario)."""
+        counts = Counter(self._analyzer(text or ''))
+        indices, weights, oov = [], [], {}
+        for token, tf in counts.items():
+            index = self.vocabulary.get(token)
+            if index is None:
+                oov[token] = tf * self.oov_idf
+            else:
+                indices.append(index)
+                weights.append(tf * self.idf[index])
+        norm = math.sqrt(sum(w * w for w in weights) + sum(w * w for w in oov.values()))
+        if norm:
+            weights = [w / norm for w in weights]
+            oov = {token: w / norm for token, w in oov.items()}
+        return indices, weights, oov
+
+    def transform(self, text):
+        """Vetor (1 x V) normalizado de um texto livre de habilidades."""
+        indices, weights, _ = self._weights(text)
+        return sparse.csr_matrix(
+            (weights, ([0] * len(indices), indices)),
+            shape=(1, len(self.vocabulary)),
+        )
+
+    def similarity(self, candidate_text, job):
+        """Similaridade de cosseno entre as habilidades do candidato e a vaga."""
+        row = self.job_rows.get(job.pk) if job.pk else None
+        return self._similarity(candidate_text, job.requirements, row)
+
+    def _similarity(self, candidate_text, job_text, row):
+        if not candidate_text or not job_text:
+            return 0.0
+
+        cand_indices, cand_weights, cand_oov = self._weights(candidate_text)
+
+        if row is not None:
+            job_vector = self.job_matrix.getrow(row)
+            job_weights = dict(zip(job_vector.indices, job_vector.data))
+            job_oov = {}
+        else:
+            # Vaga fora do indice (inativa ou ainda nao salva)
+            job_indices, weights, job_oov = self._weights(job_text)
+            job_weights = dict(zip(job_indices, weights))
+
+        score = sum(w * job_weights.get(i, 0.0) for i, w in zip(cand_indices, cand_weights))
+        score += sum(w * job_oov.get(token, 0.0) for token, w in cand_oov.items())
+        return float(min(score, 1.0))
+
+    def similarity_matrix(self, job_rows, job_texts, candidate_texts):
+        """
+        Matriz (vagas x candidatos) de similaridades em um unico produto esparso.
+
+        `job_rows` traz a linha de cada vaga em job_matrix (-1 para vagas fora
+        do indice, calculadas a partir de `job_texts`).
+        """
+        job_rows = np.asarray(job_rows, dtype=np.int64)
+        scores = np.zeros((len(job_rows), len(candidate_texts)))
+        if not len(job_rows) or not candidate_texts:
+            return scores
+
+        indexed = np.flatnonzero(job_rows >= 0)
+        if len(indexed):
+            candidate_matrix = sparse.vstack([self.transform(text) for text in candidate_texts]).tocsr()
+            matrix = self.job_matrix[job_rows[indexed]]
+            scores[indexed] = (matrix @ candidate_matrix.T).toarray()
+
+        for i in np.flatnonzero(job_rows < 0):
+            scores[i] = [self._similarity(text, job_texts[i], None) for text in candidate_texts]
+        return np.minimum(scores, 1.0)
+
+
+def get_skill_space(force_check=False):
+    """
+    Retorna o espaco vetorial atual, reconstruindo-o quando a versao muda.
+
+    A versao no banco e consultada no maximo a cada MATCH_INDEX_VERSION_TTL
+    segundos, a menos que force_check seja passado. Com MATCH_INDEX_DIR
+    configurado, o espaco e lido (mapeado em memoria) do indice publicado em
+    disco, que o primeiro processo a notar a nova versao grava.
+    """
+    global _space, _checked_at
+    from .models import MatchIndexVersion
+
+    ttl = getattr(settings, 'MATCH_INDEX_VERSION_TTL', 5)
+    now = time.monotonic()
+    if _space is not None and not force_check and now - _checked_at < ttl:
+        return _space
+
+    version = MatchIndexVersion.current(SKILL_SPACE_INDEX)
+    if getattr(settings, 'MATCH_INDEX_DIR', None):
+        # Importado so com o indice em disco configurado (usa fcntl, ausente no Windows)
+        from . import index_store
+        if _space is None or _space.version != version or _space.path is None:
+            _space = index_store.load_or_publish(version)
+    elif _space is None or _space.version != version:
+        _space = SkillVectorSpace.build(version)
+    _checked_at = now
+    return _space
+
+
+def invalidate_skill_space():
+    global _space
+    _space = None
+
+
+def bump_skill_space_version():
+    """Marca o espaco como desatualizado para todos os processos."""
+    from .models import MatchIndexVersion
+
+    MatchIndexVersion.bump(SKILL_SPACE_INDEX)
+    invalidate_skill_space()
@@ -0,0 +1,36 @@
+from django.conf import settings
+
+from taskqueue.registry import task
+
+DRAIN_DEDUP_KEY = 'match:drain-dirty'
+GC_DEDUP_KEY = 'match:gc'
+
+
+def schedule_match_gc():
+    """Garante uma coleta de lixo da matriz agendada para daqui a MATCH_GC_INTERVAL segundos."""
+    interval = getattr(settings, 'MATCH_GC_INTERVAL', 3600)
+    if interval:
+        collect_match_garbage.enqueue(dedup_key=GC_DEDUP_KEY, delay=interval)
+
+
+@task()
+def drain_match_queue(batch_size=100):
+    """
+    Recalcula um lote de matches pendentes (DirtyMatch); com o lote cheio,
+    agenda a continuacao em vez de prender o worker ate esvaziar a fila.
+    """
+    from .utils import process_dirty_matches
+
+    if process_dirty_matches(limit=batch_size) >= batch_size:
+        drain_match_queue.enqueue(batch_size, dedup_key=DRAIN_DEDUP_KEY)
+    # Recalculos deixam sobras fora do top-K; a coleta periodica as remove
+    schedule_match_gc()
+
+
+@task()
+def collect_match_garbage():
+    """Remove linhas de vagas inativas e pares fora do top-K (ver retention) e se reagenda."""
+    from .retention import collect_match_garbage as collect
+
+    collect()
+    schedule_match_gc()
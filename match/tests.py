@@ -1,3 +1,892 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+import json
+import os
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CandidateProfile, CanonicalSkill, City, CompanyProfile
+from jobs.filters import JobFilter
+from jobs.models import Job
+import match
+
+from . import ann, index_store, locations, skill_space
+from .job_snapshot import get_job_snapshot
+from .models import DirtyMatch, MatchIndexVersion, MatchResult, SkillDemand
+from .prefilter import prefilter_jobs
+from .skill_demand import rebuild_skill_demand
+from .score_cache import MatchScoreCache, score_cache
+from .skill_index import get_candidate_pool_for_job
+from .utils import (
+    calculate_location_score, calculate_match_score, calculate_skills_score, get_cached_match_score,
+    get_recommended_candidates_for_job, get_recommended_candidates_for_jobs,
+    get_recommended_jobs_for_candidate, get_skill_gaps, process_dirty_matches, refresh_candidate_matches,
+    refresh_job_matches, save_match_results,
+    score_candidate_against_jobs, score_jobs_against_candidates,
+)
+
+User = get_user_model()
+
+
+class MatchFixturesMixin:
+    def create_company(self, username='empresa'):
+        company = User.objects.create_user(
+            username=username, email=f'{username}@example.com', password='x',
+            user_type='company', email_verified=True,
+        )
+        CompanyProfile.objects.create(
+            user=company, company_name=username.title(), verification_status='approved',
+        )
+        return company
+
+    def create_candidate(self, username='candidato', skills='python, django', **profile):
+        candidate = User.objects.create_user(
+            username=username, email=f'{username}@example.com', password='x',
+            user_type='candidate', email_verified=True,
+        )
+        CandidateProfile.objects.create(user=candidate, skills=skills, **profile)
+        return User.objects.select_related('candidate_profile').get(pk=candidate.pk)
+
+    def create_job(self, company, title='Dev Python', requirements='python, django', **fields):
+        fields.setdefault('description', 'Vaga de teste')
+        fields.setdefault('location', 'Sao Paulo, SP')
+        return Job.objects.create(company=company, title=title, requirements=requirements, **fields)
+
+
+class SkillSpaceTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+
+    def test_identical_skills_score_one(self):
+        candidate = self.create_candidate(skills='python, django')
+        job = self.create_job(self.company, requirements='python, django')
+        self.create_job(self.company, title='Frontend', requirements='react, javascript')
+
+        score = calculate_skills_score(candidate.candidate_profile, job)
+        self.assertAlmostEqual(score, 1.0, places=6)
+
+    def test_vectorizer_fitted_once_for_many_pairs(self):
+        candidate = self.create_candidate(skills='python, sql')
+        jobs = [self.create_job(self.company, title=f'Vaga {i}', requirements='python, docker')
+                for i in range(5)]
+
+        with mock.patch.object(skill_space.SkillVectorSpace, 'build',
+                               wraps=skill_space.SkillVectorSpace.build) as build:
+            for job in jobs:
+                calculate_match_score(candidate, job)
+        self.assertEqual(build.call_count, 1)
+
+    def test_job_write_bumps_version(self):
+        job = self.create_job(self.company, requirements='python')
+        version = skill_space.get_skill_space().version
+
+        job.requirements = 'python, aws'
+        job.save()
+
+        space = skill_space.get_skill_space()
+        self.assertGreater(space.version, version)
+        self.assertIn('aws', space.vocabulary)
+
+    def test_inactive_job_scored_outside_index(self):
+        candidate = self.create_candidate(skills='rust, go')
+        job = self.create_job(self.company, requirements='rust, go', is_active=False)
+
+        space = skill_space.get_skill_space()
+        self.assertNotIn(job.pk, space.job_rows)
+        self.assertAlmostEqual(space.similarity(candidate.candidate_profile.skills, job), 1.0, places=6)
+
+
+class BatchScoringTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.jobs = [
+            self.create_job(self.company, requirements='python, django, sql', experience_years=3,
+                            salary_min=Decimal('4000'), salary_max=Decimal('6000')),
+            self.create_job(self.company, requirements='react, javascript', work_mode='remote',
+                            experience_years=0),
+            self.create_job(self.company, requirements='python, aws', work_mode='hybrid',
+                            location='Rio de Janeiro, RJ', experience_years=10,
+                            salary_min=Decimal('3000')),
+            self.create_job(self.company, requirements='go', location='Campinas, SP',
+                            experience_years=5, salary_max=Decimal('9000')),
+            self.create_job(self.company, requirements='', location='', experience_years=2),
+            self.create_job(self.company, requirements='python, kotlin', is_active=False,
+                            salary_min=Decimal('1000'), salary_max=Decimal('2000')),
+        ]
+
+    def assert_matches_scalar(self, candidate):
+        batch = score_candidate_against_jobs(candidate, self.jobs)
+        for job, score in zip(self.jobs, batch['total']):
+            self.assertAlmostEqual(float(score), calculate_match_score(candidate, job), places=4)
+
+    def test_batch_matches_scalar_path(self):
+        self.assert_matches_scalar(self.create_candidate(
+            skills='python, django, docker', experience_years=4,
+            desired_salary=Decimal('5500'), city='Sao Paulo', state='SP',
+        ))
+
+    def test_batch_matches_scalar_without_optional_fields(self):
+        self.assert_matches_scalar(self.create_candidate(username='vazio', skills=''))
+        self.assert_matches_scalar(self.create_candidate(
+            username='caro', skills='go, rust', experience_years=1, desired_salary=Decimal('20000'),
+        ))
+
+    def test_matrix_matches_scalar_path(self):
+        candidates = [
+            self.create_candidate(username='pleno', skills='python, django', experience_years=3,
+                                  desired_salary=Decimal('5000'), city='Sao Paulo', state='SP'),
+            self.create_candidate(username='front', skills='react, css', location='Rio de Janeiro, RJ'),
+            User.objects.create_user(username='semperfil2', password='x'),
+        ]
+        matrix = score_jobs_against_candidates(self.jobs, candidates)['total']
+        self.assertEqual(matrix.shape, (len(self.jobs), len(candidates)))
+        for row, job in enumerate(self.jobs):
+            for column, candidate in enumerate(candidates):
+                self.assertAlmostEqual(float(matrix[row, column]),
+                                       calculate_match_score(candidate, job), places=4)
+
+    def test_candidate_without_profile_scores_zero(self):
+        user = User.objects.create_user(username='semperfil', password='x')
+        self.assertEqual(score_candidate_against_jobs(user, self.jobs)['total'].tolist(),
+                         [0.0] * len(self.jobs))
+
+
+class LocationScoringTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        locations.invalidate_city_table()
+        call_command('seed_cities', stdout=StringIO())
+        self.company = self.create_company()
+        self.candidate = self.create_candidate(city='Campinas', state='SP')
+
+    def test_locations_resolve_to_canonical_cities(self):
+        sao_paulo = City.objects.get(key='sao paulo', state='SP')
+        job = self.create_job(self.company, location='São Paulo - SP')
+        self.assertEqual(job.canonical_city, sao_paulo)
+        self.assertIsNone(self.create_job(self.company, location='Remoto').canonical_city)
+
+        profile = self.candidate.candidate_profile
+        profile.location, profile.city = 'sao paulo, sp', ''
+        profile.save(update_fields=['location', 'city'])
+        self.assertEqual(CandidateProfile.objects.get(pk=profile.pk).canonical_city, sao_paulo)
+
+        # Cidade fora da tabela nao e criada nem muda a versao da tabela de distancias
+        version = MatchIndexVersion.current(locations.CITIES_INDEX)
+        job = self.create_job(self.company, location='Paulinia, SP')
+        self.assertIsNone(job.canonical_city)
+        self.assertFalse(City.objects.filter(key='paulinia').exists())
+        self.assertEqual(MatchIndexVersion.current(locations.CITIES_INDEX), version)
+
+    def test_reseeding_unchanged_cities_keeps_table_version(self):
+        version = MatchIndexVersion.current(locations.CITIES_INDEX)
+        out = StringIO()
+        call_command('seed_cities', stdout=out)
+        self.assertIn('0 created, 0 updated', out.getvalue())
+        self.assertEqual(MatchIndexVersion.current(locations.CITIES_INDEX), version)
+
+        City.objects.filter(key='campinas').update(latitude=0)
+        call_command('seed_cities', stdout=StringIO())
+        self.assertEqual(MatchIndexVersion.current(locations.CITIES_INDEX), version + 1)
+
+    def test_seed_resolves_rows_saved_before_their_city(self):
+        City.objects.filter(key='campinas').delete()
+        job = self.create_job(self.company, location='Campinas, SP')
+        profile = CandidateProfile.objects.get(pk=self.candidate.candidate_profile.pk)
+        self.assertIsNone(job.canonical_city_id)
+        self.assertIsNone(profile.canonical_city_id)
+
+        call_command('seed_cities', stdout=StringIO())
+        campinas = City.objects.get(key='campinas', state='SP')
+        job.refresh_from_db()
+        profile.refresh_from_db()
+        self.assertEqual(job.canonical_city, campinas)
+        self.assertEqual(profile.canonical_city, campinas)
+
+    def test_scores_follow_distance_table(self):
+        jobs = [
+            self.create_job(self.company, title='Mesma cidade', location='Campinas, SP'),
+            self.create_job(self.company, title='Regiao', location='Sao Paulo, SP'),
+            self.create_job(self.company, title='Longe', location='Rio de Janeiro, RJ'),
+            self.create_job(self.company, title='Hibrida longe', location='Rio de Janeiro, RJ', work_mode='hybrid'),
+            self.create_job(self.company, title='Remota', location='Recife, PE', work_mode='remote'),
+        ]
+        profile = self.candidate.candidate_profile
+        expected = [1.0, 0.8, 0.3, 0.5, 1.0]
+        self.assertEqual([calculate_location_score(profile, job) for job in jobs], expected)
+        self.assertEqual(score_candidate_against_jobs(self.candidate, jobs)['location'].tolist(), expected)
+
+        with override_settings(MATCH_LOCATION_RADIUS_KM=50):
+            self.assertEqual(calculate_location_score(profile, jobs[1]), 0.3)
+
+    def test_job_filter_within_radius(self):
+        near = self.create_job(self.company, title='Perto', location='Sao Paulo, SP')
+        self.create_job(self.company, title='Longe', location='Rio de Janeiro, RJ')
+        jobs = Job.objects.all()
+
+        nearby = JobFilter({'location': 'Campinas, SP', 'radius_km': 100}, queryset=jobs).qs
+        self.assertEqual(list(nearby), [near])
+        self.assertFalse(JobFilter({'location': 'Campinas, SP'}, queryset=jobs).qs.exists())
+
+
+class JobSnapshotTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.job = self.create_job(self.company, requirements='python, sql', salary_min=Decimal('3000'))
+        self.create_job(self.company, title='Inativa', is_active=False)
+        self.candidate = self.create_candidate(skills='python')
+
+    def test_snapshot_holds_active_job_columns(self):
+        snapshot = get_job_snapshot(force_check=True)
+        self.assertEqual(snapshot.ids.tolist(), [self.job.pk])
+        self.assertEqual(snapshot.salary_min.tolist(), [3000.0])
+        self.assertEqual(snapshot.requirements_of(0), ['python', 'sql'])
+
+    def test_job_writes_invalidate_snapshot(self):
+        snapshot = get_job_snapshot(force_check=True)
+        self.assertIs(get_job_snapshot(), snapshot)
+
+        other = self.create_job(self.company, title='Nova', requirements='go')
+        rebuilt = get_job_snapshot(force_check=True)
+        self.assertIsNot(rebuilt, snapshot)
+        self.assertIn(other.pk, rebuilt.ids.tolist())
+
+    def test_row_refresh_does_not_load_job_instances(self):
+        get_job_snapshot(force_check=True)
+        with mock.patch.object(Job, 'from_db', side_effect=AssertionError('Job instanciado')):
+            refresh_candidate_matches(self.candidate)
+        result = MatchResult.objects.get(candidate=self.candidate)
+        self.assertEqual(result.job_id, self.job.pk)
+        self.assertEqual(result.missing_skills, 'sql')
+
+
+class MatchIndexStoreTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(skill_space.invalidate_skill_space)
+        self.company = self.create_company()
+        self.job = self.create_job(self.company, requirements='python, sql, docker', salary_min=Decimal('3000'))
+        self.candidate = self.create_candidate(skills='python, docker')
+
+    def test_published_index_is_memory_mapped(self):
+        expected = calculate_match_score(self.candidate, self.job)
+        with override_settings(MATCH_INDEX_DIR=self.directory):
+            skill_space.invalidate_skill_space()
+            space = skill_space.get_skill_space(force_check=True)
+            snapshot = get_job_snapshot()
+
+            self.assertEqual(space.path, index_store.published_path())
+            self.assertIs(snapshot, space.snapshot)
+            self.assertIsInstance(snapshot.ids, numpy.memmap)
+            self.assertFalse(space.job_matrix.data.flags.owndata)
+            self.assertEqual(snapshot.requirements_of(0), ['python', 'sql', 'docker'])
+            self.assertAlmostEqual(calculate_match_score(self.candidate, self.job), expected, places=6)
+
+            refresh_candidate_matches(self.candidate)
+        result = MatchResult.objects.get(candidate=self.candidate)
+        self.assertEqual(result.missing_skills, 'sql')
+
+    def test_new_version_swaps_pointer_and_prunes(self):
+        with override_settings(MATCH_INDEX_DIR=self.directory):
+            first = skill_space.get_skill_space(force_check=True).path
+            for i in range(3):
+                self.create_job(self.company, title=f'Nova {i}', requirements='go')
+                skill_space.get_skill_space(force_check=True)
+
+            current = index_store.published_path()
+            self.assertNotEqual(current, first)
+            self.assertEqual(len(get_job_snapshot()), 4)
+            versions = [name for name in os.listdir(self.directory) if name.startswith('v')]
+            self.assertEqual(len(versions), 2)
+            self.assertIn(current.name, versions)
+
+    def test_works_without_fcntl(self):
+        expected = calculate_match_score(self.candidate, self.job)
+        # Como no Windows: sem fcntl e sem index_store importado de antemao
+        with mock.patch.dict(sys.modules, {'fcntl': None}), mock.patch.dict(match.__dict__):
+            del sys.modules['match.index_store'], match.index_store
+            skill_space.invalidate_skill_space()
+            self.assertAlmostEqual(calculate_match_score(self.candidate, self.job), expected, places=6)
+            with override_settings(MATCH_INDEX_DIR=self.directory):
+                skill_space.invalidate_skill_space()
+                self.assertIsNotNone(skill_space.get_skill_space(force_check=True).path)
+
+    def test_command_publishes_once_per_version(self):
+        out = StringIO()
+        call_command('build_match_index', dir=self.directory, stdout=out)
+        call_command('build_match_index', dir=self.directory, stdout=out)
+        self.assertIn('published', out.getvalue())
+        self.assertIn('already at version', out.getvalue())
+
+        space = index_store.load_match_index(index_store.published_path(self.directory))
+        self.assertEqual(space.snapshot.ids.tolist(), [self.job.pk])
+
+
+class MatchPersistenceTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.jobs = [self.create_job(self.company, title=f'Vaga {i}', requirements='python, sql')
+                     for i in range(3)]
+        self.candidate = self.create_candidate(skills='python')
+
+    def test_recommendations_upsert_all_pairs(self):
+        get_recommended_jobs_for_candidate(self.candidate)
+        self.assertEqual(MatchResult.objects.filter(candidate=self.candidate).count(), 3)
+
+        get_recommended_candidates_for_job(self.jobs[0])
+        self.assertEqual(MatchResult.objects.count(), 3)
+
+    def test_unchanged_rows_are_skipped(self):
+        rows = [MatchResult(candidate=self.candidate, job=job, score=0.5,
+                            matched_skills='python', missing_skills='sql') for job in self.jobs]
+        self.assertEqual(save_match_results(rows), 3)
+
+        rows = [MatchResult(candidate=self.candidate, job=job, score=0.5,
+                            matched_skills='python', missing_skills='sql') for job in self.jobs]
+        rows[1].score = 0.9
+        with self.assertNumQueries(2):
+            self.assertEqual(save_match_results(rows), 1)
+        self.assertEqual(MatchResult.objects.get(job=self.jobs[1]).score, 0.9)
+
+
+class MatchRetentionTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.jobs = [
+            self.create_job(self.company, title='Python', requirements='python'),
+            self.create_job(self.company, title='Dados', requirements='python, sql'),
+            self.create_job(self.company, title='Java', requirements='java, spring'),
+        ]
+        self.strong = self.create_candidate('forte', skills='python, sql, java, spring')
+        self.weak = self.create_candidate('fraco', skills='python')
+
+    def job_ids(self, candidate):
+        return set(MatchResult.objects.filter(candidate=candidate).values_list('job_id', flat=True))
+
+    @override_settings(MATCH_RETENTION_TOP_K=1)
+    def test_row_refresh_keeps_top_k_and_applications(self):
+        from jobs.models import Application
+
+        refresh_candidate_matches(self.strong)
+        self.assertEqual(self.job_ids(self.strong), {job.pk for job in self.jobs})
+
+        Application.objects.create(job=self.jobs[2], candidate=self.weak)
+        refresh_candidate_matches(self.weak)
+        self.assertEqual(self.job_ids(self.weak), {self.jobs[0].pk, self.jobs[2].pk})
+
+    @override_settings(MATCH_RETENTION_TOP_K=0)
+    def test_gc_removes_inactive_jobs_and_pairs_outside_top_k(self):
+        refresh_candidate_matches(self.strong)
+        refresh_candidate_matches(self.weak)
+        self.assertEqual(MatchResult.objects.count(), 6)
+        Job.objects.filter(pk=self.jobs[1].pk).update(is_active=False)
+
+        out = StringIO()
+        call_command('gc_match_results', top_k=1, stdout=out)
+        self.assertIn('Removed 2 rows of inactive jobs and 2 rows outside the top 1', out.getvalue())
+        # "fraco" e o melhor par da vaga Python; "forte", o da vaga Java
+        self.assertEqual(self.job_ids(self.strong), {self.jobs[2].pk})
+        self.assertEqual(self.job_ids(self.weak), {self.jobs[0].pk})
+
+    @override_settings(MATCH_GC_INTERVAL=600)
+    def test_worker_schedules_recurring_gc(self):
+        from taskqueue.models import Task
+        from .tasks import GC_DEDUP_KEY, collect_match_garbage, drain_match_queue
+
+        refresh_candidate_matches(self.strong)
+        Job.objects.filter(pk=self.jobs[1].pk).update(is_active=False)
+        drain_match_queue()
+        drain_match_queue()
+        gc = Task.objects.get(dedup_key=GC_DEDUP_KEY, status='queued')
+        self.assertGreater(gc.run_at, timezone.now() + datetime.timedelta(seconds=500))
+
+        Task.objects.filter(pk=gc.pk).update(status='done')
+        collect_match_garbage()
+        self.assertFalse(MatchResult.objects.filter(job=self.jobs[1]).exists())
+        self.assertTrue(Task.objects.filter(dedup_key=GC_DEDUP_KEY, status='queued').exists())
+
+
+class MultiJobRecommendationTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.jobs = [
+            self.create_job(self.company, title='Backend', requirements='python, sql'),
+            self.create_job(self.company, title='Frontend', requirements='react, css'),
+        ]
+        self.backend = self.create_candidate('backend', skills='python, sql')
+        self.frontend = self.create_candidate('frontend', skills='react, css')
+
+    def test_cold_jobs_are_scored_in_one_pass(self):
+        with mock.patch('match.utils.score_jobs_against_candidates',
+                        wraps=score_jobs_against_candidates) as scorer:
+            recommendations = get_recommended_candidates_for_jobs(self.jobs, limit=1)
+        scorer.assert_called_once()
+        self.assertEqual(recommendations[self.jobs[0].pk][0]['candidate'], self.backend)
+        self.assertEqual(recommendations[self.jobs[1].pk][0]['candidate'], self.frontend)
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_company_overview_lists_top_candidates(self):
+        self.client.force_login(self.company)
+        response = self.client.get(reverse('match:overview'))
+        self.assertEqual(response.status_code, 200)
+        top = {item['job']: item['candidates'][0]['candidate']
+               for item in response.context['job_recommendations']}
+        self.assertEqual(top, {self.jobs[0]: self.backend, self.jobs[1]: self.frontend})
+
+    def test_matches_single_job_reads(self):
+        get_recommended_candidates_for_jobs(self.jobs)
+        with self.assertNumQueries(1):
+            grouped = get_recommended_candidates_for_jobs(self.jobs, limit=2)
+        for job in self.jobs:
+            single = get_recommended_candidates_for_job(job, limit=2)
+            self.assertEqual([r['candidate'] for r in grouped[job.pk]],
+                             [r['candidate'] for r in single])
+
+
+@override_settings(MATCH_PREFILTERS=['deadline', 'onsite_state', 'salary'])
+class PrefilterTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.candidate = self.create_candidate(skills='python', city='Campinas', state='SP',
+                                               desired_salary=Decimal('20000'))
+        self.other_state = self.create_job(self.company, title='RJ', location='Rio de Janeiro, RJ')
+        self.remote = self.create_job(self.company, title='Remota', location='Rio de Janeiro, RJ',
+                                      work_mode='remote')
+        self.cheap = self.create_job(self.company, title='Barata', salary_max=Decimal('5000'))
+        self.expired = self.create_job(self.company, title='Expirada', work_mode='remote',
+                                       deadline=datetime.date.today() - datetime.timedelta(days=1))
+
+    def test_counts_rows_removed_by_each_filter(self):
+        jobs, removed = prefilter_jobs(self.candidate.candidate_profile, Job.objects.filter(is_active=True))
+        self.assertEqual(list(jobs), [self.remote])
+        self.assertEqual(removed, {'deadline': 1, 'onsite_state': 1, 'salary': 1})
+
+    @override_settings(MATCH_PREFILTERS=['deadline'])
+    def test_filters_are_configurable(self):
+        jobs, removed = prefilter_jobs(self.candidate.candidate_profile, Job.objects.filter(is_active=True))
+        self.assertEqual(jobs.count(), 3)
+        self.assertEqual(removed, {'deadline': 1})
+
+    def test_row_and_column_refresh_agree(self):
+        MatchResult.objects.create(job=self.other_state, candidate=self.candidate, score=0.5)
+        refresh_candidate_matches(self.candidate)
+        self.assertEqual(
+            list(MatchResult.objects.filter(candidate=self.candidate).values_list('job', flat=True)),
+            [self.remote.pk],
+        )
+
+        for job in (self.other_state, self.cheap, self.expired):
+            refresh_job_matches(job)
+        refresh_job_matches(self.remote)
+        self.assertEqual(MatchResult.objects.filter(candidate=self.candidate).count(), 1)
+
+    def test_applied_pairs_survive_the_prefilter(self):
+        from jobs.models import Application
+
+        MatchResult.objects.create(job=self.cheap, candidate=self.candidate, score=0.5)
+        Application.objects.create(job=self.cheap, candidate=self.candidate)
+
+        refresh_candidate_matches(self.candidate)
+        refresh_job_matches(self.cheap)
+        self.assertTrue(MatchResult.objects.filter(job=self.cheap, candidate=self.candidate).exists())
+
+
+class DirtyQueueTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.job = self.create_job(self.company, requirements='python, sql')
+        self.candidate = self.create_candidate(skills='java')
+
+    def test_saves_mark_rows_and_columns_dirty(self):
+        self.assertTrue(DirtyMatch.objects.filter(kind='job', object_id=self.job.pk).exists())
+        self.assertTrue(DirtyMatch.objects.filter(kind='candidate', object_id=self.candidate.pk).exists())
+
+    def test_worker_keeps_results_current(self):
+        process_dirty_matches()
+        self.assertFalse(DirtyMatch.objects.exists())
+        old_score = MatchResult.objects.get(candidate=self.candidate, job=self.job).score
+
+        profile = self.candidate.candidate_profile
+        profile.skills = 'python, sql'
+        profile.save()
+        self.assertEqual(process_dirty_matches(), 1)
+
+        new_score = MatchResult.objects.get(candidate=self.candidate, job=self.job).score
+        self.assertGreater(new_score, old_score)
+
+    def test_reads_do_not_score_when_results_exist(self):
+        process_dirty_matches()
+        with mock.patch('match.utils.score_jobs_against_candidates') as scorer, \
+                mock.patch('match.utils.calculate_match_score') as scalar:
+            get_recommended_jobs_for_candidate(self.candidate)
+            get_recommended_candidates_for_job(self.job)
+        scorer.assert_not_called()
+        scalar.assert_not_called()
+
+    def test_inactive_jobs_are_not_recommended(self):
+        self.candidate.candidate_profile.skills = 'python, sql'
+        self.candidate.candidate_profile.save()
+        process_dirty_matches()
+        self.assertEqual(len(get_recommended_jobs_for_candidate(self.candidate)), 1)
+
+        self.job.is_active = False
+        self.job.save()
+        self.assertEqual(get_recommended_jobs_for_candidate(self.candidate), [])
+
+
+@override_settings(MATCH_REFRESH_INLINE=True, TASKS_RUN_INLINE=True, MATCH_PREFILTERS=[], MATCH_RETENTION_TOP_K=0)
+class InlineRefreshOrderingTests(MatchFixturesMixin, TransactionTestCase):
+    """Recalculo em on_commit fora de transacao: precisa ver canonical_skills ja sincronizado."""
+
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.candidate = self.create_candidate(skills='python, django')
+
+    def stored_and_real(self, job):
+        job = Job.objects.get(pk=job.pk)
+        stored = MatchResult.objects.get(candidate=self.candidate, job=job)
+        return stored.score, calculate_match_score(self.candidate, job)
+
+    def test_refresh_sees_synced_job_skills(self):
+        job = self.create_job(self.company, requirements='python, django')
+        stored, real = self.stored_and_real(job)
+        self.assertAlmostEqual(stored, real, places=4)
+
+        job.requirements = 'python, java'
+        job.save()
+        stored, real = self.stored_and_real(job)
+        self.assertAlmostEqual(stored, real, places=4)
+
+    def test_refresh_sees_synced_candidate_skills(self):
+        job = self.create_job(self.company, requirements='python, java')
+        profile = self.candidate.candidate_profile
+        profile.skills = 'python, java'
+        profile.save()
+        self.candidate = User.objects.select_related('candidate_profile').get(pk=self.candidate.pk)
+        stored, real = self.stored_and_real(job)
+        self.assertAlmostEqual(stored, real, places=4)
+
+
+class SkillIndexTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.python_dev = self.create_candidate('pythonista', skills='python, django')
+        self.designer = self.create_candidate('designer', skills='figma, ux')
+
+    def test_index_follows_profile_skills(self):
+        profile = self.python_dev.candidate_profile
+        profile.skills = 'python, aws'
+        profile.save()
+
+        skills = set(profile.canonical_skills.values_list('name', flat=True))
+        self.assertEqual(skills, {'python', 'aws'})
+
+    def test_skills_resolve_to_shared_canonical_rows(self):
+        job = self.create_job(self.company, requirements='Python, SQL')
+        python = CanonicalSkill.objects.get(name='python')
+        self.assertFalse(python.is_active)
+        self.assertIn(self.python_dev.candidate_profile, python.candidate_profiles.all())
+        self.assertIn(job, python.jobs.all())
+
+    def test_job_retrieval_only_scores_overlapping_candidates(self):
+        job = self.create_job(self.company, requirements='python, sql')
+        self.assertEqual(list(get_candidate_pool_for_job(job)), [self.python_dev])
+
+        recommendations = get_recommended_candidates_for_job(job)
+        self.assertEqual([r['candidate'] for r in recommendations], [self.python_dev])
+        self.assertFalse(MatchResult.objects.filter(job=job, candidate=self.designer).exists())
+
+    def test_candidates_leaving_the_pool_lose_their_rows(self):
+        job = self.create_job(self.company, requirements='python, django')
+        refresh_job_matches(job)
+        self.assertTrue(MatchResult.objects.filter(job=job, candidate=self.python_dev).exists())
+
+        job.requirements = 'figma'
+        job.save()
+        refresh_job_matches(job)
+        self.assertEqual(list(MatchResult.objects.filter(job=job).values_list('candidate', flat=True)),
+                         [self.designer.pk])
+
+    def test_applied_candidates_keep_their_rows_after_leaving_the_pool(self):
+        from jobs.models import Application
+
+        job = self.create_job(self.company, requirements='python, django')
+        refresh_job_matches(job)
+        Application.objects.create(job=job, candidate=self.python_dev)
+
+        job.requirements = 'figma'
+        job.save()
+        refresh_job_matches(job)
+        self.assertTrue(MatchResult.objects.filter(job=job, candidate=self.python_dev).exists())
+
+    def test_job_without_requirements_considers_everyone(self):
+        job = self.create_job(self.company, requirements='')
+        self.assertEqual(get_candidate_pool_for_job(job).count(), 2)
+
+
+class CandidateANNIndexTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        ann.invalidate_candidate_index()
+        self.company = self.create_company()
+        self.backend = self.create_candidate('backend', skills='python, django, sql')
+        self.data = self.create_candidate('data', skills='python, pandas, sql')
+        self.designer = self.create_candidate('designer', skills='figma, ux, ui')
+
+    def tearDown(self):
+        ann.invalidate_candidate_index()
+
+    def test_query_ranks_similar_candidates_first(self):
+        self.create_job(self.company, requirements='python, django, sql')
+        index = ann.get_candidate_index(force_check=True)
+
+        self.assertEqual(len(index), 3)
+        ranked = index.query('python, django, sql', shortlist=3)
+        self.assertEqual(ranked[0], self.backend.pk)
+        self.assertEqual(ranked[-1], self.designer.pk)
+        self.assertEqual(index.query('python, django, sql', shortlist=1), [self.backend.pk])
+
+    @override_settings(MATCH_ANN_MIN_CANDIDATES=2, MATCH_ANN_SHORTLIST=1)
+    def test_large_pools_use_ann_shortlist(self):
+        job = self.create_job(self.company, requirements='python, django, sql')
+        self.assertEqual(list(get_candidate_pool_for_job(job)), [self.backend])
+
+    def test_ann_refresh_keeps_rows_outside_the_shortlist(self):
+        job = self.create_job(self.company, requirements='python, django, sql')
+        refresh_job_matches(job)
+        self.assertTrue(MatchResult.objects.filter(job=job, candidate=self.data).exists())
+
+        with override_settings(MATCH_ANN_MIN_CANDIDATES=2, MATCH_ANN_SHORTLIST=1):
+            refresh_job_matches(job)
+        self.assertTrue(MatchResult.objects.filter(job=job, candidate=self.data).exists())
+
+    def test_profile_save_bumps_candidate_vectors_version(self):
+        before = MatchIndexVersion.current(ann.CANDIDATE_VECTORS_INDEX)
+        self.designer.candidate_profile.save()
+        self.assertEqual(MatchIndexVersion.current(ann.CANDIDATE_VECTORS_INDEX), before + 1)
+
+
+class MatchScoreCacheTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        locations.invalidate_city_table()
+        score_cache.clear()
+        self.company = self.create_company()
+        self.job = self.create_job(self.company, requirements='python, sql')
+        self.candidate = self.create_candidate(skills='python')
+
+    def test_repeated_views_hit_cache(self):
+        score = get_cached_match_score(self.candidate, self.job)
+        with mock.patch('match.utils.calculate_match_score') as scalar:
+            self.assertEqual(get_cached_match_score(self.candidate, self.job), score)
+        scalar.assert_not_called()
+        self.assertEqual(score_cache.stats()['hits'], 1)
+        self.assertEqual(score_cache.stats()['misses'], 1)
+
+    def test_profile_and_job_revisions_change_key(self):
+        get_cached_match_score(self.candidate, self.job)
+
+        profile = self.candidate.candidate_profile
+        profile.skills = 'python, sql'
+        profile.save()
+        self.assertAlmostEqual(get_cached_match_score(self.candidate, self.job),
+                               calculate_match_score(self.candidate, self.job))
+
+        self.job.experience_years = 10
+        self.job.save()
+        self.assertAlmostEqual(get_cached_match_score(self.candidate, self.job),
+                               calculate_match_score(self.candidate, self.job))
+        self.assertEqual(score_cache.stats()['misses'], 3)
+
+    def test_cities_version_changes_key(self):
+        get_cached_match_score(self.candidate, self.job)
+        locations.bump_cities_version()
+        get_cached_match_score(self.candidate, self.job)
+        self.assertEqual(score_cache.stats()['misses'], 2)
+
+    def test_concurrent_profile_saves_get_distinct_revisions(self):
+        first = CandidateProfile.objects.get(user=self.candidate)
+        second = CandidateProfile.objects.get(user=self.candidate)
+        first.save()
+        second.save()
+        self.assertNotEqual(first.revision, second.revision)
+        self.assertEqual(CandidateProfile.objects.get(user=self.candidate).revision, second.revision)
+
+    def test_lru_eviction(self):
+        cache = MatchScoreCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.stats()['size'], 2)
+
+
+class SkillDemandTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        self.company = self.create_company()
+        self.job_a = self.create_job(self.company, requirements='python, sql, docker')
+        self.job_b = self.create_job(self.company, requirements='python, aws')
+        self.candidate = self.create_candidate(skills='python')
+
+    def demand(self):
+        return dict(SkillDemand.objects.values_list('skill', 'job_count'))
+
+    def test_gaps_ordered_by_demand(self):
+        self.create_job(self.company, requirements='aws')
+        self.assertEqual(get_skill_gaps(self.candidate), ['aws', 'docker', 'sql'])
+
+    def test_edit_deactivate_and_delete_update_counts(self):
+        self.job_a.requirements = 'python, kubernetes'
+        self.job_a.save()
+        self.assertEqual(self.demand(), {'python': 2, 'aws': 1, 'kubernetes': 1})
+
+        self.job_b.is_active = False
+        self.job_b.save()
+        self.assertEqual(self.demand(), {'python': 1, 'kubernetes': 1})
+
+        self.job_a.delete()
+        self.assertEqual(self.demand(), {})
+
+    def test_rebuild_matches_incremental_counts(self):
+        expected = self.demand()
+        SkillDemand.objects.all().delete()
+        rebuild_skill_demand()
+        self.assertEqual(self.demand(), expected)
+
+
+class RebuildMatchesCommandTests(MatchFixturesMixin, TestCase):
+    def setUp(self):
+        skill_space.invalidate_skill_space()
+        self.company = self.create_company()
+        self.jobs = [self.create_job(self.company, title=f'Vaga {i}', requirements='python, sql')
+                     for i in range(2)]
+        self.candidates = [self.create_candidate(f'cand{i}', skills='python') for i in range(5)]
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+
+    def rebuild(self, **options):
+        call_command('rebuild_matches', workers=1, chunk_size=2, checkpoint=self.checkpoint,
+                     stdout=StringIO(), **options)
+
+    def test_rebuild_scores_full_matrix(self):
+        self.rebuild()
+        self.assertEqual(MatchResult.objects.count(), 10)
+        self.assertFalse(DirtyMatch.objects.exists())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume_skips_completed_chunks(self):
+        from match.management.commands import rebuild_matches
+
+        original = rebuild_matches.score_chunk
+        calls = []
+
+        def flaky(chunk):
+            calls.append(chunk)
+            if len(calls) == 2:
+                raise RuntimeError('interrompido')
+            return original(chunk)
+
+        with mock.patch.object(rebuild_matches, 'score_chunk', side_effect=flaky):
+            with self.assertRaises(RuntimeError):
+                self.rebuild()
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)['done'], [0])
+
+        # Marcada depois do inicio da primeira execucao, para um bloco ja concluido
+        DirtyMatch.objects.all().delete()
+        DirtyMatch.mark('candidate', self.candidates[0].pk)
+
+        with mock.patch.object(rebuild_matches, 'score_chunk', wraps=original) as resumed:
+            self.rebuild()
+        self.assertEqual(resumed.call_count, 2)
+        self.assertEqual(MatchResult.objects.count(), 10)
+        self.assertTrue(DirtyMatch.objects.filter(object_id=self.candidates[0].pk).exists())
+
+    def test_marks_made_during_the_rebuild_outlive_it(self):
+        from match.management.commands import rebuild_matches
+
+        original = rebuild_matches.score_chunk
+
+        def marking(chunk):
+            result = original(chunk)
+            if self.candidates[0].pk in chunk:
+                # Depois do bloco 0 ser pontuado, antes do bloco 2
+                DirtyMatch.mark('candidate', self.candidates[0].pk)
+                DirtyMatch.mark('candidate', self.candidates[4].pk)
+                DirtyMatch.mark('job', self.jobs[0].pk)
+            return result
+
+        with mock.patch.object(rebuild_matches, 'score_chunk', side_effect=marking):
+            self.rebuild()
+        self.assertEqual(
+            set(DirtyMatch.objects.values_list('kind', 'object_id')),
+            {('candidate', self.candidates[0].pk), ('job', self.jobs[0].pk)},
+        )
+
+    @override_settings(MATCH_PREFILTERS=['salary'])
+    def test_rebuild_drops_prefiltered_pairs(self):
+        cheap = self.create_job(self.company, title='Estagio', requirements='python', salary_max=Decimal('1000'))
+        picky = self.create_candidate('exigente', skills='python', desired_salary=Decimal('20000'))
+        MatchResult.objects.create(job=cheap, candidate=picky, score=0.5)
+
+        self.rebuild()
+        self.assertFalse(MatchResult.objects.filter(job=cheap, candidate=picky).exists())
+        self.assertTrue(MatchResult.objects.filter(job=cheap, candidate=self.candidates[0]).exists())
+
+    @override_settings(MATCH_PREFILTERS=['salary'])
+    def test_rebuild_keeps_prefiltered_pairs_with_applications(self):
+        from jobs.models import Application
+
+        cheap = self.create_job(self.company, title='Estagio', requirements='python', salary_max=Decimal('1000'))
+        picky = self.create_candidate('exigente', skills='python', desired_salary=Decimal('20000'))
+        MatchResult.objects.create(job=cheap, candidate=picky, score=0.5)
+        Application.objects.create(job=cheap, candidate=picky)
+
+        self.rebuild()
+        self.assertTrue(MatchResult.objects.filter(job=cheap, candidate=picky).exists())
+
+
+class BenchmarkMatchCommandTests(TestCase):
+    def test_small_scale_reports_every_function(self):
+        from django.db import connection
+
+        out = StringIO()
+        # O comando cria o proprio banco de teste; aqui reaproveita o da suite
+        with mock.patch.object(connection.creation, 'create_test_db', return_value=None), \
+                mock.patch.object(connection.creation, 'destroy_test_db'), \
+                mock.patch.object(ann, 'invalidate_candidate_index', wraps=ann.invalidate_candidate_index) as ann_reset:
+            call_command('benchmark_match', '--scales', '20x5', '--samples', '2', '--skills', '20',
+                         stdout=out, stderr=StringIO())
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report), {'seed', 'samples', 'scales'})
+        scale = report['scales'][0]
+        self.assertEqual((scale['candidates'], scale['jobs']), (20, 5))
+        self.assertEqual(set(scale['functions']), {
+            'calculate_match_score', 'get_recommended_jobs_for_candidate',
+            'get_recommended_candidates_for_job', 'get_skill_gaps',
+        })
+        self.assertEqual(set(scale['functions']['get_skill_gaps']),
+                         {'calls', 'p50_ms', 'p95_ms', 'mean_ms', 'queries_per_call'})
+        ann_reset.assert_called()
@@ -1,6 +1,21 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import logging
+
 import numpy as np
+from django.conf import settings
+
+from .skill_space import get_skill_space
+
+logger = logging.getLogger(__name__)
+
+# Scores abaixo deste valor nao aparecem nas recomendacoes
+MATCH_DISPLAY_THRESHOLD = 0.1
+
+MATCH_WEIGHTS = {
+    'skills': 0.50,
+    'experience': 0.25,
+    'location': 0.15,
+    'salary': 0.10
+}
 
 
 def calculate_match_score(candidate, job):
@@ -16,12 +31,7 @@ def calculate_match_score(candidate, job):
     
     profile = candidate.candidate_profile
     total_score = 0.0
-    weights = {
-        'skills': 0.50,
-        'experience': 0.25,
-        'location': 0.15,
-        'salary': 0.10
-    }
+    weights = MATCH_WEIGHTS
     
     skills_score = calculate_skills_score(profile, job)
     total_score += skills_score * weights['skills']
@@ -38,8 +48,43 @@ def calculate_match_score(candidate, job):
     return round(float(total_score), 4)
 
 
+def get_cached_match_score(candidate, job):
+    """
+    calculate_match_score com cache versionado (ver score_cache).
+
+    A chave usa a revisao do perfil, o updated_at da vaga e as versoes do
+    espaco de habilidades e da tabela de cidades; vagas ainda nao salvas sempre
+    sao recalculadas.
+    """
+    from .locations import get_city_table
+    from .score_cache import score_cache
+
+    if not hasattr(candidate, 'candidate_profile') or not job.pk or not job.updated_at:
+        return calculate_match_score(candidate, job)
+
+    profile = candidate.candidate_profile
+    key = (
+        candidate.pk,
+        profile.revision,
+        job.pk,
+        job.updated_at.timestamp(),
+        get_skill_space().version,
+        get_city_table().version,
+    )
+    score = score_cache.get(key)
+    if score is None:
+        score = calculate_match_score(candidate, job)
+        score_cache.set(key, score)
+    return score
+
+
 def calculate_skills_score(profile, job):
-    """Calcula score baseado em habilidades usando TF-IDF e match exato."""
+    """
+    Calcula score baseado em habilidades usando TF-IDF e match exato.
+
+    O TF-IDF usa o espaco vetorial compartilhado (ver skill_space), ajustado
+    uma vez sobre todas as vagas ativas, em vez de um vetorizador por par.
+    """
     candidate_skills = profile.skills or ''
     job_requirements = job.requirements or ''
     
@@ -56,10 +101,7 @@ def calculate_skills_score(profile, job):
         exact_score = 0.0
     
     try:
-        vectorizer = TfidfVectorizer(lowercase=True, stop_words=None)
-        texts = [candidate_skills, job_requirements]
-        tfidf_matrix = vectorizer.fit_transform(texts)
-        tfidf_score = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+        tfidf_score = get_skill_space().similarity(candidate_skills, job)
     except Exception:
         tfidf_score = 0.0
     
@@ -86,14 +128,42 @@ def calculate_experience_score(profile, job):
 
 def calculate_location_score(profile, job):
     """Calcula score baseado em localizacao e modo de trabalho."""
-    if job.work_mode == 'remote':
+    candidate_city = getattr(profile, 'canonical_city_id', None)
+    job_city = getattr(job, 'canonical_city_id', None)
+    if job.work_mode != 'remote' and candidate_city and job_city:
+        return float(_city_location_score(
+            np.array([job_city]), np.array([job.work_mode == 'hybrid']), np.array([candidate_city])
+        )[0, 0])
+    return _location_score(_candidate_location(profile), job.work_mode, job.location)
+
+
+def _city_location_score(job_cities, hybrid, candidate_cities):
+    """
+    Score (vagas x candidatos) entre cidades canonicas: mesma cidade, ate
+    MATCH_LOCATION_RADIUS_KM de distancia, ou mais longe.
+    """
+    from .locations import get_city_table
+
+    radius = getattr(settings, 'MATCH_LOCATION_RADIUS_KM', 100)
+    km = get_city_table().distance_matrix(job_cities, candidate_cities)
+    return np.select(
+        [job_cities[:, None] == candidate_cities[None, :], km <= radius],
+        [1.0, 0.8],
+        default=np.where(hybrid, 0.5, 0.3)[:, None],
+    )
+
+
+def _candidate_location(profile):
+    if hasattr(profile, 'get_full_location'):
+        return (profile.get_full_location() or '').lower().strip()
+    return (profile.location or '').lower().strip()
+
+
+def _location_score(candidate_location, work_mode, job_location):
+    if work_mode == 'remote':
         return 1.0
     
-    if hasattr(profile, 'get_full_location'):
-        candidate_location = (profile.get_full_location() or '').lower().strip()
-    else:
-        candidate_location = (profile.location or '').lower().strip()
-    job_location = (job.location or '').lower().strip()
+    job_location = (job_location or '').lower().strip()
     
     if not candidate_location or not job_location:
         return 0.5
@@ -110,7 +180,7 @@ def calculate_location_score(profile, job):
     if candidate_city == job_city:
         return 0.9
     
-    if job.work_mode == 'hybrid':
+    if work_mode == 'hybrid':
         return 0.5
     
     return 0.3
@@ -144,122 +214,533 @@ def calculate_salary_score(profile, job):
         return 0.1
 
 
+def score_candidate_against_jobs(candidate, jobs):
+    """
+    Versao vetorizada de calculate_match_score: pontua um candidato contra
+    uma lista de vagas em uma unica passada NumPy.
+
+    Retorna um dicionario de arrays alinhados com `jobs` com os quatro fatores
+    ('skills', 'experience', 'location', 'salary') e o score final ('total'),
+    com os mesmos valores do caminho escalar.
+    """
+    jobs = list(jobs)
+    if not hasattr(candidate, 'candidate_profile'):
+        zeros = np.zeros(len(jobs))
+        return {'skills': zeros, 'experience': zeros, 'location': zeros,
+                'salary': zeros, 'total': zeros}
+
+    matrix = score_jobs_against_candidates(jobs, [candidate])
+    return {factor: scores[:, 0] for factor, scores in matrix.items()}
+
+
+def score_jobs_against_candidates(jobs, candidates):
+    """
+    Matriz vagas x candidatos de calculate_match_score em uma unica passada.
+
+    Retorna um dicionario de matrizes (len(jobs) x len(candidates)) com os
+    quatro fatores e o score final ('total'). Candidatos sem perfil pontuam 0.
+    """
+    from .job_snapshot import JobSnapshot
+    return score_snapshot_against_candidates(JobSnapshot.from_jobs(list(jobs)), candidates)
+
+
+def score_snapshot_against_candidates(snapshot, candidates):
+    """
+    Como score_jobs_against_candidates, mas sobre as colunas de um JobSnapshot
+    (ver job_snapshot): nenhuma instancia de Job e necessaria.
+    """
+    candidates = list(candidates)
+    shape = (len(snapshot), len(candidates))
+    profiles = [getattr(candidate, 'candidate_profile', None) for candidate in candidates]
+    has_profile = np.array([profile is not None for profile in profiles], dtype=bool)
+
+    scores = {factor: np.zeros(shape) for factor in MATCH_WEIGHTS}
+    scores['total'] = np.zeros(shape)
+    if not len(snapshot) or not has_profile.any():
+        return scores
+
+    columns = np.flatnonzero(has_profile)
+    profiles = [profiles[i] for i in columns]
+    factors = {
+        'skills': _matrix_skills_score(snapshot, profiles),
+        'experience': _matrix_experience_score(snapshot, profiles),
+        'location': _matrix_location_score(snapshot, profiles),
+        'salary': _matrix_salary_score(snapshot, profiles),
+    }
+
+    total = np.zeros((len(snapshot), len(profiles)))
+    for factor, weight in MATCH_WEIGHTS.items():
+        scores[factor][:, columns] = factors[factor]
+        total += factors[factor] * weight
+    scores['total'][:, columns] = np.round(total, 4)
+    return scores
+
+
+def _matrix_skills_score(snapshot, profiles):
+    from scipy import sparse
+    from accounts.models import CandidateProfile
+
+    shape = (len(snapshot), len(profiles))
+    has_requirements = np.array([bool(text) for text in snapshot.texts])
+    has_skills = np.array([bool(profile.skills) for profile in profiles])
+    if not has_requirements.any() or not has_skills.any():
+        return np.zeros(shape)
+
+    # Matches exatos por ID de habilidade: (vagas x skills) @ (skills x candidatos)
+    column_of = {profile.pk: column for column, profile in enumerate(profiles)}
+    profile_skills = CandidateProfile.canonical_skills.through.objects.filter(
+        canonicalskill_id__in=snapshot.skill_ids.tolist()
+    )
+    if len(column_of) <= 1000:
+        # Poucos candidatos (ex.: uma linha da matriz): filtra tambem pelo perfil
+        profile_skills = profile_skills.filter(candidateprofile_id__in=column_of)
+    candidate_pairs = [
+        (column_of[profile_id], skill_id)
+        for profile_id, skill_id in profile_skills.values_list('candidateprofile_id', 'canonicalskill_id')
+        if profile_id in column_of
+    ]
+    candidate_skills = sparse.csr_matrix(
+        (np.ones(len(candidate_pairs)),
+         ([c for c, _ in candidate_pairs],
+          np.searchsorted(snapshot.skill_ids, [s for _, s in candidate_pairs]))),
+        shape=(len(profiles), len(snapshot.skill_ids)),
+    )
+
+    counts = np.asarray(snapshot.job_skills.sum(axis=1), dtype=float).reshape(-1, 1)
+    exact_matches = (snapshot.job_skills @ candidate_skills.T).toarray()
+    exact_score = np.divide(exact_matches, counts, out=np.zeros(shape), where=counts > 0)
+
+    try:
+        space = snapshot.space or get_skill_space()
+        tfidf_score = space.similarity_matrix(
+            snapshot.skill_rows, snapshot.texts, [profile.skills for profile in profiles]
+        )
+    except Exception:
+        tfidf_score = np.zeros(shape)
+
+    scores = (exact_score * 0.6) + (tfidf_score * 0.4)
+    return np.where(has_requirements[:, None] & has_skills[None, :], scores, 0.0)
+
+
+def _matrix_experience_score(snapshot, profiles):
+    candidate_exp = np.array(
+        [float(getattr(profile, 'experience_years', 0) or 0) for profile in profiles]
+    )[None, :]
+    required = snapshot.experience[:, None]
+    shape = (len(snapshot), len(profiles))
+    ratio = np.divide(candidate_exp, required, out=np.zeros(shape), where=required > 0)
+
+    return np.select(
+        [np.broadcast_to(required == 0, shape),
+         candidate_exp >= required,
+         candidate_exp >= required * 0.7,
+         candidate_exp >= required * 0.5],
+        [1.0, 1.0, 0.8, 0.5],
+        default=ratio,
+    )
+
+
+def _matrix_location_score(snapshot, profiles):
+    from .job_snapshot import WORK_MODES
+
+    # Vagas com o mesmo (modo de trabalho, local) e candidatos com o mesmo local
+    # compartilham codigos: a comparacao de texto roda uma vez por par distinto.
+    job_keys, job_codes = np.unique(
+        np.stack([snapshot.work_modes, snapshot.location_codes], axis=1), axis=0, return_inverse=True
+    )
+    candidate_index = {}
+    candidate_codes = np.array(
+        [candidate_index.setdefault(_candidate_location(profile), len(candidate_index)) for profile in profiles],
+        dtype=np.int64,
+    )
+    table = np.array([
+        [_location_score(location, WORK_MODES[mode] if mode >= 0 else '', snapshot.locations[code])
+         for location in candidate_index]
+        for mode, code in job_keys
+    ], dtype=float)
+    scores = table[job_codes.reshape(-1)[:, None], candidate_codes[None, :]]
+
+    # Pares com as duas cidades canonicas resolvidas usam a tabela de distancias
+    candidate_cities = np.array(
+        [getattr(profile, 'canonical_city_id', None) or -1 for profile in profiles], dtype=np.int64
+    )
+    resolved = ((snapshot.city_ids >= 0) & (snapshot.work_modes != WORK_MODES.index('remote')))[:, None] \
+        & (candidate_cities >= 0)[None, :]
+    if resolved.any():
+        hybrid = snapshot.work_modes == WORK_MODES.index('hybrid')
+        scores = np.where(resolved, _city_location_score(snapshot.city_ids, hybrid, candidate_cities), scores)
+    return scores
+
+
+def _matrix_salary_score(snapshot, profiles):
+    desired = np.array([float(profile.desired_salary or 0) for profile in profiles])[None, :]
+    salary_min = snapshot.salary_min[:, None]
+    raw_max = snapshot.salary_max[:, None]
+    # Mesma precedencia do caminho escalar: sem salary_min o teto fica 0
+    salary_max = np.where(salary_min > 0, np.where(raw_max > 0, raw_max, salary_min * 1.5), 0.0)
+    shape = (len(snapshot), len(profiles))
+
+    return np.select(
+        [np.broadcast_to(desired == 0, shape),
+         np.broadcast_to((salary_min == 0) & (raw_max == 0), shape),
+         (salary_min <= desired) & (desired <= salary_max),
+         desired < salary_min,
+         desired <= salary_max * 1.2,
+         desired <= salary_max * 1.5],
+        [0.7, 0.7, 1.0, 1.0, 0.7, 0.4],
+        default=0.1,
+    )
+
+
 def get_matched_and_missing_skills(candidate, job):
     """Retorna listas de habilidades que o candidato possui e as que faltam."""
     if not hasattr(candidate, 'candidate_profile'):
         return [], []
     
-    candidate_skills = set(candidate.candidate_profile.get_skills_list())
-    job_requirements = set(job.get_requirements_list())
-    
-    matched = list(candidate_skills & job_requirements)
-    missing = list(job_requirements - candidate_skills)
-    
+    return _split_requirements(job.get_requirements_list(), set(candidate.candidate_profile.get_skills_list()))
+
+
+def _split_requirements(requirements, candidate_skills):
+    # Ordem dos requisitos da vaga: o texto gravado e estavel entre processos
+    requirements = list(dict.fromkeys(requirements))
+    matched = [r for r in requirements if r in candidate_skills]
+    missing = [r for r in requirements if r not in candidate_skills]
     return matched, missing
 
 
-def get_recommended_jobs_for_candidate(candidate, limit=10):
-    """Retorna vagas recomendadas para o candidato ordenadas por score."""
+def save_match_results(results, batch_size=500):
+    """
+    Persiste MatchResult nao salvos com um upsert em lote sobre (job, candidate).
+
+    Linhas cujo score e listas de habilidades nao mudaram sao ignoradas.
+    Retorna o numero de linhas gravadas.
+    """
+    from .models import MatchResult
+
+    if not results:
+        return 0
+
+    candidate_ids = {r.candidate_id for r in results}
+    job_ids = {r.job_id for r in results}
+    # Filtra pelo lado menor (uma linha ou uma coluna da matriz de match)
+    if len(candidate_ids) <= len(job_ids):
+        existing_qs = MatchResult.objects.filter(candidate_id__in=candidate_ids)
+    else:
+        existing_qs = MatchResult.objects.filter(job_id__in=job_ids)
+    existing = {
+        (job_id, candidate_id): (score, matched, missing)
+        for job_id, candidate_id, score, matched, missing in existing_qs.values_list(
+            'job_id', 'candidate_id', 'score', 'matched_skills', 'missing_skills'
+        )
+    }
+
+    changed = [
+        r for r in results
+        if existing.get((r.job_id, r.candidate_id)) != (r.score, r.matched_skills, r.missing_skills)
+    ]
+    if changed:
+        MatchResult.objects.bulk_create(
+            changed,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['job', 'candidate'],
+            update_fields=['score', 'matched_skills', 'missing_skills', 'updated_at'],
+        )
+    return len(changed)
+
+
+def build_candidate_results(candidate, snapshot):
+    """
+    MatchResult (nao salvos) do candidato contra as vagas de um JobSnapshot,
+    pontuados em lote.
+    """
+    from .models import MatchResult
+
+    scores = score_snapshot_against_candidates(snapshot, [candidate])['total'][:, 0]
+    skills = set(candidate.candidate_profile.get_skills_list())
+    results = []
+
+    for row, (job_id, score) in enumerate(zip(snapshot.ids.tolist(), scores)):
+        matched, missing = _split_requirements(snapshot.requirements_of(row), skills)
+        results.append(MatchResult(
+            candidate=candidate,
+            job_id=job_id,
+            score=float(score),
+            matched_skills=', '.join(matched),
+            missing_skills=', '.join(missing)
+        ))
+    return results
+
+
+def refresh_candidate_matches(candidate):
+    """
+    Recalcula e persiste a linha do candidato na matriz de match.
+
+    As vagas vem do snapshot colunar (ver job_snapshot); as descartadas pelo
+    pre-filtro (ver prefilter) nao sao pontuadas e seus resultados antigos
+    sao removidos, exceto os pares com candidatura. Com retencao top-K (ver retention) so a parte retida da
+    linha e gravada.
+    """
     from jobs.models import Job
+    from .job_snapshot import get_job_snapshot
     from .models import MatchResult
-    
+    from .prefilter import prefilter_jobs
+    from .retention import retain_top_k, without_applications
+
     if not hasattr(candidate, 'candidate_profile'):
-        return []
-    
-    active_jobs = Job.objects.filter(is_active=True).select_related('company__company_profile')
-    recommendations = []
-    
-    for job in active_jobs:
-        score = calculate_match_score(candidate, job)
-        matched, missing = get_matched_and_missing_skills(candidate, job)
-        
-        match_result, created = MatchResult.objects.update_or_create(
-            candidate=candidate,
-            job=job,
-            defaults={
-                'score': score,
-                'matched_skills': ', '.join(matched),
-                'missing_skills': ', '.join(missing)
-            }
+        return 0
+
+    jobs, removed = prefilter_jobs(candidate.candidate_profile, Job.objects.filter(is_active=True))
+    if any(removed.values()):
+        logger.info(f"Pre-filtro do candidato {candidate.pk}: {removed}")
+        without_applications(
+            MatchResult.objects.filter(candidate=candidate, job__is_active=True).exclude(job__in=jobs)
+        ).delete()
+
+    snapshot = get_job_snapshot().only(jobs.values_list('pk', flat=True))
+    results = build_candidate_results(candidate, snapshot)
+    written = save_match_results(retain_top_k(results, 'candidate'))
+    _record_matches_created(results)
+    return written
+
+
+def refresh_job_matches(job):
+    """Recalcula e persiste a coluna da vaga na matriz de match."""
+    return refresh_jobs_matches([job])
+
+
+def refresh_jobs_matches(jobs):
+    """
+    Recalcula e persiste as colunas de varias vagas de uma vez.
+
+    O pool de candidatos (get_candidate_pool_for_jobs: indice invertido de
+    habilidades ou shortlist ANN) e carregado uma unica vez e pontuado contra
+    todas as vagas em uma matriz vagas x candidatos. Pares descartados pelo
+    pre-filtro (avaliado na mesma consulta do pool) nao sao gravados e seus
+    resultados antigos sao removidos, assim como os pares fora da retencao
+    top-K (ver retention) e, quando o pool vem do indice invertido exato, os de
+    candidatos que sairam dele (ex.: apos mudar os requisitos da vaga). Pares
+    com candidatura nunca sao removidos.
+    """
+    from .models import MatchResult
+    from .prefilter import annotate_candidate_prefilters, candidate_prefilter_mask
+    from .retention import delete_match_results, retain_top_k, without_applications
+    from .skill_index import resolve_candidate_pool
+
+    jobs = [job for job in jobs if job.is_active]
+    if not jobs:
+        return 0
+
+    pool, exact = resolve_candidate_pool(jobs)
+    if exact:
+        without_applications(
+            MatchResult.objects.filter(job__in=jobs).exclude(candidate__in=pool.values('pk'))
+        ).delete()
+
+    candidates = list(annotate_candidate_prefilters(pool, jobs))
+    keep, removed = candidate_prefilter_mask(candidates, jobs)
+    if any(removed.values()):
+        logger.info(f"Pre-filtro das vagas {[job.pk for job in jobs]}: {removed}")
+        dropped = {
+            (job.pk, candidate.pk)
+            for job, row in zip(jobs, keep)
+            for candidate, kept in zip(candidates, row) if not kept
+        }
+        existing = without_applications(MatchResult.objects.filter(job__in=jobs))
+        delete_match_results(
+            pk for pk, job_id, candidate_id in existing.values_list('pk', 'job_id', 'candidate_id')
+            if (job_id, candidate_id) in dropped
         )
-        
-        if score > 0.1:
-            recommendations.append({
-                'job': job,
-                'score': score,
-                'matched_skills': matched,
-                'missing_skills': missing,
-                'percentage': int(score * 100)
-            })
-    
-    recommendations.sort(key=lambda x: x['score'], reverse=True)
-    
+
+    scores = score_jobs_against_candidates(jobs, candidates)['total']
+    candidate_skills = [set(c.candidate_profile.get_skills_list()) for c in candidates]
+    results = []
+
+    for job, row, kept in zip(jobs, scores, keep):
+        requirements = job.get_requirements_list()
+        for candidate, skills, score, keep_pair in zip(candidates, candidate_skills, row, kept):
+            if not keep_pair:
+                continue
+            matched, missing = _split_requirements(requirements, skills)
+            results.append(MatchResult(
+                candidate=candidate,
+                job=job,
+                score=float(score),
+                matched_skills=', '.join(matched),
+                missing_skills=', '.join(missing)
+            ))
+
+    written = save_match_results(retain_top_k(results, 'job'))
+    _record_matches_created(results)
+    return written
+
+
+def _record_matches_created(results):
     try:
         from accounts.models import SiteMetrics
-        SiteMetrics.increment('matches_created', len(recommendations))
+        created = sum(1 for r in results if r.score > MATCH_DISPLAY_THRESHOLD)
+        if created:
+            SiteMetrics.increment('matches_created', created)
     except Exception:
         pass
-    
-    return recommendations[:limit]
 
 
-def get_recommended_candidates_for_job(job, limit=10):
-    """Retorna candidatos recomendados para a vaga ordenados por score."""
+def process_dirty_matches(limit=100):
+    """
+    Drena a fila de matches pendentes (DirtyMatch), recalculando a linha de
+    cada candidato e a coluna de cada vaga marcados. Retorna quantas entradas
+    foram processadas.
+    """
     from accounts.models import User
+    from jobs.models import Job
+    from .models import DirtyMatch
+
+    entries = list(DirtyMatch.objects.all()[:limit])
+    if not entries:
+        return 0
+
+    # O worker precisa enxergar a versao mais recente do espaco de skills
+    get_skill_space(force_check=True)
+
+    for entry in entries:
+        try:
+            if entry.kind == 'candidate':
+                candidate = User.objects.select_related('candidate_profile').filter(pk=entry.object_id).first()
+                if candidate:
+                    refresh_candidate_matches(candidate)
+            else:
+                job = Job.objects.filter(pk=entry.object_id).first()
+                if job:
+                    refresh_job_matches(job)
+        except Exception as e:
+            logger.error(f"Erro ao recalcular matches de {entry}: {e}", exc_info=True)
+            continue
+        # Uma nova marcacao durante o calculo atualiza marked_at e mantem a entrada
+        DirtyMatch.objects.filter(pk=entry.pk, marked_at=entry.marked_at).delete()
+
+    return len(entries)
+
+
+def _job_recommendation(result):
+    return {
+        'job': result.job,
+        'score': result.score,
+        'matched_skills': result.get_matched_skills_list(),
+        'missing_skills': result.get_missing_skills_list(),
+        'percentage': int(result.score * 100)
+    }
+
+
+def _candidate_recommendation(result):
+    return {
+        'candidate': result.candidate,
+        'score': result.score,
+        'matched_skills': result.get_matched_skills_list(),
+        'missing_skills': result.get_missing_skills_list(),
+        'percentage': int(result.score * 100)
+    }
+
+
+def get_recommended_jobs_for_candidate(candidate, limit=10, compute_missing=True):
+    """
+    Retorna vagas recomendadas para o candidato ordenadas por score.
+
+    Le os resultados mantidos pelo worker de match; so calcula na hora quando
+    o candidato ainda nao tem nenhum resultado e compute_missing e verdadeiro.
+    """
     from .models import MatchResult
     
-    candidates = User.objects.filter(
-        user_type='candidate'
-    ).select_related('candidate_profile')
+    if not hasattr(candidate, 'candidate_profile'):
+        return []
     
-    recommendations = []
+    results = MatchResult.objects.filter(
+        candidate=candidate,
+        job__is_active=True,
+        score__gt=MATCH_DISPLAY_THRESHOLD
+    ).select_related('job__company__company_profile').order_by('-score', '-created_at')
+    recommendations = [_job_recommendation(r) for r in results[:limit]]
     
-    for candidate in candidates:
-        if not hasattr(candidate, 'candidate_profile'):
-            continue
-            
-        score = calculate_match_score(candidate, job)
-        matched, missing = get_matched_and_missing_skills(candidate, job)
-        
-        match_result, created = MatchResult.objects.update_or_create(
-            candidate=candidate,
-            job=job,
-            defaults={
-                'score': score,
-                'matched_skills': ', '.join(matched),
-                'missing_skills': ', '.join(missing)
-            }
-        )
-        
-        if score > 0.1:
-            recommendations.append({
-                'candidate': candidate,
-                'score': score,
-                'matched_skills': matched,
-                'missing_skills': missing,
-                'percentage': int(score * 100)
-            })
+    if compute_missing and not recommendations and not MatchResult.objects.filter(candidate=candidate).exists():
+        refresh_candidate_matches(candidate)
+        recommendations = [_job_recommendation(r) for r in results.all()[:limit]]
+    
+    return recommendations
+
+
+def get_recommended_candidates_for_job(job, limit=10):
+    """
+    Retorna candidatos recomendados para a vaga ordenados por score.
+
+    Assim como em get_recommended_jobs_for_candidate, le os resultados
+    persistidos e so calcula na hora quando a vaga ainda nao foi pontuada.
+    """
+    from .models import MatchResult
     
-    recommendations.sort(key=lambda x: x['score'], reverse=True)
-    return recommendations[:limit]
+    results = MatchResult.objects.filter(
+        job=job,
+        score__gt=MATCH_DISPLAY_THRESHOLD
+    ).select_related('candidate__candidate_profile').order_by('-score', '-created_at')
+    recommendations = [_candidate_recommendation(r) for r in results[:limit]]
+    
+    if not recommendations and not MatchResult.objects.filter(job=job).exists():
+        refresh_job_matches(job)
+        recommendations = [_candidate_recommendation(r) for r in results.all()[:limit]]
+    
+    return recommendations
+
+
+def get_recommended_candidates_for_jobs(jobs, limit=10):
+    """
+    get_recommended_candidates_for_job para varias vagas: le o top-`limit` de
+    cada vaga em uma unica consulta e pontua juntas, em uma so matriz, as
+    vagas que ainda nao tem resultados. Retorna {job.pk: recomendacoes}.
+    """
+    from django.db.models import F, Window
+    from django.db.models.functions import RowNumber
+    from .models import MatchResult
+
+    jobs = list(jobs)
+    if not jobs:
+        return {}
+
+    def top_results():
+        ranked = MatchResult.objects.filter(
+            job__in=jobs,
+            score__gt=MATCH_DISPLAY_THRESHOLD
+        ).annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F('job_id')],
+            order_by=[F('score').desc(), F('created_at').desc()],
+        )).filter(rank__lte=limit).select_related('candidate__candidate_profile')
+        grouped = {job.pk: [] for job in jobs}
+        for result in sorted(ranked, key=lambda r: (r.job_id, r.rank)):
+            grouped[result.job_id].append(_candidate_recommendation(result))
+        return grouped
+
+    recommendations = top_results()
+    empty = [job for job in jobs if not recommendations[job.pk]]
+    if empty:
+        scored = set(MatchResult.objects.filter(job__in=empty).values_list('job_id', flat=True).distinct())
+        cold = [job for job in empty if job.pk not in scored]
+        if cold:
+            refresh_jobs_matches(cold)
+            recommendations = top_results()
+    return recommendations
 
 
 def get_skill_gaps(candidate):
-    """Identifica habilidades em demanda que o candidato nao possui."""
-    from jobs.models import Job
+    """
+    Identifica habilidades em demanda que o candidato nao possui.
+
+    Usa a tabela materializada SkillDemand (todas as vagas ativas), ordenada
+    pela quantidade de vagas que exigem cada habilidade.
+    """
+    from .models import SkillDemand
     
     if not hasattr(candidate, 'candidate_profile'):
         return []
     
     candidate_skills = set(candidate.candidate_profile.get_skills_list())
-    skill_demand = {}
-    
-    popular_jobs = Job.objects.filter(is_active=True)[:100]
-    for job in popular_jobs:
-        for skill in job.get_requirements_list():
-            if skill not in candidate_skills:
-                skill_demand[skill] = skill_demand.get(skill, 0) + 1
-    
-    sorted_gaps = sorted(skill_demand.items(), key=lambda x: x[1], reverse=True)
+    demand = SkillDemand.objects.filter(job_count__gt=0).values_list('skill', flat=True)
     
-    return [skill for skill, count in sorted_gaps]
+    return [skill for skill in demand if skill not in candidate_skills]
@@ -3,6 +3,7 @@ from django.contrib.auth.decorators import login_required
 from jobs.models import Job
 from .utils import (get_recommended_jobs_for_candidate, 
                     get_recommended_candidates_for_job,
+                    get_recommended_candidates_for_jobs,
                     get_skill_gaps)
 
 
@@ -45,13 +46,13 @@ def match_overview(request):
         context['skill_gaps'] = skill_gaps[:5]
     
     elif request.user.is_company():
-        jobs = Job.objects.filter(company=request.user, is_active=True)
+        jobs = list(Job.objects.filter(company=request.user, is_active=True)[:5])
+        candidates = get_recommended_candidates_for_jobs(jobs, limit=3)
         job_recommendations = []
-        for job in jobs[:5]:
-            candidates = get_recommended_candidates_for_job(job, limit=3)
+        for job in jobs:
             job_recommendations.append({
                 'job': job,
-                'candidates': candidates
+                'candidates': candidates[job.pk]
             })
         context['job_recommendations'] = job_recommendations
     
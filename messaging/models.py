@@ -34,6 +34,17 @@ class Conversation(models.Model):
     def unread_count(self, user):
         return self.messages.filter(is_read=False).exclude(sender=user).count()
 
+    def mark_read(self, user, messages=None):
+        """Marca como lidas as mensagens recebidas por `user` (todas ou as de `messages`)."""
+        from accounts.unread import adjust_unread
+
+        messages = self.messages.all() if messages is None else messages
+        updated = messages.filter(is_read=False).exclude(sender=user).update(is_read=True)
+        if updated:
+            adjust_unread(user, messages=-updated)
+            user.unread_messages_count = max(user.unread_messages_count - updated, 0)
+        return updated
+
 
 class Message(models.Model):
     conversation = models.ForeignKey(
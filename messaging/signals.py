@@ -0,0 +1,35 @@
+"""Mantem unread_messages_count dos participantes em dia com as mensagens."""
+from django.db.models.signals import pre_save, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import User
+from accounts.unread import adjust_unread
+
+from .models import Message
+
+
+def _recipients(message):
+    return User.objects.filter(conversations=message.conversation_id).exclude(pk=message.sender_id)
+
+
+@receiver(pre_save, sender=Message)
+def message_about_to_save(sender, instance, raw=False, **kwargs):
+    instance._was_read = None
+    if instance.pk and not raw:
+        instance._was_read = Message.objects.filter(pk=instance.pk).values_list('is_read', flat=True).first()
+
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_read = True if created else getattr(instance, '_was_read', None)
+    if was_read is not None and was_read != instance.is_read:
+        adjust_unread(_recipients(instance), messages=1 if was_read else -1)
+
+
+@receiver(pre_delete, sender=Message)
+def message_about_to_delete(sender, instance, **kwargs):
+    # pre_delete: ao apagar a conversa, os participantes somem antes do post_delete
+    if not instance.is_read:
+        adjust_unread(_recipients(instance), messages=-1)
@@ -49,7 +49,7 @@ def conversation_detail(request, user_id):
     
     conversation = get_or_create_conversation(request.user, other_user)
     
-    conversation.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
+    conversation.mark_read(request.user)
     
     chat_messages = conversation.messages.select_related('sender').order_by('created_at')
 
@@ -188,12 +188,7 @@ def start_conversation(request, application_id):
 
 @login_required
 def unread_count(request):
-    count = Message.objects.filter(
-        conversation__participants=request.user,
-        is_read=False
-    ).exclude(sender=request.user).count()
-    
-    return JsonResponse({'unread_count': count})
+    return JsonResponse({'unread_count': request.user.unread_messages_count})
 
 
 @login_required
@@ -212,7 +207,7 @@ def sync_messages(request, user_id):
         after = 0
 
     new_msgs = conversation.messages.filter(id__gt=after).select_related('sender').order_by('created_at')
-    new_msgs.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
+    conversation.mark_read(request.user, new_msgs)
 
     return JsonResponse({
         'messages': [
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'talentmatch.settings')
 
 application = get_asgi_application()
+
+# Executa a fila de tarefas neste processo enquanto nao houver run_worker (ver taskqueue.embedded)
+from taskqueue.embedded import start_embedded_worker  # noqa: E402
+
+start_embedded_worker()
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 import dj_database_url
 
@@ -77,6 +78,7 @@ INSTALLED_APPS = [
     'messaging',
     'feed',
     'api',
+    'taskqueue',
 ]
 
 # -------------------------------------------
@@ -213,10 +215,116 @@ else:
 
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@talentmatch.com')
 
+# Emails de notificacao passam pela outbox (ver accounts/outbox.py): o worker envia em lote,
+# por uma conexao SMTP, o que chegou na janela de EMAIL_OUTBOX_DELAY segundos, juntando os
+# emails do mesmo destinatario. Falhas sao repetidas ate EMAIL_OUTBOX_MAX_ATTEMPTS vezes.
+EMAIL_OUTBOX_DELAY = int(os.environ.get('EMAIL_OUTBOX_DELAY', '30'))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', '100'))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.environ.get('EMAIL_OUTBOX_RETENTION_DAYS', '7'))
+
 # Verificação de email por código. Desativada por padrão ("por enquanto");
 # reative em produção com EMAIL_VERIFICATION_ENABLED=True no ambiente.
 EMAIL_VERIFICATION_ENABLED = os.environ.get('EMAIL_VERIFICATION_ENABLED', 'False').lower() in ('true', '1', 'yes')
 
+# -------------------------------------------
+# 🎯 MATCH
+# -------------------------------------------
+
+# Intervalo (s) entre consultas à versão dos índices de match mantidos em memória
+MATCH_INDEX_VERSION_TTL = int(os.environ.get('MATCH_INDEX_VERSION_TTL', '5'))
+
+# Os matches são recalculados pelo worker (manage.py run_worker).
+# Sem worker (ex.: desenvolvimento), ative para drenar a fila ao fim de cada transação.
+MATCH_REFRESH_INLINE = os.environ.get('MATCH_REFRESH_INLINE', 'False').lower() in ('true', '1', 'yes')
+
+# Cache de scores (candidato, vaga): LRU por processo + cache compartilhado opcional
+# (alias de CACHES, ex.: um Redis configurado para todos os workers).
+MATCH_SCORE_CACHE_SIZE = int(os.environ.get('MATCH_SCORE_CACHE_SIZE', '10000'))
+MATCH_SCORE_CACHE_ALIAS = os.environ.get('MATCH_SCORE_CACHE_ALIAS') or None
+MATCH_SCORE_CACHE_TIMEOUT = int(os.environ.get('MATCH_SCORE_CACHE_TIMEOUT', '3600'))
+
+# Recuperacao aproximada (LSH) de candidatos por vaga, usada acima de MATCH_ANN_MIN_CANDIDATES
+# perfis. MATCH_ANN_SHORTLIST e o ajuste recall x latencia (candidatos pontuados por vaga).
+MATCH_ANN_MIN_CANDIDATES = int(os.environ.get('MATCH_ANN_MIN_CANDIDATES', '5000'))
+MATCH_ANN_SHORTLIST = int(os.environ.get('MATCH_ANN_SHORTLIST', '300'))
+MATCH_ANN_BITS = int(os.environ.get('MATCH_ANN_BITS', '128'))
+MATCH_ANN_REBUILD_INTERVAL = int(os.environ.get('MATCH_ANN_REBUILD_INTERVAL', '300'))
+
+# Diretorio do indice de match em disco (ver match/index_store.py), mapeado em memoria e
+# compartilhado pelos workers do gunicorn. Vazio mantem uma copia do indice por processo.
+MATCH_INDEX_DIR = os.environ.get('MATCH_INDEX_DIR') or None
+
+# Score de localizacao: cidades canonicas a ate esta distancia (km) contam como a mesma regiao
+MATCH_LOCATION_RADIUS_KM = int(os.environ.get('MATCH_LOCATION_RADIUS_KM', '100'))
+
+# Retencao da matriz de match (ver match/retention.py): guarda so os K melhores pares de cada
+# candidato e de cada vaga, alem dos pares com candidatura. 0 guarda todos os pares pontuados.
+MATCH_RETENTION_TOP_K = int(os.environ.get('MATCH_RETENTION_TOP_K', '100'))
+# Intervalo (s) da coleta periodica dessas sobras no worker (run_worker); 0 desativa
+MATCH_GC_INTERVAL = int(os.environ.get('MATCH_GC_INTERVAL', '3600'))
+
+# Pre-filtro aplicado no banco antes da pontuacao (ver match/prefilter.py). Lista separada
+# por virgula entre deadline, onsite_state e salary; vazio desativa. Padrao so deadline:
+# onsite_state e salary mudam as recomendacoes (nao so o custo) e sao opcionais.
+MATCH_PREFILTERS = [
+    name.strip() for name in os.environ.get('MATCH_PREFILTERS', 'deadline').split(',')
+    if name.strip()
+]
+# Remove vagas cujo teto salarial multiplicado por este fator fica abaixo da pretensao
+MATCH_PREFILTER_SALARY_RATIO = float(os.environ.get('MATCH_PREFILTER_SALARY_RATIO', '1.5'))
+
+# -------------------------------------------
+# 🤖 CHATBOT
+# -------------------------------------------
+
+# Provedor de LLM (ver chatbot/providers.py): groq (exige GROQ_API_KEY), fake (offline,
+# responde apos CHATBOT_FAKE_LATENCY segundos), local (so regras) ou caminho de uma classe.
+CHATBOT_PROVIDER = os.environ.get('CHATBOT_PROVIDER', 'groq')
+CHATBOT_FAKE_LATENCY = float(os.environ.get('CHATBOT_FAKE_LATENCY', '0'))
+# Validade (s) do contexto do usuario em cache no prompt; perfil, candidaturas e vagas
+# alteradas invalidam antes disso (ver chatbot/context.py)
+CHATBOT_CONTEXT_TTL = int(os.environ.get('CHATBOT_CONTEXT_TTL', '600'))
+
+# -------------------------------------------
+# ⏱️ TAREFAS EM SEGUNDO PLANO
+# -------------------------------------------
+
+# Fila de tarefas no banco, executada por manage.py run_worker (ver taskqueue/queue.py).
+# Sem worker (ex.: desenvolvimento), ative para executar cada tarefa ao fim da transacao.
+TASKS_RUN_INLINE = os.environ.get('TASKS_RUN_INLINE', 'False').lower() in ('true', '1', 'yes')
+TASKS_CONCURRENCY = int(os.environ.get('TASKS_CONCURRENCY', '2'))
+# Segundos ate uma tarefa assumida e nao concluida poder ser reassumida por outro worker
+TASKS_VISIBILITY_TIMEOUT = int(os.environ.get('TASKS_VISIBILITY_TIMEOUT', '300'))
+# Espera antes de repetir uma tarefa que falhou: base * 2^(tentativa - 1), ate o maximo
+TASKS_RETRY_BACKOFF = int(os.environ.get('TASKS_RETRY_BACKOFF', '10'))
+TASKS_RETRY_BACKOFF_MAX = int(os.environ.get('TASKS_RETRY_BACKOFF_MAX', '3600'))
+TASKS_RETENTION_DAYS = int(os.environ.get('TASKS_RETENTION_DAYS', '7'))
+# Sem run_worker vivo (heartbeat mais novo que TASKS_WORKER_TIMEOUT segundos), cada
+# processo web executa a fila em uma thread; desligue se sempre houver worker dedicado
+TASKS_EMBEDDED_WORKER = os.environ.get('TASKS_EMBEDDED_WORKER', 'True').lower() in ('true', '1', 'yes')
+TASKS_WORKER_TIMEOUT = int(os.environ.get('TASKS_WORKER_TIMEOUT', '60'))
+
+# Contadores de SiteMetrics acumulados em memoria por processo (ver accounts/metrics.py)
+# e gravados a cada N eventos ou a cada intervalo (s), o que vier primeiro.
+METRICS_FLUSH_EVERY = int(os.environ.get('METRICS_FLUSH_EVERY', '100'))
+METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', '10'))
+# Grava tambem por uma thread METRICS_FLUSH_INTERVAL segundos apos o primeiro incremento
+# pendente, para workers ociosos nao segurarem contagens. Desligado em manage.py test:
+# a thread gravaria fora da transacao de cada teste.
+METRICS_FLUSH_TIMER = (
+    os.environ.get('METRICS_FLUSH_TIMER', 'True').lower() in ('true', '1', 'yes')
+    and sys.argv[1:2] != ['test']
+)
+
+# -------------------------------------------
+# 🛠️ MODO MANUTENCAO
+# -------------------------------------------
+
+# Intervalo (s) em que cada processo rele SiteSettings do banco; alternar o modo
+# manutencao vale na hora no worker que salvou e ate este prazo nos demais.
+SITE_SETTINGS_CACHE_TTL = int(os.environ.get('SITE_SETTINGS_CACHE_TTL', '5'))
+
 # -------------------------------------------
 # 🔎 DJANGO REST FRAMEWORK
 # -------------------------------------------
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task, WorkerHeartbeat
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_at', 'finished_at', 'locked_by')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'dedup_key', 'last_error')
+    readonly_fields = ('created_at', 'finished_at', 'locked_until', 'locked_by', 'last_error')
+    actions = ['requeue']
+
+    @admin.action(description='Recolocar na fila')
+    def requeue(self, request, queryset):
+        updated = queryset.filter(status='failed').update(
+            status='queued', attempts=0, run_at=timezone.now(), locked_until=None, locked_by='',
+        )
+        self.message_user(request, f'{updated} tarefa(s) recolocada(s) na fila.')
+
+
+@admin.register(WorkerHeartbeat)
+class WorkerHeartbeatAdmin(admin.ModelAdmin):
+    list_display = ('worker_id', 'last_seen')
+    readonly_fields = ('worker_id', 'last_seen')
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class TaskqueueConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'taskqueue'
+
+    def ready(self):
+        # Registra as tarefas declaradas em <app>/tasks.py
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('tasks')
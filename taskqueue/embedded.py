@@ -0,0 +1,85 @@
+"""
+Worker embutido no processo web.
+
+No Railway so o servico web e implantado (railway.json): sem um run_worker, as
+tarefas ficariam na fila para sempre. Com TASKS_EMBEDDED_WORKER, cada processo
+web (talentmatch.asgi) sobe uma thread que executa a fila enquanto nenhum
+run_worker der sinal de vida (WorkerHeartbeat); quando um worker dedicado
+aparece, a thread so observa. Tarefas interrompidas por um restart do web sao
+reassumidas apos o visibility timeout, como as de um worker que caiu.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .queue import purge_finished, run_pending, worker_running
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 3600
+# Segundos entre consultas ao heartbeat dos workers dedicados
+WORKER_CHECK_INTERVAL = 10
+
+_thread = None
+_lock = threading.Lock()
+
+
+def start_embedded_worker():
+    """Sobe a thread do worker embutido neste processo (uma vez); retorna se ela esta ativa."""
+    global _thread
+    if not getattr(settings, 'TASKS_EMBEDDED_WORKER', True) or getattr(settings, 'TASKS_RUN_INLINE', False):
+        return False
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=EmbeddedWorker().run, name='taskqueue-embedded', daemon=True)
+            _thread.start()
+    return True
+
+
+def embedded_worker_active():
+    return _thread is not None and _thread.is_alive()
+
+
+def worker_available():
+    """Se ha quem execute a fila: o worker embutido deste processo ou um run_worker vivo."""
+    return embedded_worker_active() or worker_running()
+
+
+class EmbeddedWorker:
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:embedded'
+        self._checked_at = -WORKER_CHECK_INTERVAL
+        self._purged_at = -PURGE_INTERVAL
+        self._dedicated = False
+
+    def run(self):
+        while True:
+            try:
+                count = self.run_once()
+            except Exception:
+                logger.exception('Embedded task worker iteration failed.')
+                count = 0
+            finally:
+                connections.close_all()
+            if not count:
+                time.sleep(self.interval)
+
+    def run_once(self):
+        """Executa as tarefas prontas se nao houver worker dedicado. Retorna quantas executou."""
+        now = time.monotonic()
+        if now - self._checked_at >= WORKER_CHECK_INTERVAL:
+            self._dedicated = worker_running()
+            self._checked_at = now
+        if self._dedicated:
+            return 0
+
+        if now - self._purged_at >= PURGE_INTERVAL:
+            self._purged_at = now
+            purge_finished()
+        return run_pending(self.worker_id, limit=10)
@@ -0,0 +1,118 @@
+import logging
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from taskqueue.queue import beat, claim_tasks, execute_task, forget_worker, purge_finished, run_pending
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 3600
+# Bem abaixo de TASKS_WORKER_TIMEOUT, para o web nao ligar o worker embutido a toa
+HEARTBEAT_INTERVAL = 10
+
+
+def _execute_in_thread(task, worker_id):
+    try:
+        return execute_task(task, worker_id)
+    finally:
+        # Cada thread tem as proprias conexoes; fecha para nao acumular
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Runs background tasks from the database task queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int,
+                            default=getattr(settings, 'TASKS_CONCURRENCY', 2),
+                            help='Tasks executed at the same time (1 runs them in the main thread).')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--visibility-timeout', type=int,
+                            default=getattr(settings, 'TASKS_VISIBILITY_TIMEOUT', 300),
+                            help='Seconds before a claimed but unfinished task can be claimed again.')
+        parser.add_argument('--once', action='store_true', help='Drain the ready tasks once and exit.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1.')
+
+        self.stopping = False
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._stop)
+
+        try:
+            if options['concurrency'] == 1:
+                processed = self._run_inline(options)
+            else:
+                processed = self._run_pool(options)
+        finally:
+            forget_worker(self.worker_id)
+        if options['verbosity'] >= 1:
+            self.stdout.write(self.style.SUCCESS(f'Worker stopped after {processed} tasks.'))
+
+    def _stop(self, signum, frame):
+        # Termina as tarefas em andamento e nao assume novas
+        self.stopping = True
+
+    def _maybe_beat(self):
+        now = time.monotonic()
+        if now - getattr(self, '_beat_at', -HEARTBEAT_INTERVAL) >= HEARTBEAT_INTERVAL:
+            self._beat_at = now
+            beat(self.worker_id)
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now - getattr(self, '_purged_at', -PURGE_INTERVAL) >= PURGE_INTERVAL:
+            self._purged_at = now
+            purged = purge_finished()
+            if purged:
+                logger.info(f'Purged {purged} finished tasks.')
+
+    def _run_inline(self, options):
+        processed = 0
+        while not self.stopping:
+            self._maybe_beat()
+            self._maybe_purge()
+            count = run_pending(self.worker_id, limit=10, visibility_timeout=options['visibility_timeout'])
+            processed += count
+            if not count:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        return processed
+
+    def _run_pool(self, options):
+        concurrency = options['concurrency']
+        processed = 0
+        running = set()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while not self.stopping:
+                self._maybe_beat()
+                self._maybe_purge()
+                claimed = []
+                if len(running) < concurrency:
+                    claimed = claim_tasks(self.worker_id, concurrency - len(running),
+                                          options['visibility_timeout'])
+                for task in claimed:
+                    running.add(pool.submit(_execute_in_thread, task, self.worker_id))
+                processed += len(claimed)
+
+                if claimed:
+                    continue
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                _, running = wait(running, timeout=options['interval'], return_when=FIRST_COMPLETED)
+            wait(running)
+        return processed
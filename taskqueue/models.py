@@ -0,0 +1,61 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Tarefa em segundo plano executada pelo worker (manage.py run_worker)."""
+    STATUS_CHOICES = (
+        ('queued', 'Na fila'),
+        ('running', 'Em execucao'),
+        ('done', 'Concluida'),
+        ('failed', 'Falhou'),
+    )
+
+    name = models.CharField(max_length=200, help_text='Nome registrado da tarefa')
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    dedup_key = models.CharField(
+        max_length=200, blank=True, null=True,
+        help_text='Tarefas na fila com a mesma chave sao executadas uma unica vez'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now, help_text='Nao executar antes deste horario')
+    locked_until = models.DateTimeField(
+        blank=True, null=True,
+        help_text='Fim da visibilidade: depois disso outro worker pode reassumir a tarefa'
+    )
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['run_at', 'pk']
+        verbose_name = 'Tarefa'
+        verbose_name_plural = 'Tarefas'
+        indexes = [models.Index(fields=['status', 'run_at'])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='queued'),
+                name='unique_queued_task_dedup_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+
+class WorkerHeartbeat(models.Model):
+    """Ultimo sinal de vida de cada run_worker, para o web saber se ha worker dedicado."""
+    worker_id = models.CharField(max_length=100, unique=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Worker'
+        verbose_name_plural = 'Workers'
+
+    def __str__(self):
+        return self.worker_id
@@ -0,0 +1,175 @@
+"""
+Fila de tarefas em uma tabela do banco, sem broker externo.
+
+- enqueue grava a tarefa (nome registrado + argumentos JSON); com dedup_key,
+  uma tarefa igual ainda na fila e reaproveitada em vez de duplicada (e
+  adiantada, se estava agendada para depois, ex.: esperando uma repeticao);
+- o worker (manage.py run_worker) assume tarefas com um UPDATE condicional,
+  entao varios workers podem disputar a mesma fila em SQLite ou Postgres;
+- a tarefa assumida fica invisivel ate locked_until (visibility timeout): se
+  o worker morrer, outro a reassume depois desse prazo;
+- falhas voltam para a fila com espera exponencial ate max_attempts;
+- cada run_worker grava um heartbeat (WorkerHeartbeat); sem nenhum recente,
+  o processo web executa a fila em uma thread (ver embedded).
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task, WorkerHeartbeat
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(name, *args, dedup_key=None, delay=0, max_attempts=3, **kwargs):
+    """Agenda a tarefa registrada `name`; retorna o Task gravado (ou o duplicado ja na fila)."""
+    get_task(name)
+    run_at = timezone.now() + timedelta(seconds=delay)
+
+    task = _deduplicate(dedup_key, run_at) if dedup_key else None
+    if task is None:
+        try:
+            with transaction.atomic():
+                task = Task.objects.create(
+                    name=name,
+                    args=list(args),
+                    kwargs=kwargs,
+                    dedup_key=dedup_key or None,
+                    max_attempts=max_attempts,
+                    run_at=run_at,
+                )
+        except IntegrityError:
+            # Outra requisicao enfileirou a mesma chave entre a consulta e o INSERT
+            task = _deduplicate(dedup_key, run_at)
+            if task is None:
+                raise
+
+    if getattr(settings, 'TASKS_RUN_INLINE', False) and not delay:
+        transaction.on_commit(partial(run_task_now, task.pk))
+    return task
+
+
+def _deduplicate(dedup_key, run_at):
+    """
+    Tarefa na fila com a mesma chave, adiantada para `run_at` se estava
+    agendada para depois (ex.: uma repeticao com espera exponencial), para
+    que o novo pedido nao espere a repeticao; None se nao houver.
+    """
+    existing = Task.objects.filter(dedup_key=dedup_key, status='queued').first()
+    if existing is not None and existing.run_at > run_at:
+        Task.objects.filter(pk=existing.pk, status='queued', run_at__gt=run_at).update(run_at=run_at)
+        existing.run_at = run_at
+    return existing
+
+
+def _available(now):
+    return Q(status='queued', run_at__lte=now) | Q(status='running', locked_until__lt=now)
+
+
+def claim_tasks(worker_id, limit, visibility_timeout=None, pk=None):
+    """Assume ate `limit` tarefas prontas para este worker."""
+    visibility_timeout = visibility_timeout or getattr(settings, 'TASKS_VISIBILITY_TIMEOUT', 300)
+    now = timezone.now()
+    candidates = Task.objects.filter(_available(now))
+    if pk is not None:
+        candidates = candidates.filter(pk=pk)
+
+    claimed = []
+    for task_id in candidates.order_by('run_at', 'pk').values_list('pk', flat=True)[:limit * 2]:
+        # O UPDATE so passa se ninguem assumiu a tarefa desde a consulta acima
+        updated = Task.objects.filter(_available(now), pk=task_id).update(
+            status='running',
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(task_id)
+            if len(claimed) >= limit:
+                break
+    return list(Task.objects.filter(pk__in=claimed, locked_by=worker_id).order_by('run_at', 'pk'))
+
+
+def retry_delay(attempts):
+    """Espera exponencial (com jitter) antes da tentativa seguinte."""
+    base = getattr(settings, 'TASKS_RETRY_BACKOFF', 10)
+    cap = getattr(settings, 'TASKS_RETRY_BACKOFF_MAX', 3600)
+    delay = min(base * 2 ** max(attempts - 1, 0), cap)
+    return delay * random.uniform(1.0, 1.1)
+
+
+def execute_task(task, worker_id):
+    """Executa uma tarefa assumida e registra o resultado. Retorna True em caso de sucesso."""
+    # Atualizacoes so valem enquanto a tarefa continua com este worker
+    mine = Task.objects.filter(pk=task.pk, locked_by=worker_id, attempts=task.attempts)
+
+    if task.attempts > task.max_attempts:
+        mine.update(status='failed', finished_at=timezone.now(), locked_until=None,
+                    last_error=f'{task.last_error}\nVisibility timeout expired on the last attempt.'.strip())
+        return False
+
+    try:
+        get_task(task.name)(*task.args, **task.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning(f'Task {task.pk} ({task.name}) failed on attempt {task.attempts}/{task.max_attempts}.')
+        now = timezone.now()
+        if task.attempts < task.max_attempts:
+            try:
+                with transaction.atomic():
+                    mine.update(status='queued', locked_by='', locked_until=None, last_error=error,
+                                run_at=now + timedelta(seconds=retry_delay(task.attempts)))
+            except IntegrityError:
+                # Ja ha uma copia na fila com a mesma dedup_key; ela fara o trabalho
+                mine.update(status='done', finished_at=now, locked_until=None, last_error=error)
+        else:
+            mine.update(status='failed', finished_at=now, locked_until=None, last_error=error)
+        return False
+
+    mine.update(status='done', finished_at=timezone.now(), locked_until=None)
+    return True
+
+
+def run_pending(worker_id, limit=100, visibility_timeout=None):
+    """Assume e executa em sequencia ate `limit` tarefas prontas. Retorna quantas executou."""
+    tasks = claim_tasks(worker_id, limit, visibility_timeout)
+    for task in tasks:
+        execute_task(task, worker_id)
+    return len(tasks)
+
+
+def run_task_now(pk):
+    """Executa uma tarefa especifica no processo atual (TASKS_RUN_INLINE)."""
+    for task in claim_tasks('inline', 1, pk=pk):
+        execute_task(task, 'inline')
+
+
+def purge_finished(days=None):
+    """Apaga tarefas concluidas ha mais de `days` dias; as que falharam ficam para inspecao."""
+    days = getattr(settings, 'TASKS_RETENTION_DAYS', 7) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Task.objects.filter(status='done', finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def beat(worker_id):
+    """Registra que o worker `worker_id` esta vivo."""
+    WorkerHeartbeat.objects.update_or_create(worker_id=worker_id, defaults={'last_seen': timezone.now()})
+
+
+def forget_worker(worker_id):
+    WorkerHeartbeat.objects.filter(worker_id=worker_id).delete()
+
+
+def worker_running():
+    """Se algum run_worker deu sinal de vida nos ultimos TASKS_WORKER_TIMEOUT segundos."""
+    timeout = getattr(settings, 'TASKS_WORKER_TIMEOUT', 60)
+    return WorkerHeartbeat.objects.filter(last_seen__gte=timezone.now() - timedelta(seconds=timeout)).exists()
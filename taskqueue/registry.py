@@ -0,0 +1,40 @@
+"""Registro das funcoes que podem ser enfileiradas como tarefas."""
+
+TASKS = {}
+
+
+class TaskFunction:
+    """Funcao registrada; chamar executa na hora, .enqueue() agenda no worker."""
+
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, dedup_key=None, delay=0, **kwargs):
+        from .queue import enqueue
+        return enqueue(self.name, *args, dedup_key=dedup_key, delay=delay,
+                       max_attempts=self.max_attempts, **kwargs)
+
+
+def task(name=None, max_attempts=3):
+    """
+    Registra uma funcao como tarefa. Os argumentos sao gravados em JSON,
+    entao passe IDs em vez de instancias de modelos.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        TASKS[task_name] = TaskFunction(func, task_name, max_attempts)
+        return TASKS[task_name]
+    return decorator
+
+
+def get_task(name):
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise LookupError(f'Unknown task "{name}"') from None
@@ -0,0 +1,154 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import Notification
+
+from .embedded import EmbeddedWorker, start_embedded_worker
+from .models import Task, WorkerHeartbeat
+from .queue import beat, claim_tasks, enqueue, execute_task, run_pending, worker_running
+from .registry import task
+
+User = get_user_model()
+
+CALLS = []
+
+
+@task(name='taskqueue.tests.record')
+def record(value):
+    CALLS.append(value)
+
+
+@task(name='taskqueue.tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def run_worker(self):
+        call_command('run_worker', once=True, concurrency=1, stdout=StringIO())
+
+    def test_worker_runs_queued_tasks(self):
+        record.enqueue('a')
+        enqueue('taskqueue.tests.record', 'b')
+        self.run_worker()
+
+        self.assertEqual(CALLS, ['a', 'b'])
+        self.assertEqual(set(Task.objects.values_list('status', flat=True)), {'done'})
+
+    def test_dedup_key_collapses_queued_tasks(self):
+        first = record.enqueue('x', dedup_key='same')
+        self.assertEqual(record.enqueue('y', dedup_key='same'), first)
+        self.run_worker()
+        self.assertEqual(CALLS, ['x'])
+
+        # Depois de executada, a chave volta a aceitar uma nova tarefa
+        self.assertNotEqual(record.enqueue('z', dedup_key='same'), first)
+
+    @override_settings(TASKS_RETRY_BACKOFF=3600)
+    def test_dedup_moves_backed_off_task_forward(self):
+        queued = explode.enqueue(dedup_key='retry')
+        run_pending('w')
+        queued.refresh_from_db()
+        self.assertGreater(queued.run_at, timezone.now() + timedelta(minutes=30))
+
+        # Um novo pedido nao espera a repeticao; um pedido mais tardio nao a adia
+        self.assertEqual(explode.enqueue(dedup_key='retry').pk, queued.pk)
+        self.assertEqual(claim_tasks('w', 1)[0].pk, queued.pk)
+        Task.objects.filter(pk=queued.pk).update(status='queued', run_at=timezone.now())
+        explode.enqueue(dedup_key='retry', delay=600)
+        self.assertLess(Task.objects.get(pk=queued.pk).run_at, timezone.now())
+
+    def test_worker_summary_respects_verbosity(self):
+        out = StringIO()
+        call_command('run_worker', once=True, concurrency=1, verbosity=0, stdout=out)
+        self.assertEqual(out.getvalue(), '')
+        call_command('run_worker', once=True, concurrency=1, stdout=out)
+        self.assertIn('Worker stopped after 0 tasks.', out.getvalue())
+
+    def test_delayed_task_waits_for_run_at(self):
+        record.enqueue('depois', delay=60)
+        self.assertEqual(run_pending('w'), 0)
+        Task.objects.update(run_at=timezone.now())
+        self.assertEqual(run_pending('w'), 1)
+
+    @override_settings(TASKS_RETRY_BACKOFF=30)
+    def test_failures_retry_with_backoff_then_fail(self):
+        queued = explode.enqueue()
+        run_pending('w')
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('queued', 1))
+        self.assertIn('boom', queued.last_error)
+        self.assertGreaterEqual(queued.run_at, timezone.now() + timedelta(seconds=29))
+
+        Task.objects.update(run_at=timezone.now())
+        run_pending('w')
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 2))
+
+    def test_expired_visibility_timeout_is_reclaimed(self):
+        record.enqueue('lento')
+        [stuck] = claim_tasks('w1', 1, visibility_timeout=60)
+        self.assertEqual(claim_tasks('w2', 1), [])
+
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        [reclaimed] = claim_tasks('w2', 1)
+        self.assertEqual(reclaimed.attempts, 2)
+
+        # O primeiro worker termina atrasado: o resultado dele e ignorado
+        execute_task(stuck, 'w1')
+        reclaimed.refresh_from_db()
+        self.assertEqual(reclaimed.status, 'running')
+        execute_task(reclaimed, 'w2')
+        reclaimed.refresh_from_db()
+        self.assertEqual(reclaimed.status, 'done')
+
+    @override_settings(EMAIL_OUTBOX_DELAY=0)
+    def test_notification_email_is_sent_by_worker(self):
+        user = User.objects.create_user(username='aviso', email='aviso@example.com', password='x')
+        Notification.notify_user(user, 'system', 'Ola', 'Mensagem')
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'TalentMatch - Ola')
+
+
+class EmbeddedWorkerTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_runs_the_queue_without_a_dedicated_worker(self):
+        record.enqueue('a')
+        self.assertFalse(worker_running())
+        self.assertEqual(EmbeddedWorker().run_once(), 1)
+        self.assertEqual(CALLS, ['a'])
+
+    def test_stands_by_while_a_dedicated_worker_is_alive(self):
+        beat('host:1')
+        record.enqueue('a')
+        self.assertEqual(EmbeddedWorker().run_once(), 0)
+
+        WorkerHeartbeat.objects.update(last_seen=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(EmbeddedWorker().run_once(), 1)
+
+    def test_run_worker_beats_and_forgets_on_exit(self):
+        with mock.patch('taskqueue.management.commands.run_worker.forget_worker'):
+            call_command('run_worker', once=True, concurrency=1, stdout=StringIO())
+        self.assertTrue(worker_running())
+
+        call_command('run_worker', once=True, concurrency=1, stdout=StringIO())
+        self.assertFalse(WorkerHeartbeat.objects.exists())
+
+    @override_settings(TASKS_EMBEDDED_WORKER=False)
+    def test_can_be_disabled(self):
+        self.assertFalse(start_embedded_worker())